@@ -0,0 +1,88 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+# Configuração do banco a partir de variáveis de ambiente.
+# DB_ENGINE=sqlite (padrão, arquivo db.sqlite3 ou DB_NAME) ou postgresql (DB_NAME, DB_USER,
+# DB_PASSWORD, DB_HOST, DB_PORT). Os PRAGMAs do SQLite ficam na chave PRAGMAS do próprio
+# banco e são aplicados a cada conexão nova por aplicar_pragmas (sinal connection_created).
+# SQLITE_JOURNAL_MODE=WAL liga o WAL (recomendado em produção). Fica desligado por padrão porque
+# o modo fica gravado no próprio arquivo: qualquer manage.py alteraria o db.sqlite3 versionado.
+# DB_CONN_MAX_AGE: sem valor, as conexões são persistentes só sob WSGI (gunicorn/runserver);
+# o asgi.py define 0, pois sob ASGI cada requisição síncrona roda numa thread nova e as
+# conexões persistentes dessas threads nunca seriam reaproveitadas nem fechadas.
+CONN_MAX_AGE_WSGI = 600
+
+
+def configurar(base_dir, ambiente=os.environ):
+    motor = ambiente.get('DB_ENGINE', 'sqlite')
+    if motor == 'sqlite':
+        return {'default': sqlite(base_dir, ambiente)}
+    if motor == 'postgresql':
+        return {'default': postgresql(ambiente)}
+    raise ImproperlyConfigured(f"DB_ENGINE inválido: {motor!r} (use sqlite ou postgresql)")
+
+
+def sqlite(base_dir, ambiente):
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ambiente.get('DB_NAME') or base_dir / 'db.sqlite3',
+        # Conexão reaproveitada entre requisições da mesma thread (PRAGMAs aplicados uma vez)
+        'CONN_MAX_AGE': int(ambiente.get('DB_CONN_MAX_AGE', CONN_MAX_AGE_WSGI)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # transaction.atomic() abre com BEGIN IMMEDIATE: a transação pega o lock de escrita no
+            # início e espera o busy_timeout, em vez de falhar com "database is locked" quando uma
+            # transação que começou lendo tenta escrever enquanto outra escreve
+            'transaction_mode': ambiente.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        },
+        'PRAGMAS': {
+            # NORMAL só faz fsync no commit do journal (no checkpoint, com WAL)
+            'synchronous': ambiente.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+            'busy_timeout': int(ambiente.get('SQLITE_BUSY_TIMEOUT', 5000)),  # ms esperando o lock
+            'mmap_size': int(ambiente.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+            'cache_size': int(ambiente.get('SQLITE_CACHE_SIZE', -20000)),  # negativo = KiB por conexão
+            'temp_store': 'MEMORY',
+        },
+    }
+    if ambiente.get('SQLITE_JOURNAL_MODE'):
+        # WAL: leitores não bloqueiam o escritor (e vice-versa)
+        config['PRAGMAS'] = {'journal_mode': ambiente['SQLITE_JOURNAL_MODE'], **config['PRAGMAS']}
+    return config
+
+
+def postgresql(ambiente):
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': ambiente.get('DB_NAME', 'imobiliaria'),
+        'USER': ambiente.get('DB_USER', 'imobiliaria'),
+        'PASSWORD': ambiente.get('DB_PASSWORD', ''),
+        'HOST': ambiente.get('DB_HOST', 'localhost'),
+        'PORT': ambiente.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(ambiente.get('DB_CONN_MAX_AGE', CONN_MAX_AGE_WSGI)),
+        # Testa a conexão persistente antes de reaproveitá-la (reinício do servidor, failover)
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'connect_timeout': int(ambiente.get('DB_CONNECT_TIMEOUT', 5))},
+    }
+    tamanho_pool = int(ambiente.get('DB_POOL_MAX', 0))
+    if tamanho_pool:
+        # Pool do psycopg 3 (pip install "psycopg[pool]"); recomendado sob ASGI.
+        # O pool não convive com conexões persistentes, e ele mesmo testa cada conexão emprestada
+        from psycopg_pool import ConnectionPool
+
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': int(ambiente.get('DB_POOL_MIN', 2)),
+            'max_size': tamanho_pool,
+            'timeout': int(ambiente.get('DB_POOL_TIMEOUT', 10)),
+            'check': ConnectionPool.check_connection,
+        }
+    return config
+
+
+def aplicar_pragmas(sender, connection, **kwargs):
+    pragmas = connection.settings_dict.get('PRAGMAS')
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    for nome, valor in pragmas.items():
+        connection.connection.execute(f'PRAGMA {nome} = {valor}')
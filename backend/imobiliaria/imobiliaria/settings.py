@@ -1,6 +1,8 @@
 from pathlib import Path
 import os
 
+from . import banco
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -34,6 +36,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'project.metricas.MetricasMiddleware',
+    'project.n_mais_um.NMaisUmMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
 
@@ -81,13 +85,9 @@ WSGI_APPLICATION = 'imobiliaria.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# Variáveis DB_* e SQLITE_* (ver imobiliaria/banco.py); sem elas, SQLite em db.sqlite3 (WAL com SQLITE_JOURNAL_MODE=WAL)
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+DATABASES = banco.configurar(BASE_DIR)
 
 
 # Password validation
@@ -124,22 +124,135 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
-STATIC_URL = '/media/logos/'
+STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
 STATICFILES_DIRS = [
-    BASE_DIR / 'media/logos',  # Certifique-se de que a pasta 'static' existe no projeto
+    ('logos', BASE_DIR / 'logos'),  # logo padrão da LogoView: static('logos/banner_1.png')
 ]
 
 # Configurações de mídia
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
-# Configurações estáticas
-STATIC_URL = '/static/'
-STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
+STORAGES = {
+    # Uploads com o hash do conteúdo no nome, servidos com Cache-Control immutable (project/midia.py)
+    'default': {'BACKEND': 'project.midia.ArmazenamentoMidia'},
+    # O collectstatic grava também as versões .gz dos arquivos de texto (gzip_static on no nginx)
+    'staticfiles': {'BACKEND': 'project.midia.ArmazenamentoEstatico'},
+}
+
+# Entrega de /media/ pelo Django (project/midia.py), quando o nginx não serve a pasta direto.
+# OFFLOAD: '' (o worker envia o arquivo, com sendfile no gunicorn), 'x-accel-redirect' (nginx, com
+# uma location internal em PREFIXO_INTERNO apontando para MEDIA_ROOT) ou 'x-sendfile' (Apache/lighttpd)
+MIDIA = {
+    'OFFLOAD': os.environ.get('MIDIA_OFFLOAD', ''),
+    'PREFIXO_INTERNO': os.environ.get('MIDIA_PREFIXO_INTERNO', '/_midia/'),
+    'MAX_AGE': int(os.environ.get('MIDIA_MAX_AGE', 3600)),  # arquivos sem hash no nome (uploads antigos)
+}
 
 # Extensões permitidas (opcional)
 FILE_UPLOAD_PERMISSIONS = 0o644
 
+# Cache
+# LocMemCache é por processo: com vários workers do gunicorn a invalidação por sinal só
+# alcança o worker que salvou. Nesse caso use o cache em arquivo (DJANGO_CACHE_BACKEND=
+# django.core.cache.backends.filebased.FileBasedCache e DJANGO_CACHE_LOCATION=/caminho).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'imobiliaria'),
+    }
+}
+
+# Tempo máximo (segundos) que logo, sobre e banners ficam em cache mesmo sem invalidação
+CACHE_TTL_CONTEUDO = int(os.environ.get('CACHE_TTL_CONTEUDO', 3600))
+
+# Integração com o Sigavi (sincronização do catálogo)
+SIGAVI = {
+    'BASE_URL': os.environ.get('SIGAVI_BASE_URL', 'https://cmarqx.sigavi360.com.br'),
+    'USERNAME': os.environ.get('SIGAVI_USERNAME', 'integracao'),
+    # Sem padrão: a credencial vem só do ambiente; sem ela a sincronização falha antes de acessar o Sigavi
+    'PASSWORD': os.environ.get('SIGAVI_PASSWORD', ''),
+    'TIMEOUT': int(os.environ.get('SIGAVI_TIMEOUT', 30)),
+    # Validade (segundos) do token quando a resposta de autenticação não traz expires_in
+    'TOKEN_TTL': int(os.environ.get('SIGAVI_TOKEN_TTL', 1800)),
+    'POOL_SIZE': int(os.environ.get('SIGAVI_POOL_SIZE', 10)),  # conexões keep-alive ociosas por host
+    # Chamadas simultâneas ao Sigavi por processo nas views assíncronas (ASGI)
+    'THREADS': int(os.environ.get('SIGAVI_THREADS', 32)),
+    # Fichas de empreendimento (/api/empreendimentos/<id>/): frescas por CACHE_TTL, servidas
+    # vencidas por até CACHE_STALE enquanto são revalidadas em segundo plano
+    'CACHE_TTL': int(os.environ.get('SIGAVI_CACHE_TTL', 300)),
+    'CACHE_STALE': int(os.environ.get('SIGAVI_CACHE_STALE', 3600)),
+}
+
+# Geocodificação no servidor (comando geocodificar_imoveis)
+GEOCODING = {
+    'PROVIDER': os.environ.get('GEOCODING_PROVIDER', 'project.geocoding.GoogleGeocodingProvider'),
+    'API_KEY': os.environ.get('GOOGLE_MAPS_API_KEY', ''),
+    'RATE_LIMIT': float(os.environ.get('GEOCODING_RATE_LIMIT', 10)),  # requisições por segundo
+    'WORKERS': int(os.environ.get('GEOCODING_WORKERS', 4)),
+}
+
+# Horários de visita oferecidos em /api/agendamentos/disponibilidade/
+AGENDA = {
+    'HORARIOS': ['09:00', '10:00', '11:00', '12:00', '13:00', '14:00', '15:00', '16:00', '17:00', '18:00'],
+    'DIAS_SEMANA': [0, 1, 2, 3, 4],  # segunda a sexta (date.weekday())
+    'DIAS_PADRAO': 14,  # intervalo usado quando "to" não é informado
+    'MAX_DIAS': 62,
+    # Tempo máximo (segundos) dos horários ocupados em cache. O sinal do agendamento só limpa o
+    # cache do processo que gravou; com LocMemCache os outros workers veem a mudança após esse prazo
+    'CACHE_TTL': int(os.environ.get('AGENDA_CACHE_TTL', 60)),
+}
+
+# Gravação adiada dos leads (contato, newsletter, ligação) em uma fila SQLite local; ver project/spool.py.
+# DURABILIDADE: 'full' (fsync a cada lead), 'normal' (sobrevive à queda do processo) ou 'off'.
+LEADS_SPOOL = {
+    'ATIVO': os.environ.get('LEADS_SPOOL_ATIVO', 'False') == 'True',
+    'CAMINHO': os.environ.get('LEADS_SPOOL_CAMINHO', os.path.join(BASE_DIR, 'spool', 'leads.sqlite3')),
+    'DURABILIDADE': os.environ.get('LEADS_SPOOL_DURABILIDADE', 'normal'),
+    'LOTE': int(os.environ.get('LEADS_SPOOL_LOTE', 200)),
+    'INTERVALO': float(os.environ.get('LEADS_SPOOL_INTERVALO', 1.0)),  # segundos entre descargas
+}
+
+# Variantes redimensionadas das imagens enviadas (project/imagens.py)
+IMAGENS = {
+    'LARGURAS': [320, 640, 1024, 1600],
+    'QUALIDADE': int(os.environ.get('IMAGENS_QUALIDADE', 80)),
+    'ASSINCRONO': os.environ.get('IMAGENS_ASSINCRONO', 'True') == 'True',
+    'WORKERS': int(os.environ.get('IMAGENS_WORKERS', 2)),
+}
+
+# Instrumentação por requisição (project/metricas.py): cabeçalho Server-Timing, histogramas por
+# rota em /metrics (formato texto do Prometheus) e log amostrado de queries lentas.
+# Fora do DEBUG ficam desligados por padrão: o Server-Timing expõe o tempo de banco a qualquer
+# cliente, e em produção /metrics deve ser ligado junto com METRICAS_TOKEN
+METRICAS = {
+    'ATIVO': os.environ.get('METRICAS_ATIVO', str(DEBUG)) == 'True',
+    'SERVER_TIMING': os.environ.get('METRICAS_SERVER_TIMING', str(DEBUG)) == 'True',
+    'TOKEN': os.environ.get('METRICAS_TOKEN', ''),  # se definido, /metrics exige "Authorization: Bearer <token>"
+    'QUERY_LENTA_MS': float(os.environ.get('METRICAS_QUERY_LENTA_MS', 0)),  # 0 desativa o log de queries lentas
+    'AMOSTRAGEM_QUERIES_LENTAS': float(os.environ.get('METRICAS_AMOSTRAGEM_QUERIES_LENTAS', 1.0)),  # fração logada
+}
+
+# Detecção de N+1 (project/n_mais_um.py): a mesma consulta de relação repetida LIMITE vezes numa
+# requisição vai para o log; com LEVANTAR (sempre na suíte de testes) vira exceção
+N_MAIS_UM = {
+    'ATIVO': os.environ.get('N_MAIS_UM_ATIVO', str(DEBUG)) == 'True',
+    'LEVANTAR': os.environ.get('N_MAIS_UM_LEVANTAR', 'False') == 'True',
+    'LIMITE': int(os.environ.get('N_MAIS_UM_LIMITE', 3)),
+}
+
+TEST_RUNNER = 'project.n_mais_um.TestRunner'
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'project.renderers.JSONRenderer',  # mede a renderização para o Server-Timing
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Os serializers devolvem Decimal; o JSONRenderer do projeto o escreve como string exata
+    'COERCE_DECIMAL_TO_STRING': False,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -1,9 +1,15 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from project.views import metricas_view, midia_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),  # URLs do Django Admin
     path('api/', include('project.urls')),  # Suas URLs personalizadas
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    path('metrics', metricas_view, name='metrics'),  # Prometheus (project/metricas.py)
+    # Uploads (project/midia.py): Range, 304 e Cache-Control immutable, também fora do DEBUG
+    re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<caminho>.+)$', midia_view, name='midia'),
+]
\ No newline at end of file
@@ -1,16 +1,249 @@
+import re
+
 from django.contrib import admin
-from django.apps import apps
-from django.contrib.admin.sites import AlreadyRegistered
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+
+from .busca import filtrar as buscar_imoveis
+from .exportacao import acoes_admin
+from .geocoding import normalizar_endereco
+from .imagens import menor_variante
+from .models import (
+    About, Agendamento, BannerCarrossel, CallRequest, Configuracao, Contact, Corretor, GeocodeCache, Imovel,
+    ImovelFoto, Lancamento, LancamentoFoto, NewsletterSubscriber, Pagina,
+)
 
 # Customize the admin site header
 admin.site.site_header = "Imobiliária Admin Panel"
 admin.site.site_title = "Imobiliária Admin"
 admin.site.index_title = "Welcome to Imobiliária Admin Panel"
 
-# Register all models dynamically
-models = apps.get_models()
-for model in models:
-    try:
-        admin.site.register(model)
-    except AlreadyRegistered:
-        pass  # Skip models that are already registered
\ No newline at end of file
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator que evita COUNT(*) exato em tabelas grandes.
+
+    Conta no máximo LIMITE linhas; abaixo disso a contagem é exata. Acima, sem filtros, usa a
+    estimativa do banco (reltuples no PostgreSQL, maior id no SQLite), e com filtros fica em LIMITE.
+    """
+    LIMITE = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limitado = queryset.order_by()[:self.LIMITE].count()
+        if limitado < self.LIMITE or queryset.query.where:
+            return limitado
+        # O maior id do SQLite supera o total depois de exclusões; nunca fica abaixo do já contado
+        return max(self.estimar(queryset) or 0, limitado)
+
+    def estimar(self, queryset):
+        model = queryset.model
+        conexao = connections[queryset.db]
+        with conexao.cursor() as cursor:
+            if conexao.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+                linha = cursor.fetchone()
+                # -1/0 quando a tabela ainda não passou por ANALYZE
+                if linha and linha[0] > 0:
+                    return linha[0]
+                return None
+        pk = model._meta.pk
+        if not pk.get_internal_type().endswith('AutoField'):
+            return None
+        return queryset.order_by().aggregate(ultimo=Max(pk.name))['ultimo'] or 0
+
+
+class AdminRapido(admin.ModelAdmin):
+    # Sem o segundo COUNT(*) do changelist ("X de Y selecionados") e com contagem estimada
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    list_per_page = 50
+
+
+class BuscaIndexadaMixin:
+    # E-mails, códigos e telefones viram igualdade exata e nomes, prefixo por faixa no índice,
+    # em vez de LIKE '%termo%' em todas as colunas
+    campo_codigo = None  # ex.: 'sigavi_id', buscado quando o termo é numérico
+    campo_telefone = None  # buscado quando o termo só tem dígitos e pontuação de telefone
+    campo_nome = None  # buscado pelo início, como digitado ou com iniciais maiúsculas ("ana s" -> "Ana S")
+
+    def get_search_results(self, request, queryset, search_term):
+        termo = search_term.strip()
+        if termo and ' ' not in termo:
+            if '@' in termo and any(campo.name == 'email' for campo in self.model._meta.fields):
+                return queryset.filter(email__in={termo, termo.lower()}), False
+            if self.campo_codigo and termo.isdigit():
+                return queryset.filter(**{self.campo_codigo: termo}), False
+        if termo and self.campo_telefone and re.fullmatch(r'[\d\s()+-]*\d[\d\s()+-]*', termo):
+            return queryset.filter(**{self.campo_telefone: termo}), False
+        if termo and self.campo_nome:
+            # Só duas faixas: com mais, sem estatísticas (ANALYZE) o SQLite prefere varrer a tabela
+            faixas = Q()
+            for prefixo in {termo, termo.title()}:
+                # nome >= 'Ana' e < 'Anb': mesma faixa que LIKE 'Ana%', mas resolvida pelo índice
+                faixas |= Q(**{
+                    f'{self.campo_nome}__gte': prefixo, f'{self.campo_nome}__lt': prefixo[:-1] + chr(ord(prefixo[-1]) + 1),
+                })
+            return queryset.filter(faixas), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+def miniatura(arquivo, variantes=None, url_externa=''):
+    # Usa a menor variante gerada (imagens.py) em vez da imagem original
+    if arquivo:
+        url = menor_variante(arquivo, variantes)
+    elif url_externa:
+        url = url_externa
+    else:
+        return '-'
+    return format_html('<img src="{}" loading="lazy" style="height: 60px; width: auto" />', url)
+
+
+class ImovelFotoInline(admin.TabularInline):
+    model = ImovelFoto
+    fields = ['miniatura', 'foto', 'url_externa', 'ordem']
+    readonly_fields = ['miniatura']
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).order_by('ordem', 'id')
+
+    @admin.display(description='Miniatura')
+    def miniatura(self, obj):
+        return miniatura(obj.foto, obj.variantes, obj.url_externa)
+
+
+@admin.register(Imovel)
+class ImovelAdmin(AdminRapido):
+    list_display = ['titulo', 'tipo', 'tipo_operacao', 'preco', 'bairro', 'cidade', 'disponivel', 'destaque']
+    # Filtros sobre colunas com índice (ver Imovel.Meta.indexes)
+    list_filter = ['disponivel', 'destaque', 'tipo_operacao', 'tipo']
+    search_fields = ['titulo', 'bairro', 'cidade']
+    readonly_fields = ['sigavi_id', 'hash_conteudo', 'atualizado_em']
+    inlines = [ImovelFotoInline]
+
+    def get_search_results(self, request, queryset, search_term):
+        # Busca textual pelo índice FTS (busca.py) em vez de LIKE em cada coluna
+        if not search_term.strip():
+            return queryset, False
+        return buscar_imoveis(queryset, search_term), False
+
+
+@admin.register(ImovelFoto)
+class ImovelFotoAdmin(AdminRapido):
+    list_display = ['imovel', 'ordem', 'miniatura']
+    list_select_related = ['imovel']
+    raw_id_fields = ['imovel']
+
+    @admin.display(description='Miniatura')
+    def miniatura(self, obj):
+        return miniatura(obj.foto, obj.variantes, obj.url_externa)
+
+
+class LancamentoFotoInline(admin.TabularInline):
+    model = LancamentoFoto
+    fields = ['miniatura', 'url', 'descricao', 'ordem']
+    readonly_fields = ['miniatura']
+    extra = 0
+
+    @admin.display(description='Miniatura')
+    def miniatura(self, obj):
+        return miniatura(None, url_externa=obj.url)
+
+
+@admin.register(Lancamento)
+class LancamentoAdmin(BuscaIndexadaMixin, AdminRapido):
+    list_display = ['nome', 'fase', 'valor', 'bairro', 'cidade', 'ativo', 'destaque']
+    list_filter = ['ativo', 'destaque']
+    search_fields = ['nome']
+    campo_codigo = 'sigavi_id'
+    readonly_fields = ['sigavi_id', 'hash_conteudo', 'atualizado_em', 'dados']
+    inlines = [LancamentoFotoInline]
+
+
+@admin.register(Corretor)
+class CorretorAdmin(BuscaIndexadaMixin, AdminRapido):
+    list_display = ['nome', 'cargo', 'creci', 'email', 'telefone', 'ativo']
+    list_filter = ['ativo']
+    search_fields = ['nome', 'creci']
+    campo_codigo = 'sigavi_id'
+
+
+# Leads: filtro por data (intervalos sobre colunas indexadas) e exportação em streaming para o CRM.
+# list_filter por data no lugar de date_hierarchy, que faz um SELECT DISTINCT de datas na tabela toda.
+@admin.register(Contact)
+class ContactAdmin(BuscaIndexadaMixin, AdminRapido):
+    list_display = ['nome', 'email', 'telefone', 'data_envio']
+    list_filter = ['data_envio']
+    search_fields = ['^nome', '=telefone']
+    campo_nome, campo_telefone = 'nome', 'telefone'
+    actions = acoes_admin('contatos')
+
+
+@admin.register(CallRequest)
+class CallRequestAdmin(BuscaIndexadaMixin, AdminRapido):
+    list_display = ['name', 'email', 'phone', 'requested_at']
+    list_filter = ['requested_at']
+    search_fields = ['^name', '=phone']
+    campo_nome, campo_telefone = 'name', 'phone'
+    actions = acoes_admin('ligacoes')
+
+
+@admin.register(Agendamento)
+class AgendamentoAdmin(BuscaIndexadaMixin, AdminRapido):
+    list_display = ['nome', 'imovel_id', 'data_visita', 'hora_visita', 'criado_em']
+    list_filter = ['data_visita', 'criado_em']
+    search_fields = ['nome']
+    campo_codigo = 'imovel_id'
+    actions = acoes_admin('agendamentos')
+
+
+@admin.register(NewsletterSubscriber)
+class NewsletterSubscriberAdmin(BuscaIndexadaMixin, AdminRapido):
+    list_display = ['email', 'subscribed_at']
+    list_filter = ['subscribed_at']
+    search_fields = ['email']
+    actions = acoes_admin('newsletter')
+
+
+@admin.register(BannerCarrossel)
+class BannerCarrosselAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'miniatura', 'ordem', 'ativo']
+    list_editable = ['ordem', 'ativo']
+    list_filter = ['ativo']
+
+    @admin.display(description='Miniatura')
+    def miniatura(self, obj):
+        return miniatura(obj.imagem, obj.variantes)
+
+
+@admin.register(About)
+class AboutAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'miniatura']
+
+    @admin.display(description='Miniatura')
+    def miniatura(self, obj):
+        return miniatura(obj.foto, obj.variantes)
+
+
+@admin.register(Configuracao)
+class ConfiguracaoAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'logo_tag']
+
+
+@admin.register(GeocodeCache)
+class GeocodeCacheAdmin(AdminRapido):
+    list_display = ['endereco', 'latitude', 'longitude', 'provedor', 'atualizado_em']
+    search_fields = ['endereco']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Endereços são guardados normalizados (chave única): busca exata pelo índice
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(endereco=normalizar_endereco(search_term)), False
+
+
+admin.site.register(Pagina)
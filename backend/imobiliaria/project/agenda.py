@@ -0,0 +1,96 @@
+import datetime
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Agendamento
+
+
+def horarios():
+    return settings.AGENDA['HORARIOS']
+
+
+def normalizar_hora(valor):
+    # Aceita "9:00", "09:00" e "0900" (formato antigo do frontend)
+    correspondencia = re.fullmatch(r'(\d{1,2}):?(\d{2})', str(valor or '').strip())
+    if not correspondencia:
+        return None
+    return f"{int(correspondencia.group(1)):02d}:{correspondencia.group(2)}"
+
+
+def dia_atende(data):
+    return data.weekday() in settings.AGENDA['DIAS_SEMANA']
+
+
+class DisponibilidadeSerializer(serializers.Serializer):
+    # "from"/"to" são palavras reservadas em Python, então os campos são declarados aqui
+    def get_fields(self):
+        return {
+            'imovel_id': serializers.CharField(max_length=100),
+            'from': serializers.DateField(required=False),
+            'to': serializers.DateField(required=False),
+        }
+
+    def validate(self, attrs):
+        hoje = timezone.localdate()
+        inicio = max(attrs.get('from') or hoje, hoje)
+        fim = attrs.get('to') or inicio + datetime.timedelta(days=settings.AGENDA['DIAS_PADRAO'] - 1)
+        if fim < inicio:
+            raise serializers.ValidationError({'to': "Deve ser igual ou posterior a from."})
+        if (fim - inicio).days >= settings.AGENDA['MAX_DIAS']:
+            raise serializers.ValidationError({'to': f"Intervalo máximo de {settings.AGENDA['MAX_DIAS']} dias."})
+        return {'imovel_id': attrs['imovel_id'], 'inicio': inicio, 'fim': fim}
+
+
+def _chave(imovel_id, data):
+    return f"agenda:{imovel_id}:{data.isoformat()}"
+
+
+def invalidar_dia(imovel_id, data):
+    cache.delete(_chave(imovel_id, data))
+
+
+def horarios_ocupados(imovel_id, dias, usar_cache=True):
+    """{data: set(horas)} dos dias pedidos; dias fora do cache saem de uma única consulta indexada.
+
+    Com usar_cache=False todos os dias são lidos do banco (e regravados no cache).
+    """
+    chaves = {_chave(imovel_id, dia): dia for dia in dias}
+    em_cache = cache.get_many(chaves) if usar_cache else {}
+    ocupados = {chaves[chave]: set(horas) for chave, horas in em_cache.items()}
+
+    faltando = [dia for chave, dia in chaves.items() if chave not in em_cache]
+    if faltando:
+        calculados = {dia: set() for dia in faltando}
+        for data, hora in Agendamento.objects.filter(
+            imovel_id=imovel_id, data_visita__range=(min(faltando), max(faltando))
+        ).values_list('data_visita', 'hora_visita'):
+            if data in calculados:
+                calculados[data].add(hora)
+        cache.set_many(
+            {_chave(imovel_id, dia): sorted(horas) for dia, horas in calculados.items()},
+            settings.AGENDA['CACHE_TTL'],
+        )
+        ocupados.update(calculados)
+    return ocupados
+
+
+def disponibilidade(imovel_id, inicio, fim, usar_cache=True):
+    dias = [inicio + datetime.timedelta(days=n) for n in range((fim - inicio).days + 1)]
+    dias = [dia for dia in dias if dia_atende(dia)]
+    ocupados = horarios_ocupados(imovel_id, dias, usar_cache)
+
+    # Horários que já passaram hoje não são oferecidos (calculado fora do cache)
+    agora = timezone.localtime()
+    hora_atual = agora.strftime('%H:%M')
+    resultado = []
+    for dia in dias:
+        livres = [
+            hora for hora in horarios()
+            if hora not in ocupados[dia] and (dia != agora.date() or hora > hora_atual)
+        ]
+        resultado.append({'data': dia.isoformat(), 'horarios': livres})
+    return resultado
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class ProjectConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'project'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from imobiliaria.banco import aplicar_pragmas
+
+        from . import signals  # noqa: F401
+        from . import metricas, n_mais_um
+        connection_created.connect(aplicar_pragmas, dispatch_uid='imobiliaria.banco.aplicar_pragmas')
+        connection_created.connect(metricas.instrumentar_conexao, dispatch_uid='project.metricas.instrumentar_conexao')
+        connection_created.connect(n_mais_um.instrumentar_conexao, dispatch_uid='project.n_mais_um.instrumentar_conexao')
@@ -0,0 +1,62 @@
+import asyncio
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from rest_framework.views import APIView
+
+# Views de leitura assíncronas. O DRF 3.15 só tem APIView síncrona: sob ASGI o Django a executa
+# numa thread à parte, e uma chamada lenta ao Sigavi prende essa thread até responder. Esta base
+# repete o dispatch do APIView (autenticação, permissões, exceções e renderização do DRF) como
+# corrotina, então os handlers podem usar o ORM assíncrono e liberar o event loop durante o I/O.
+# Sob WSGI (gunicorn sync/gthread) o Django continua executando estas views normalmente.
+
+
+class AsyncAPIView(APIView):
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # O csrf_exempt do APIView.as_view já preserva a marcação de corrotina do View.as_view
+        assert iscoroutinefunction(view), f"{cls.__name__}: todos os handlers precisam ser async"
+        return view
+
+    def autenticacao_consulta_banco(self, request):
+        # Sessão e Basic Auth carregam o usuário com o ORM síncrono; visitantes anônimos não consultam o banco
+        return bool(self.authentication_classes) and (
+            settings.SESSION_COOKIE_NAME in request.COOKIES or 'HTTP_AUTHORIZATION' in request.META
+        )
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            if self.autenticacao_consulta_banco(request):
+                await sync_to_async(self.initial)(request, *args, **kwargs)
+            else:
+                self.initial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.renderizar(self.response)
+
+    def renderizar(self, response):
+        # O Response do DRF é um TemplateResponse, que o handler ASGI renderizaria depois numa
+        # thread à parte; renderizado aqui, segue adiante como um HttpResponse comum
+        response.render()
+        final = HttpResponse(response.content, status=response.status_code)
+        for cabecalho, valor in response.items():
+            final[cabecalho] = valor
+        return final
@@ -0,0 +1,320 @@
+import datetime
+import http.client
+import json
+import platform
+import re
+import statistics
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .dados_sinteticos import DOMINIO, dias_de_visita
+
+# Benchmark da API (comando bench_api): um cenário por endpoint de project/urls.py, medido
+# com o Client de teste do Django (latência, queries por requisição e pico de memória) e num
+# servidor WSGI local de verdade (latência com HTTP real). comparar() aponta regressões entre
+# dois resultados gravados em JSON.
+
+VERSAO_FORMATO = 1
+
+
+class Cenario:
+    def __init__(self, nome, rota, metodo='GET', args=None, dados=None, staff=False):
+        self.nome = nome
+        self.rota = rota
+        self.metodo = metodo
+        self.args = args or []
+        # dados: dict fixo ou função do índice da requisição (POSTs com e-mails/horários únicos)
+        self.dados = dados or {}
+        self.staff = staff
+
+    def caminho(self, indice):
+        args = [arg(indice) if callable(arg) else arg for arg in self.args]
+        return reverse(self.rota, args=args)
+
+    def corpo(self, indice):
+        return self.dados(indice) if callable(self.dados) else dict(self.dados)
+
+    def executar(self, client, indice):
+        """Faz a requisição do cenário com o Client de teste."""
+        if self.metodo == 'GET':
+            return client.get(self.caminho(indice), self.corpo(indice))
+        return client.post(self.caminho(indice), self.corpo(indice), content_type='application/json')
+
+
+def _agendamento(indice):
+    dia = dias_de_visita(1)[0]
+    return {
+        'imovel_id': f'bench-{indice}', 'titulo': 'Benchmark', 'nome': 'Visitante', 'email': f'visita{indice}@{DOMINIO}',
+        'telefone': '11999990000', 'data_visita': dia.isoformat(), 'hora_visita': settings.AGENDA['HORARIOS'][0],
+    }
+
+
+def cenarios(imovel_id=1):
+    hoje = timezone.localdate()
+    return [
+        Cenario('imoveis-lista', 'imoveis', dados={'limit': 20}),
+        Cenario('imoveis-cards', 'imoveis', dados={'limit': 20, 'perfil': 'card'}),
+        Cenario('imoveis-busca', 'imoveis', dados={'q': 'varanda moema'}),
+        Cenario('imoveis-filtros', 'imoveis', dados={
+            'tipo': 'APTO', 'preco_min': '500000', 'preco_max': '1500000', 'ordenacao': 'preco', 'limit': 20,
+        }),
+        Cenario('imoveis-cadastro', 'imoveis', 'POST', dados=lambda i: {
+            'titulo': f'Imóvel {i}', 'descricao': 'Cadastro do benchmark', 'preco': '450000.00', 'tipo': 'APTO',
+            'area_total': '70.00', 'bairro': 'Moema', 'cidade': 'São Paulo',
+        }),
+        Cenario('imoveis-facets', 'imoveis-facets', dados={'cidade': 'São Paulo'}),
+        Cenario('imoveis-mapa', 'imoveis-map', dados={'bbox': '-46.75,-23.65,-46.55,-23.48', 'zoom': 13}),
+        # 50 fichas distintas: as primeiras vão ao Sigavi simulado, as demais saem do cache
+        Cenario('empreendimento', 'empreendimento', args=[lambda i: i % 50 + 1]),
+        Cenario('logo', 'logo'),
+        Cenario('abouts', 'abouts'),
+        Cenario('banners', 'banners'),
+        Cenario('bootstrap', 'bootstrap'),
+        Cenario('contato', 'contact', 'POST', dados=lambda i: {
+            'nome': 'Lead', 'email': f'contato{i}@{DOMINIO}', 'telefone': '11999990000', 'mensagem': 'Olá',
+        }),
+        Cenario('newsletter', 'newsletter', 'POST', dados=lambda i: {'email': f'bench{i}@{DOMINIO}'}),
+        Cenario('ligacao', 'call-request', 'POST', dados=lambda i: {
+            'name': 'Lead', 'email': f'ligacao{i}@{DOMINIO}', 'phone': '11999990000',
+        }),
+        Cenario('agendamento', 'agendamentos', 'POST', dados=_agendamento),
+        Cenario('disponibilidade', 'agendamentos-disponibilidade', dados={'imovel_id': str(imovel_id)}),
+        Cenario('exportacao', 'leads-export', args=['contatos'], staff=True, dados={
+            'formato': 'ndjson', 'desde': (hoje - datetime.timedelta(days=1)).isoformat(),
+        }),
+    ]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)]
+
+
+def resumo(latencias, status):
+    milissegundos = [latencia * 1000 for latencia in latencias]
+    return {
+        'requisicoes': len(latencias),
+        'p50_ms': round(statistics.median(milissegundos), 3),
+        'p95_ms': round(percentil(milissegundos, 0.95), 3),
+        'p99_ms': round(percentil(milissegundos, 0.99), 3),
+        'media_ms': round(statistics.fmean(milissegundos), 3),
+        'status': {str(codigo): total for codigo, total in sorted(status.items())},
+    }
+
+
+_RENDERIZACAO = re.compile(r'\brenderizacao;dur=([\d.]+)')
+
+
+def _consumir(response):
+    """(status, bytes do corpo, ms de renderização do Server-Timing) da resposta."""
+    if response.streaming:
+        tamanho = sum(len(parte) for parte in response.streaming_content)
+    else:
+        tamanho = len(response.content)
+    renderizacao = _RENDERIZACAO.search(response.get('Server-Timing', ''))
+    return response.status_code, tamanho, float(renderizacao.group(1)) if renderizacao else 0.0
+
+
+def medir_cliente(cenario, requisicoes, aquecimento, staff, inicio=0):
+    """Executa o cenário com o Client de teste; `inicio` numera os POSTs (e-mails e horários únicos)."""
+    client = Client()
+    if cenario.staff:
+        client.force_login(staff)
+
+    def executar(indice):
+        return _consumir(cenario.executar(client, indice))
+
+    indice = inicio
+    for _ in range(aquecimento):
+        executar(indice)
+        indice += 1
+
+    latencias, queries, tamanhos, renderizacoes, status = [], [], [], [], Counter()
+    contador = [0]
+
+    def contar(execute, sql, params, many, context):
+        contador[0] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(contar):
+        for _ in range(requisicoes):
+            contador[0] = 0
+            comeco = time.perf_counter()
+            codigo, tamanho, renderizacao = executar(indice)
+            latencias.append(time.perf_counter() - comeco)
+            status[codigo] += 1
+            queries.append(contador[0])
+            tamanhos.append(tamanho)
+            renderizacoes.append(renderizacao)
+            indice += 1
+
+    # Pico de memória medido à parte: o tracemalloc deixa as requisições bem mais lentas
+    tracemalloc.start()
+    try:
+        for _ in range(min(requisicoes, 5)):
+            executar(indice)
+            indice += 1
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    resultado = resumo(latencias, status)
+    resultado.update({
+        'queries': statistics.median(queries), 'queries_max': max(queries), 'pico_memoria_kb': round(pico / 1024, 1),
+        # Tamanho do corpo e renderização (Server-Timing, com METRICAS ativo): o efeito de ?fields=/?perfil=
+        'bytes': statistics.median(tamanhos), 'renderizacao_ms': round(statistics.median(renderizacoes), 3),
+    })
+    return resultado
+
+
+class _HandlerSilencioso(WSGIRequestHandler):
+    # Sem Nagle: cabeçalho e corpo saem em escritas separadas e o ACK atrasado somaria ~40 ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServidorLocal:
+    # Servidor WSGI do runserver numa thread, com uma conexão de banco por thread de requisição
+    def __enter__(self):
+        self.httpd = ThreadedWSGIServer(('127.0.0.1', 0), _HandlerSilencioso, allow_reuse_address=False)
+        self.httpd.set_app(get_wsgi_application())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+        return self
+
+    @property
+    def porta(self):
+        return self.httpd.server_address[1]
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def medir_servidor(servidor, cenario, requisicoes, aquecimento, cookies='', inicio=0):
+    conexao = http.client.HTTPConnection('127.0.0.1', servidor.porta, timeout=60)
+    cabecalhos = {'Cookie': cookies} if cenario.staff and cookies else {}
+
+    def executar(indice):
+        corpo = cenario.corpo(indice)
+        caminho = cenario.caminho(indice)
+        if cenario.metodo == 'GET':
+            conexao.request('GET', f'{caminho}?{urlencode(corpo)}' if corpo else caminho, headers=cabecalhos)
+        else:
+            conexao.request(
+                'POST', caminho, body=json.dumps(corpo), headers={**cabecalhos, 'Content-Type': 'application/json'}
+            )
+        response = conexao.getresponse()
+        response.read()
+        return response.status
+
+    indice = inicio
+    try:
+        for _ in range(aquecimento):
+            executar(indice)
+            indice += 1
+        latencias, status = [], Counter()
+        for _ in range(requisicoes):
+            comeco = time.perf_counter()
+            status[executar(indice)] += 1
+            latencias.append(time.perf_counter() - comeco)
+            indice += 1
+    finally:
+        conexao.close()
+    return resumo(latencias, status)
+
+
+def metadados(**extras):
+    return {
+        'formato': VERSAO_FORMATO,
+        'data': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'banco': connection.vendor,
+        'maquina': platform.platform(),
+        **extras,
+    }
+
+
+def comparar(base, atual, tolerancia=0.2, minimo_ms=1.0, minimo_memoria_kb=64, minimo_bytes=1024):
+    """Lista as regressões de `atual` em relação a `base` (dois resultados do bench_api)."""
+    regressoes = []
+    for nome, anterior in base['cenarios'].items():
+        novo = atual['cenarios'].get(nome)
+        if novo is None:
+            regressoes.append(f"{nome}: cenário ausente no resultado atual")
+            continue
+        for modo in ('cliente', 'servidor'):
+            if modo not in anterior or modo not in novo:
+                continue
+            antes, depois = anterior[modo], novo[modo]
+            if set(depois['status']) != set(antes['status']):
+                regressoes.append(f"{nome} [{modo}]: status {sorted(antes['status'])} -> {sorted(depois['status'])}")
+            for metrica in ('p95_ms', 'p99_ms'):
+                if depois[metrica] > antes[metrica] * (1 + tolerancia) and depois[metrica] - antes[metrica] > minimo_ms:
+                    regressoes.append(
+                        f"{nome} [{modo}]: {metrica} {antes[metrica]:.1f} -> {depois[metrica]:.1f} "
+                        f"(+{(depois[metrica] / antes[metrica] - 1) * 100:.0f}%)"
+                    )
+            if 'queries' in antes and depois['queries'] > antes['queries']:
+                regressoes.append(f"{nome} [{modo}]: queries por requisição {antes['queries']} -> {depois['queries']}")
+            if 'pico_memoria_kb' in antes:
+                diferenca = depois['pico_memoria_kb'] - antes['pico_memoria_kb']
+                if depois['pico_memoria_kb'] > antes['pico_memoria_kb'] * (1 + tolerancia) and diferenca > minimo_memoria_kb:
+                    regressoes.append(
+                        f"{nome} [{modo}]: pico de memória {antes['pico_memoria_kb']:.0f} -> {depois['pico_memoria_kb']:.0f} KB"
+                    )
+            if 'bytes' in antes and 'bytes' in depois:
+                if depois['bytes'] > antes['bytes'] * (1 + tolerancia) and depois['bytes'] - antes['bytes'] > minimo_bytes:
+                    regressoes.append(f"{nome} [{modo}]: resposta {antes['bytes']:.0f} -> {depois['bytes']:.0f} bytes")
+    return regressoes
+
+
+class SigaviSimulado(BaseHTTPRequestHandler):
+    # Sigavi local com latência fixa por resposta (exceto o token), para os benchmarks
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.responder({'access_token': 'bench', 'token_type': 'bearer', 'expires_in': 86399})
+
+    def do_GET(self):
+        time.sleep(self.server.latencia)
+        self.responder({'Id': self.path.rsplit('/', 1)[-1], 'Nome': 'Empreendimento', 'Fotos': []})
+
+    def responder(self, dados):
+        corpo = json.dumps(dados).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def iniciar_sigavi_simulado(latencia):
+    """Sobe o Sigavi simulado numa thread; retorna o servidor (url em 'http://%s:%s' % server_address)."""
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), SigaviSimulado)
+    servidor.daemon_threads = True
+    servidor.latencia = latencia
+    threading.Thread(target=servidor.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    return servidor
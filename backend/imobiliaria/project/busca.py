@@ -0,0 +1,122 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Índice FTS5 (SQLite) sobre titulo/descricao/bairro/cidade de Imovel. É uma tabela de conteúdo
+# externo mantida por triggers, então também acompanha bulk_create/bulk_update da sincronização.
+# remove_diacritics faz "locação" e "locacao" gerarem o mesmo termo.
+TABELA = 'project_imovel_fts'
+COLUNAS = ['titulo', 'descricao', 'bairro', 'cidade']
+# Pesos do bm25 na ordem de COLUNAS
+PESOS = [10.0, 1.0, 5.0, 2.0]
+TRIGGERS = [f'{TABELA}_ai', f'{TABELA}_ad', f'{TABELA}_au']
+
+
+def _sql_indice():
+    colunas = ', '.join(COLUNAS)
+    novos = ', '.join(f'new.{coluna}' for coluna in COLUNAS)
+    antigos = ', '.join(f'old.{coluna}' for coluna in COLUNAS)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA} USING fts5({colunas}, content='project_imovel', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {TABELA}_ai AFTER INSERT ON project_imovel BEGIN "
+        f"INSERT INTO {TABELA}(rowid, {colunas}) VALUES (new.id, {novos}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {TABELA}_ad AFTER DELETE ON project_imovel BEGIN "
+        f"INSERT INTO {TABELA}({TABELA}, rowid, {colunas}) VALUES ('delete', old.id, {antigos}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {TABELA}_au AFTER UPDATE OF {colunas} ON project_imovel BEGIN "
+        f"INSERT INTO {TABELA}({TABELA}, rowid, {colunas}) VALUES ('delete', old.id, {antigos}); "
+        f"INSERT INTO {TABELA}(rowid, {colunas}) VALUES (new.id, {novos}); END",
+    ]
+
+
+def suporta_fts(conn=None):
+    return (conn or connection).vendor == 'sqlite'
+
+
+def criar_indice_busca(conn):
+    if not suporta_fts(conn):
+        return
+    with conn.cursor() as cursor:
+        for sql in _sql_indice():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {TABELA}({TABELA}) VALUES ('rebuild')")
+
+
+def remover_indice_busca(conn):
+    if not suporta_fts(conn):
+        return
+    with conn.cursor() as cursor:
+        for trigger in TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        cursor.execute(f'DROP TABLE IF EXISTS {TABELA}')
+
+
+def garantir_indice_busca(conn):
+    # Recria triggers/índice que faltarem e reconstrói o índice a partir de project_imovel
+    if not suporta_fts(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name IN (%s)" % ', '.join(['%s'] * 4), [TABELA, *TRIGGERS])
+        existentes = {linha[0] for linha in cursor.fetchall()}
+    if existentes != {TABELA, *TRIGGERS}:
+        criar_indice_busca(conn)
+
+
+def _garantir_indice(apps, schema_editor):
+    garantir_indice_busca(schema_editor.connection)
+
+
+def preservando_indice(*operacoes):
+    """Operações de uma migração que recria project_imovel, sem perder os triggers do índice.
+
+    No SQLite, alterar colunas de Imovel recria a tabela e descarta os triggers. As migrações
+    posteriores à 0019_busca_textual que fazem isso envolvem as operações aqui:
+    operations = preservando_indice(migrations.AlterField(...)). Os triggers voltam ao aplicar e
+    ao desfazer a migração, sempre com o índice existindo (nunca antes da 0019).
+    """
+    from django.db import migrations
+
+    return [
+        migrations.RunPython(migrations.RunPython.noop, _garantir_indice),
+        *operacoes,
+        migrations.RunPython(_garantir_indice, migrations.RunPython.noop),
+    ]
+
+
+def expressao_fts(texto):
+    # Cada palavra vira um termo entre aspas (sem operadores do FTS5); a última aceita prefixo
+    termos = [f'"{termo}"' for termo in re.findall(r'\w+', texto or '')]
+    if not termos:
+        return None
+    termos[-1] += '*'
+    return ' '.join(termos)
+
+
+def filtrar(queryset, texto):
+    if suporta_fts():
+        expressao = expressao_fts(texto)
+        if expressao is None:
+            return queryset
+        return queryset.filter(id__in=RawSQL(f'SELECT rowid FROM {TABELA} WHERE {TABELA} MATCH %s', [expressao]))
+
+    # Outros bancos: busca simples por trecho
+    condicao = Q()
+    for coluna in COLUNAS:
+        condicao |= Q(**{f'{coluna}__icontains': texto})
+    return queryset.filter(condicao)
+
+
+def anotar_relevancia(queryset, texto):
+    # Menor bm25 = mais relevante; usado na ordenação ?ordenacao=relevancia.
+    # bm25() só pode ser chamado numa consulta com MATCH: subconsulta no índice pelo rowid do imóvel.
+    expressao = expressao_fts(texto)
+    if not suporta_fts() or expressao is None:
+        return queryset.annotate(relevancia=Value(0.0, output_field=FloatField()))
+    pesos = ', '.join(str(peso) for peso in PESOS)
+    tabela = queryset.model._meta.db_table
+    return queryset.annotate(relevancia=RawSQL(
+        f'SELECT bm25({TABELA}, {pesos}) FROM {TABELA} WHERE {TABELA} MATCH %s AND rowid = {tabela}.id',
+        [expressao], output_field=FloatField(),
+    ))
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# Cada grupo de dados tem um número de versão no cache; invalidar um grupo só
+# incrementa a versão, e as chaves antigas expiram sozinhas.
+VERSAO_TIMEOUT = None
+
+
+def _chave_versao(grupo):
+    return f"versao:{grupo}"
+
+
+def versao(grupo):
+    atual = cache.get(_chave_versao(grupo))
+    if atual is None:
+        cache.add(_chave_versao(grupo), 1, VERSAO_TIMEOUT)
+        atual = cache.get(_chave_versao(grupo), 1)
+    return atual
+
+
+async def aversao(grupo):
+    atual = await cache.aget(_chave_versao(grupo))
+    if atual is None:
+        await cache.aadd(_chave_versao(grupo), 1, VERSAO_TIMEOUT)
+        atual = await cache.aget(_chave_versao(grupo), 1)
+    return atual
+
+
+def invalidar(grupo):
+    try:
+        cache.incr(_chave_versao(grupo))
+    except ValueError:
+        cache.set(_chave_versao(grupo), 2, VERSAO_TIMEOUT)
+
+
+async def aversoes(grupos):
+    """Versão atual de vários grupos numa ida só ao cache (chave de payloads que juntam vários grupos)."""
+    atuais = await cache.aget_many([_chave_versao(grupo) for grupo in grupos])
+    return {grupo: atuais.get(_chave_versao(grupo)) or await aversao(grupo) for grupo in grupos}
+
+
+def _chave(grupo, versao_atual, nome, parametros):
+    sufixo = ''
+    if parametros:
+        conteudo = json.dumps(parametros, sort_keys=True, default=str)
+        sufixo = ':' + hashlib.md5(conteudo.encode('utf-8')).hexdigest()
+    return f"{grupo}:{versao_atual}:{nome}{sufixo}"
+
+
+def chave(grupo, nome, parametros=None):
+    return _chave(grupo, versao(grupo), nome, parametros)
+
+
+def obter_ou_calcular(grupo, nome, calcular, parametros=None, timeout=300):
+    chave_cache = chave(grupo, nome, parametros)
+    valor = cache.get(chave_cache)
+    if valor is None:
+        valor = calcular()
+        cache.set(chave_cache, valor, timeout)
+    return valor
+
+
+async def aobter_ou_calcular(grupo, nome, calcular, parametros=None, timeout=300):
+    # Versão para views assíncronas: calcular é uma corrotina. Usa a API a* do cache: com Redis
+    # ou memcached (CACHES pelo ambiente) a ida à rede não pode bloquear o event loop
+    chave_cache = _chave(grupo, await aversao(grupo), nome, parametros)
+    valor = await cache.aget(chave_cache)
+    if valor is None:
+        valor = await calcular()
+        await cache.aset(chave_cache, valor, timeout)
+    return valor
+
+
+def _em_segundo_plano(funcao, *args):
+    threading.Thread(target=funcao, args=args, daemon=True).start()
+
+
+def _calcular_entrada(chave_cache, calcular, ttl, stale):
+    valor = calcular()
+    cache.set(chave_cache, {'valor': valor, 'expira_em': time.time() + ttl}, ttl + stale)
+    return valor
+
+
+def _revalidar(chave_cache, calcular, ttl, stale):
+    try:
+        _calcular_entrada(chave_cache, calcular, ttl, stale)
+    except Exception as exc:
+        # Mantém a versão antiga até o fim da janela de stale
+        logger.warning("Falha ao revalidar %s: %s", chave_cache, exc)
+    finally:
+        cache.delete(f"{chave_cache}:revalidando")
+
+
+def obter_com_revalidacao(grupo, nome, calcular, ttl, stale, parametros=None):
+    """Como obter_ou_calcular, mas com stale-while-revalidate.
+
+    Depois de `ttl` segundos o valor antigo continua sendo servido por até `stale`
+    segundos enquanto uma única thread o recalcula em segundo plano.
+    """
+    chave_cache = chave(grupo, nome, parametros)
+    entrada = cache.get(chave_cache)
+    if entrada is None:
+        return _calcular_entrada(chave_cache, calcular, ttl, stale)
+    if time.time() >= entrada['expira_em'] and cache.add(f"{chave_cache}:revalidando", True, ttl):
+        _em_segundo_plano(_revalidar, chave_cache, calcular, ttl, stale)
+    return entrada['valor']
+
+
+def gerar_etag(data):
+    conteudo = json.dumps(data, sort_keys=True, default=str, ensure_ascii=False)
+    return '"%s"' % hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:32]
+
+
+def com_etag(data):
+    return {'data': data, 'etag': gerar_etag(data)}
+
+
+def resposta_condicional(request, grupo, nome, calcular, parametros=None):
+    """Resposta de leitura servida do cache, com ETag forte e 304 quando o cliente já tem a versão atual."""
+    def calcular_com_etag():
+        return com_etag(calcular())
+
+    entrada = obter_ou_calcular(grupo, nome, calcular_com_etag, parametros, settings.CACHE_TTL_CONTEUDO)
+    return responder_com_etag(request, entrada)
+
+
+async def aresposta_condicional(request, grupo, nome, calcular, parametros=None):
+    async def calcular_com_etag():
+        return com_etag(await calcular())
+
+    entrada = await aobter_ou_calcular(grupo, nome, calcular_com_etag, parametros, settings.CACHE_TTL_CONTEUDO)
+    return responder_com_etag(request, entrada)
+
+
+def responder_com_etag(request, entrada):
+    etags_cliente = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if entrada['etag'] in etags_cliente or '*' in etags_cliente:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(entrada['data'])
+    response['ETag'] = entrada['etag']
+    # O navegador guarda a resposta, mas sempre revalida com If-None-Match
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,63 @@
+from rest_framework.exceptions import ValidationError
+
+# Seleção dos campos das respostas (sparse fieldsets):
+#   ?fields=id,titulo,fotos.foto_url  só os campos listados (com ponto, os de um serializer aninhado)
+#   ?omit=descricao,fotos.srcset      tudo menos os campos listados
+#   ?perfil=card                      lista pronta de campos do serializer (perfis); ?fields= acrescenta a ela
+# Os campos são podados antes da serialização: o que não sai no JSON não é calculado e, na
+# listagem de imóveis, nem é lido do banco.
+
+
+def arvore(texto):
+    """'id,fotos.foto_url' -> {'id': {}, 'fotos': {'foto_url': {}}} ({} = o campo inteiro)."""
+    raiz = {}
+    for caminho in texto.split(','):
+        if caminho.strip():
+            no = raiz
+            for parte in caminho.strip().split('.'):
+                no = no.setdefault(parte, {})
+    return raiz
+
+
+class Selecao:
+    def __init__(self, incluir=None, omitir=None, prefixo=''):
+        # incluir None mantém os campos padrão do serializer
+        self.incluir = incluir
+        self.omitir = omitir or {}
+        self.prefixo = prefixo
+
+    @classmethod
+    def da_requisicao(cls, query_params, perfis):
+        """Seleção pedida em ?perfil=, ?fields= e ?omit=, ou None quando não há nenhum deles."""
+        perfil, campos, omitir = (query_params.get(nome) for nome in ('perfil', 'fields', 'omit'))
+        if not (perfil or campos or omitir):
+            return None
+        incluir = None
+        if perfil:
+            if perfil not in perfis:
+                raise ValidationError({'perfil': f"Perfil inválido. Use: {', '.join(perfis)}"})
+            incluir = arvore(perfis[perfil]) if perfis[perfil] else None
+        if campos:
+            incluir = {**(incluir or {}), **arvore(campos)}
+        return cls(incluir, arvore(omitir or ''))
+
+    def campos(self, padrao, disponiveis, aninhados=()):
+        """Campos mantidos, na ordem de `disponiveis`; `aninhados` são os que aceitam subcampos."""
+        for parametro, pedidos in (('fields', self.incluir or {}), ('omit', self.omitir)):
+            invalidos = [self.prefixo + nome for nome in pedidos if nome not in disponiveis]
+            invalidos += [
+                self.prefixo + nome for nome, subcampos in pedidos.items()
+                if subcampos and nome in disponiveis and nome not in aninhados
+            ]
+            if invalidos:
+                raise ValidationError({parametro: f"Campos inválidos: {', '.join(invalidos)}"})
+        base = padrao if self.incluir is None else [nome for nome in disponiveis if nome in self.incluir]
+        return [nome for nome in base if self.omitir.get(nome) != {}]
+
+    def aninhada(self, nome):
+        """Seleção dos subcampos de um campo aninhado (None: todos os campos padrão dele)."""
+        incluir = (self.incluir or {}).get(nome) or None
+        omitir = self.omitir.get(nome)
+        if incluir is None and not omitir:
+            return None
+        return Selecao(incluir, omitir, f'{self.prefixo}{nome}.')
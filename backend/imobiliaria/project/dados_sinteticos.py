@@ -0,0 +1,192 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import invalidar
+from .models import Agendamento, CallRequest, Contact, Imovel, ImovelFoto, NewsletterSubscriber
+
+# Catálogo e leads sintéticos para benchmarks e testes de carga (comando gerar_dados).
+# Com a mesma semente o conteúdo gerado é sempre o mesmo. Os registros são identificáveis
+# (sigavi_id "sintetico:N" e e-mails em DOMINIO) para poderem ser removidos sem tocar nos reais;
+# o prefixo também impede que a sincronização do Sigavi os desative.
+
+ORIGEM = 'sintetico'
+DOMINIO = 'sintetico.example.com'
+BATCH_SIZE = 2000
+# Imóveis que recebem os agendamentos (cada um tem centenas de horários livres)
+MAX_IMOVEIS_AGENDADOS = 10000
+
+# Bairro -> (latitude, longitude, preço médio do m²)
+BAIRROS = {
+    'Moema': (-23.6011, -46.6625, 14500),
+    'Pinheiros': (-23.5666, -46.6916, 15800),
+    'Vila Mariana': (-23.5893, -46.6345, 12300),
+    'Perdizes': (-23.5362, -46.6775, 11900),
+    'Itaim Bibi': (-23.5845, -46.6796, 17200),
+    'Tatuapé': (-23.5405, -46.5763, 9800),
+    'Santana': (-23.5006, -46.6254, 9100),
+    'Butantã': (-23.5710, -46.7083, 8700),
+    'Brooklin': (-23.6136, -46.6923, 12800),
+    'Lapa': (-23.5223, -46.7026, 10400),
+}
+# Tipo -> (peso, faixa de área em m²)
+TIPOS = {
+    'APTO': (60, (35, 180)),
+    'CASA': (25, (80, 450)),
+    'COMERCIAL': (10, (30, 600)),
+    'TERRENO': (5, (150, 1200)),
+}
+ADJETIVOS = ['amplo', 'reformado', 'iluminado', 'com vista livre', 'próximo ao metrô', 'silencioso', 'novo']
+ITENS = ['varanda gourmet', 'piscina', 'academia', 'churrasqueira', 'portaria 24h', 'quintal', 'suíte master', 'depósito']
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Fábio', 'Gabriela', 'Heitor', 'Isabela', 'João', 'Larissa', 'Marcos']
+SOBRENOMES = ['Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Lima', 'Costa', 'Almeida', 'Ferreira', 'Rocha']
+
+
+class Gerador:
+    def __init__(self, semente=42):
+        self.aleatorio = random.Random(semente)
+
+    def imovel(self, numero):
+        r = self.aleatorio
+        tipo = r.choices(list(TIPOS), weights=[peso for peso, _ in TIPOS.values()])[0]
+        area = r.randint(*TIPOS[tipo][1])
+        bairro = r.choice(list(BAIRROS))
+        latitude, longitude, preco_m2 = BAIRROS[bairro]
+        dormitorios = 0 if tipo in ('TERRENO', 'COMERCIAL') else min(5, max(1, area // 40))
+        locacao = tipo != 'TERRENO' and r.random() < 0.3
+        preco = area * preco_m2 * r.uniform(0.75, 1.3)
+        if locacao:
+            preco = preco * 0.005  # aluguel mensal ~0,5% do valor de venda
+        rotulo = dict(Imovel.tipo_choices)[tipo]
+        return Imovel(
+            sigavi_id=f'{ORIGEM}:{numero}',
+            titulo=f"{rotulo} {r.choice(ADJETIVOS)} em {bairro}" + (f", {dormitorios} dorm." if dormitorios else ''),
+            descricao=f"{rotulo} de {area} m² com {', '.join(r.sample(ITENS, 3))}.",
+            preco=Decimal(preco).quantize(Decimal('1.00')),
+            tipo=tipo,
+            tipo_operacao='LOCACAO' if locacao else 'VENDA',
+            dormitorios=dormitorios,
+            banheiros=max(1, dormitorios - r.randint(0, 1)) if dormitorios else r.randint(0, 2),
+            vagas=r.randint(0, 3),
+            area_total=Decimal(area),
+            bairro=bairro,
+            cidade='São Paulo',
+            uf='SP',
+            logradouro=f"Rua {r.choice(SOBRENOMES)} {r.choice(NOMES)}",
+            numero=str(r.randint(1, 3000)),
+            # Espalha os imóveis ~2 km em volta do centro do bairro (mapa e agrupamento)
+            latitude=latitude + r.uniform(-0.018, 0.018),
+            longitude=longitude + r.uniform(-0.018, 0.018),
+            destaque=r.random() < 0.05,
+            disponivel=r.random() < 0.92,
+        )
+
+    def fotos(self, imovel, media):
+        quantidade = self.aleatorio.randint(max(0, media - 2), media + 2)
+        return [
+            ImovelFoto(imovel=imovel, url_externa=f'https://cdn.{DOMINIO}/{imovel.sigavi_id[len(ORIGEM) + 1:]}/{ordem}.jpg', ordem=ordem)
+            for ordem in range(quantidade)
+        ]
+
+    def pessoa(self, numero):
+        nome = f"{self.aleatorio.choice(NOMES)} {self.aleatorio.choice(SOBRENOMES)}"
+        return nome, f"lead{numero}@{DOMINIO}", f"11 9{self.aleatorio.randint(1000, 9999)}-{self.aleatorio.randint(1000, 9999)}"
+
+    def contato(self, numero):
+        nome, email, telefone = self.pessoa(numero)
+        return Contact(nome=nome, email=email, telefone=telefone, mensagem=f"Gostaria de mais informações sobre o imóvel {numero}.")
+
+    def ligacao(self, numero):
+        nome, email, telefone = self.pessoa(numero)
+        return CallRequest(name=nome, email=email, phone=telefone)
+
+    def agendamento(self, numero, imovel, dias_uteis):
+        nome, email, telefone = self.pessoa(numero)
+        return Agendamento(
+            imovel_id=str(imovel.pk), titulo=imovel.titulo, valor=imovel.preco, bairro=imovel.bairro, cidade=imovel.cidade,
+            nome=nome, email=email, telefone=telefone,
+            data_visita=self.aleatorio.choice(dias_uteis), hora_visita=self.aleatorio.choice(settings.AGENDA['HORARIOS']),
+        )
+
+
+def dias_de_visita(quantidade=40):
+    dia, dias = timezone.localdate(), []
+    while len(dias) < quantidade:
+        dia += datetime.timedelta(days=1)
+        if dia.weekday() in settings.AGENDA['DIAS_SEMANA']:
+            dias.append(dia)
+    return dias
+
+
+def _em_lotes(model, objetos, lote, **opcoes):
+    total = 0
+    pendentes = []
+    for objeto in objetos:
+        pendentes.append(objeto)
+        if len(pendentes) >= lote:
+            model.objects.bulk_create(pendentes, **opcoes)
+            total += len(pendentes)
+            pendentes = []
+    if pendentes:
+        model.objects.bulk_create(pendentes, **opcoes)
+        total += len(pendentes)
+    return total
+
+
+def gerar(imoveis=1000, fotos=4, agendamentos=None, leads=None, semente=42, lote=BATCH_SIZE, progresso=None):
+    """Gera o catálogo e os leads em lotes (memória constante até milhões de linhas); retorna os totais.
+
+    Por padrão há um agendamento para cada dois imóveis e um lead de cada tipo por imóvel.
+    """
+    gerador = Gerador(semente)
+    agendamentos = imoveis // 2 if agendamentos is None else agendamentos
+    leads = imoveis if leads is None else leads
+    inicio = Imovel.objects.filter(sigavi_id__startswith=f'{ORIGEM}:').count()
+    totais = {'imoveis': 0, 'fotos': 0, 'agendamentos': 0, 'contatos': 0, 'ligacoes': 0, 'newsletter': 0}
+
+    agendados = []
+    for comeco in range(0, imoveis, lote):
+        with transaction.atomic():
+            criados = Imovel.objects.bulk_create(
+                [gerador.imovel(inicio + numero) for numero in range(comeco, min(comeco + lote, imoveis))]
+            )
+            totais['fotos'] += _em_lotes(
+                ImovelFoto, (foto for imovel in criados for foto in gerador.fotos(imovel, fotos)), lote
+            )
+        totais['imoveis'] += len(criados)
+        agendados.extend(criados[:min(agendamentos, MAX_IMOVEIS_AGENDADOS) - len(agendados)])
+        if progresso:
+            progresso(totais)
+
+    dias = dias_de_visita()
+    with transaction.atomic():
+        if agendados:
+            antes = Agendamento.objects.filter(email__endswith=f'@{DOMINIO}').count()
+            # Horários repetidos no mesmo imóvel são descartados pela constraint agendamento_horario_unico
+            _em_lotes(Agendamento, (
+                gerador.agendamento(numero, agendados[numero % len(agendados)], dias) for numero in range(agendamentos)
+            ), lote, ignore_conflicts=True)
+            totais['agendamentos'] = Agendamento.objects.filter(email__endswith=f'@{DOMINIO}').count() - antes
+        totais['contatos'] = _em_lotes(Contact, (gerador.contato(inicio + n) for n in range(leads)), lote)
+        totais['ligacoes'] = _em_lotes(CallRequest, (gerador.ligacao(inicio + n) for n in range(leads)), lote)
+        totais['newsletter'] = _em_lotes(NewsletterSubscriber, (
+            NewsletterSubscriber(email=f"news{inicio + n}@{DOMINIO}") for n in range(leads)
+        ), lote, ignore_conflicts=True)
+
+    # bulk_create não dispara sinais, então o cache é invalidado aqui
+    invalidar('imoveis')
+    return totais
+
+
+def limpar():
+    """Remove só os registros sintéticos; retorna quantos imóveis foram apagados."""
+    with transaction.atomic():
+        for model in (Agendamento, Contact, CallRequest, NewsletterSubscriber):
+            model.objects.filter(email__endswith=f'@{DOMINIO}').delete()
+        _, por_model = Imovel.objects.filter(sigavi_id__startswith=f'{ORIGEM}:').delete()
+    invalidar('imoveis')
+    return por_model.get(Imovel._meta.label, 0)
@@ -0,0 +1,113 @@
+import csv
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Agendamento, CallRequest, Contact, NewsletterSubscriber
+
+CHUNK_SIZE = 2000
+
+
+class Exportacao:
+    def __init__(self, model, campo_data, campos):
+        self.model = model
+        self.campo_data = campo_data
+        self.campos = campos
+
+
+# Leads exportados para o CRM: tipo da URL -> model, campo de data usado no filtro e colunas
+EXPORTACOES = {
+    'contatos': Exportacao(Contact, 'data_envio', ['id', 'nome', 'email', 'telefone', 'mensagem', 'data_envio']),
+    'ligacoes': Exportacao(CallRequest, 'requested_at', ['id', 'name', 'email', 'phone', 'requested_at']),
+    'agendamentos': Exportacao(Agendamento, 'criado_em', [
+        'id', 'imovel_id', 'titulo', 'valor', 'bairro', 'cidade', 'nome', 'email', 'telefone',
+        'data_visita', 'hora_visita', 'criado_em',
+    ]),
+    'newsletter': Exportacao(NewsletterSubscriber, 'subscribed_at', ['id', 'email', 'subscribed_at']),
+}
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+class ExportacaoFiltroSerializer(serializers.Serializer):
+    formato = serializers.ChoiceField(choices=list(FORMATOS), default='csv')
+    desde = serializers.DateField(required=False)
+    ate = serializers.DateField(required=False)
+    # Último id da exportação anterior (cabeçalho X-Export-Cursor): só exporta o que entrou depois
+    cursor = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        if attrs.get('desde') and attrs.get('ate') and attrs['ate'] < attrs['desde']:
+            raise serializers.ValidationError({'ate': "Deve ser igual ou posterior a desde."})
+        return attrs
+
+
+def _inicio_do_dia(data):
+    return timezone.make_aware(datetime.datetime.combine(data, datetime.time.min))
+
+
+def filtrar(exportacao, queryset, desde=None, ate=None, cursor=None):
+    # Intervalo sobre o próprio campo (e não __date) para usar o índice
+    if desde:
+        queryset = queryset.filter(**{f'{exportacao.campo_data}__gte': _inicio_do_dia(desde)})
+    if ate:
+        queryset = queryset.filter(**{f'{exportacao.campo_data}__lt': _inicio_do_dia(ate + datetime.timedelta(days=1))})
+    if cursor is not None:
+        queryset = queryset.filter(id__gt=cursor)
+    return queryset
+
+
+class _Eco:
+    # "Arquivo" do csv.writer que só devolve a linha formatada
+    def write(self, valor):
+        return valor
+
+
+def linhas_csv(linhas, campos):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(campos)
+    for linha in linhas:
+        yield escritor.writerow(linha)
+
+
+def linhas_ndjson(linhas, campos):
+    for linha in linhas:
+        yield json.dumps(dict(zip(campos, linha)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def resposta_streaming(exportacao, queryset, formato, nome, cursor=None):
+    """Exporta o queryset em streaming, lendo o banco em blocos de CHUNK_SIZE (memória constante)."""
+    # O cursor é fixado antes de começar: linhas que chegarem durante o download ficam para a próxima exportação
+    ultimo_id = queryset.aggregate(ultimo=Max('id'))['ultimo']
+    linhas = (
+        queryset.filter(id__lte=ultimo_id or 0).order_by('id')
+        .values_list(*exportacao.campos).iterator(chunk_size=CHUNK_SIZE)
+    )
+    gerar = linhas_csv if formato == 'csv' else linhas_ndjson
+    content_type, extensao = FORMATOS[formato]
+    response = StreamingHttpResponse(gerar(linhas, exportacao.campos), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{nome}.{extensao}"'
+    # Sem linhas novas o cursor recebido continua valendo
+    response['X-Export-Cursor'] = str(ultimo_id if ultimo_id is not None else (cursor or 0))
+    return response
+
+
+def acoes_admin(tipo):
+    """Ações "Exportar CSV/NDJSON" para o ModelAdmin do tipo de lead."""
+    exportacao = EXPORTACOES[tipo]
+
+    def criar(formato):
+        def acao(modeladmin, request, queryset):
+            return resposta_streaming(exportacao, queryset, formato, f"{tipo}-{timezone.localdate():%Y%m%d}")
+        acao.__name__ = f'exportar_{formato}'
+        acao.short_description = f"Exportar selecionados ({formato.upper()})"
+        return acao
+
+    return [criar(formato) for formato in FORMATOS]
@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+from django.db.models import Count, F, IntegerField, Max, Min
+from django.db.models.functions import Cast, Floor, Least
+
+from .filters import filtrar_imoveis
+
+HISTOGRAMA_FAIXAS = 10
+CENTAVOS = Decimal('0.01')
+FAIXAS = {
+    'preco': 'preco',
+    'area_total': 'area_total',
+    'dormitorios': 'dormitorios',
+    'vagas': 'vagas',
+}
+# Filtros de cada facet: um facet é contado com todos os filtros menos os seus, senão, com
+# ?bairro= escolhido, o facet de bairros mostraria só esse bairro e não daria para trocar
+PROPRIOS = {
+    'bairros': ('bairro',),
+    'tipos': ('tipo',),
+    'tipos_operacao': ('tipo_operacao',),
+    'preco': ('preco_min', 'preco_max'),
+    'area_total': ('area_min', 'area_max'),
+    'dormitorios': ('dormitorios',),
+    'vagas': ('vagas',),
+}
+
+
+def _decimal(valor):
+    # Min/Max de DecimalField no SQLite vêm com a escala do agregado; saem como o preço da listagem
+    return valor.quantize(CENTAVOS) if isinstance(valor, Decimal) else valor
+
+
+def _contagem(queryset, campo):
+    return [
+        {campo: linha[campo], 'total': linha['total']}
+        for linha in queryset.order_by().values(campo).annotate(total=Count('id')).order_by(campo)
+    ]
+
+
+def histograma_preco(queryset, minimo, maximo, faixas=HISTOGRAMA_FAIXAS):
+    if minimo is None or maximo is None:
+        return []
+    largura = (Decimal(maximo) - Decimal(minimo)) / faixas
+    if largura <= 0:
+        return [{'de': _decimal(minimo), 'ate': _decimal(maximo), 'total': queryset.count()}]
+
+    # Índice da faixa calculado no banco: floor((preco - min) / largura); o máximo cai na última faixa.
+    # O floor vem antes do CAST porque no PostgreSQL o CAST para inteiro arredonda
+    totais = dict(
+        queryset.order_by()
+        .annotate(faixa=Least(Cast(Floor((F('preco') - minimo) / largura), IntegerField()), faixas - 1))
+        .values_list('faixa')
+        .annotate(total=Count('id'))
+    )
+    return [
+        {
+            'de': (Decimal(minimo) + largura * indice).quantize(CENTAVOS),
+            'ate': (Decimal(minimo) + largura * (indice + 1)).quantize(CENTAVOS),
+            'total': totais.get(indice, 0),
+        }
+        for indice in range(faixas)
+    ]
+
+
+def calcular_facets(queryset, filtros):
+    def ignorados(facet):
+        # Só os filtros do facet que foram de fato pedidos; sem eles vale o queryset filtrado comum
+        return tuple(nome for nome in PROPRIOS.get(facet, ()) if filtros.get(nome) not in (None, ''))
+
+    def filtrado(sem=()):
+        return filtrar_imoveis(queryset, {nome: valor for nome, valor in filtros.items() if nome not in sem})
+
+    # Faixas com os mesmos filtros ignorados saem num único aggregate
+    grupos = {(): {'total': Count('id')}}
+    for nome, campo in FAIXAS.items():
+        agregados = grupos.setdefault(ignorados(nome), {})
+        agregados[f"{nome}_min"] = Min(campo)
+        agregados[f"{nome}_max"] = Max(campo)
+    resumo = {}
+    for sem, agregados in grupos.items():
+        resumo.update(filtrado(sem).order_by().aggregate(**agregados))
+
+    return {
+        'total': resumo['total'],
+        'bairros': _contagem(filtrado(ignorados('bairros')), 'bairro'),
+        'tipos': _contagem(filtrado(ignorados('tipos')), 'tipo'),
+        'tipos_operacao': _contagem(filtrado(ignorados('tipos_operacao')), 'tipo_operacao'),
+        'faixas': {
+            nome: {'min': _decimal(resumo[f"{nome}_min"]), 'max': _decimal(resumo[f"{nome}_max"])}
+            for nome in FAIXAS
+        },
+        'histograma_preco': histograma_preco(
+            filtrado(ignorados('preco')), resumo['preco_min'], resumo['preco_max'],
+        ),
+    }
@@ -0,0 +1,84 @@
+from rest_framework import serializers
+
+from . import busca
+from .models import Imovel
+
+# Ordenações aceitas em ?ordenacao=; o id no final garante uma chave única para o cursor
+ORDENACOES = {
+    'destaque': ['-destaque', '-id'],
+    'relevancia': ['relevancia', 'id'],  # só com ?q=
+    'recentes': ['-id'],
+    'preco': ['preco', 'id'],
+    '-preco': ['-preco', '-id'],
+    'area': ['area_total', 'id'],
+    '-area': ['-area_total', '-id'],
+}
+
+LOOKUPS = {
+    'cidade': 'cidade',
+    'tipo': 'tipo',
+    'tipo_operacao': 'tipo_operacao',
+    'preco_min': 'preco__gte',
+    'preco_max': 'preco__lte',
+    'area_min': 'area_total__gte',
+    'area_max': 'area_total__lte',
+    'dormitorios': 'dormitorios__gte',
+    'vagas': 'vagas__gte',
+    'destaque': 'destaque',
+    'disponivel': 'disponivel',
+}
+
+
+class ImovelFiltroSerializer(serializers.Serializer):
+    # Valida os parâmetros de busca de /api/imoveis/
+    q = serializers.CharField(required=False, max_length=200)
+    bairro = serializers.CharField(required=False)
+    cidade = serializers.CharField(required=False)
+    tipo = serializers.ChoiceField(choices=Imovel.tipo_choices, required=False)
+    tipo_operacao = serializers.ChoiceField(choices=Imovel.operacao_choices, required=False)
+    preco_min = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    preco_max = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    area_min = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    area_max = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    dormitorios = serializers.IntegerField(min_value=0, required=False)
+    vagas = serializers.IntegerField(min_value=0, required=False)
+    destaque = serializers.BooleanField(required=False, allow_null=True, default=None)
+    disponivel = serializers.BooleanField(required=False, allow_null=True, default=None)
+    ordenacao = serializers.ChoiceField(choices=list(ORDENACOES), required=False)
+
+    def validate(self, attrs):
+        # Com texto de busca a ordenação padrão passa a ser por relevância
+        if 'ordenacao' not in attrs:
+            attrs['ordenacao'] = 'relevancia' if attrs.get('q') else 'destaque'
+        elif attrs['ordenacao'] == 'relevancia' and not attrs.get('q'):
+            raise serializers.ValidationError({'ordenacao': "A ordenação por relevância exige o parâmetro q."})
+        return attrs
+
+
+def validar_filtros(query_params):
+    # Lança ValidationError (400) para parâmetros inválidos
+    serializer = ImovelFiltroSerializer(data=query_params.dict())
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def filtrar_imoveis(queryset, filtros):
+    condicoes = {
+        lookup: filtros[nome]
+        for nome, lookup in LOOKUPS.items()
+        if filtros.get(nome) is not None
+    }
+    bairros = [bairro.strip() for bairro in filtros.get('bairro', '').split(',') if bairro.strip()]
+    if bairros:
+        condicoes['bairro__in'] = bairros
+    queryset = queryset.filter(**condicoes)
+    if filtros.get('q'):
+        queryset = busca.filtrar(queryset, filtros['q'])
+    return queryset
+
+
+def ordenar_imoveis(queryset, filtros):
+    # Adiciona as anotações exigidas pela ordenação escolhida
+    if filtros['ordenacao'] == 'relevancia':
+        queryset = busca.anotar_relevancia(queryset, filtros['q'])
+    return queryset, ORDENACOES[filtros['ordenacao']]
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import GeocodeCache
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+class GeocodingError(Exception):
+    pass
+
+
+def normalizar_endereco(logradouro='', numero='', bairro='', cidade='', uf=''):
+    # Chave do cache: sem acentos, minúscula e com espaços colapsados
+    partes = [f"{logradouro}, {numero}" if numero else logradouro, bairro, cidade, uf, 'Brasil']
+    texto = ' - '.join(str(parte).strip() for parte in partes if str(parte or '').strip())
+    texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode()
+    return ' '.join(texto.lower().split())[:500]
+
+
+def endereco_do_objeto(obj):
+    if not (obj.logradouro or obj.bairro):
+        return None
+    return normalizar_endereco(obj.logradouro, obj.numero, obj.bairro, obj.cidade, obj.uf)
+
+
+class GeocodingProvider:
+    nome = ''
+
+    def geocodificar(self, endereco):
+        """Retorna (latitude, longitude) ou None se o endereço não for encontrado."""
+        raise NotImplementedError
+
+
+class GoogleGeocodingProvider(GeocodingProvider):
+    nome = 'google'
+    url = 'https://maps.googleapis.com/maps/api/geocode/json'
+
+    def __init__(self, api_key=None, timeout=10):
+        self.api_key = api_key or settings.GEOCODING['API_KEY']
+        self.timeout = timeout
+
+    def geocodificar(self, endereco):
+        query = urllib.parse.urlencode({'address': endereco, 'key': self.api_key, 'region': 'br'})
+        try:
+            with urllib.request.urlopen(f"{self.url}?{query}", timeout=self.timeout) as response:
+                data = json.loads(response.read().decode('utf-8'))
+        except (OSError, ValueError) as exc:
+            raise GeocodingError(str(exc)) from exc
+
+        if data.get('status') == 'ZERO_RESULTS':
+            return None
+        if data.get('status') != 'OK' or not data.get('results'):
+            raise GeocodingError(data.get('error_message') or data.get('status') or 'Resposta inválida')
+        location = data['results'][0]['geometry']['location']
+        return location['lat'], location['lng']
+
+
+class OfflineGeocodingProvider(GeocodingProvider):
+    # Provedor determinístico para testes e desenvolvimento: espalha os endereços pela Grande São Paulo
+    nome = 'offline'
+    centro = (-23.5505, -46.6333)
+
+    def __init__(self, **kwargs):
+        self.chamadas = []
+
+    def geocodificar(self, endereco):
+        self.chamadas.append(endereco)
+        digest = hashlib.sha256(endereco.encode('utf-8')).digest()
+        lat = self.centro[0] + (digest[0] - 128) / 1000
+        lng = self.centro[1] + (digest[1] - 128) / 1000
+        return round(lat, 6), round(lng, 6)
+
+
+def get_provider():
+    config = settings.GEOCODING
+    return import_string(config['PROVIDER'])(api_key=config.get('API_KEY'))
+
+
+class RateLimiter:
+    # Limita chamadas por segundo entre threads (intervalo mínimo entre chamadas)
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo if por_segundo else 0
+        self.lock = threading.Lock()
+        self.proxima = 0.0
+
+    def aguardar(self):
+        with self.lock:
+            agora = time.monotonic()
+            espera = self.proxima - agora
+            self.proxima = max(agora, self.proxima) + self.intervalo
+        if espera > 0:
+            time.sleep(espera)
+
+
+def buscar_no_cache(enderecos):
+    encontrados = {}
+    enderecos = list(enderecos)
+    for inicio in range(0, len(enderecos), BATCH_SIZE):
+        for endereco, lat, lng in GeocodeCache.objects.filter(
+            endereco__in=enderecos[inicio:inicio + BATCH_SIZE]
+        ).values_list('endereco', 'latitude', 'longitude'):
+            encontrados[endereco] = (lat, lng) if lat is not None else None
+    return encontrados
+
+
+def geocodificar_enderecos(enderecos, provider=None, workers=None, por_segundo=None):
+    """Resolve vários endereços usando o cache persistente e, nas faltas, o provedor em paralelo."""
+    config = settings.GEOCODING
+    enderecos = set(enderecos)
+    resultados = buscar_no_cache(enderecos)
+    faltando = sorted(enderecos - set(resultados))
+    if not faltando:
+        return resultados
+
+    provider = provider or get_provider()
+    limiter = RateLimiter(por_segundo or config['RATE_LIMIT'])
+
+    def consultar(endereco):
+        limiter.aguardar()
+        try:
+            return endereco, provider.geocodificar(endereco), True
+        except GeocodingError as exc:
+            logger.warning("Falha ao geocodificar %r: %s", endereco, exc)
+            return endereco, None, False
+
+    novos = []
+    with ThreadPoolExecutor(max_workers=workers or config['WORKERS']) as executor:
+        for endereco, coordenadas, sucesso in executor.map(consultar, faltando):
+            resultados[endereco] = coordenadas
+            # Erros temporários não entram no cache; "não encontrado" entra para não consultar de novo
+            if sucesso:
+                lat, lng = coordenadas or (None, None)
+                novos.append(GeocodeCache(endereco=endereco, latitude=lat, longitude=lng, provedor=provider.nome))
+
+    # Gravação feita só na thread principal para não disputar o lock do SQLite
+    GeocodeCache.objects.bulk_create(novos, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return resultados
+
+
+def preencher_coordenadas(objetos, provider=None, consultar_provedor=True, **kwargs):
+    """Preenche latitude/longitude nos objetos sem coordenadas; retorna os objetos alterados."""
+    pendentes = {}
+    for obj in objetos:
+        endereco = endereco_do_objeto(obj)
+        if endereco and obj.latitude is None:
+            pendentes.setdefault(endereco, []).append(obj)
+    if not pendentes:
+        return []
+
+    if consultar_provedor:
+        coordenadas = geocodificar_enderecos(pendentes, provider=provider, **kwargs)
+    else:
+        coordenadas = buscar_no_cache(pendentes)
+
+    alterados = []
+    for endereco, lista in pendentes.items():
+        if coordenadas.get(endereco):
+            for obj in lista:
+                obj.latitude, obj.longitude = coordenadas[endereco]
+                alterados.append(obj)
+    return alterados
+
+
+def backfill(queryset, provider=None, lote=BATCH_SIZE, **kwargs):
+    total = 0
+    model = queryset.model
+    queryset = queryset.filter(latitude__isnull=True).exclude(logradouro='', bairro='')
+    ultimo_pk = 0
+    while True:
+        objetos = list(
+            queryset.filter(pk__gt=ultimo_pk).order_by('pk')
+            .only('pk', 'logradouro', 'numero', 'bairro', 'cidade', 'uf', 'latitude', 'longitude')[:lote]
+        )
+        if not objetos:
+            return total
+        ultimo_pk = objetos[-1].pk
+        alterados = preencher_coordenadas(objetos, provider=provider, **kwargs)
+        with transaction.atomic():
+            model.objects.bulk_update(alterados, ['latitude', 'longitude'], batch_size=BATCH_SIZE)
+        total += len(alterados)
@@ -0,0 +1,190 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .caching import invalidar
+
+logger = logging.getLogger(__name__)
+
+# Campos de imagem que ganham variantes redimensionadas (WebP + JPEG) em variantes/, com o grupo
+# de cache das respostas que as mostram. As variantes prontas ficam registradas no campo
+# `variantes` da linha: {'arquivo': nome, 'larguras': [[largura configurada, largura real], ...]},
+# só as que existem; o nome evita anunciar as variantes de um arquivo que já foi trocado
+CAMPOS_IMAGEM = [
+    ('project.ImovelFoto', 'foto', 'imoveis'),
+    ('project.BannerCarrossel', 'imagem', 'banners'),
+    ('project.About', 'foto', 'about'),
+    ('project.Configuracao', 'logo', 'configuracao'),
+]
+FORMATOS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+PASTA = 'variantes'
+
+_executor = None
+
+
+def larguras():
+    return sorted(settings.IMAGENS['LARGURAS'])
+
+
+def caminho_variante(nome, largura, formato):
+    # imoveis/casa.jpg -> variantes/imoveis/casa/640.webp (determinístico, sem consulta ao banco)
+    base, _ = posixpath.splitext(nome)
+    return f"{PASTA}/{base}/{largura}.{formato}"
+
+
+def _larguras(arquivo, variantes):
+    if not arquivo or not variantes or variantes.get('arquivo') != arquivo.name:
+        return []
+    return variantes['larguras']
+
+
+def srcset(arquivo, variantes):
+    """Retorna {'webp': 'url 320w, ...', 'jpeg': ...} das variantes geradas (None se não há nenhuma)."""
+    geradas = _larguras(arquivo, variantes)
+    if not geradas:
+        return None
+    storage = arquivo.storage
+    return {
+        formato: ', '.join(
+            f"{storage.url(caminho_variante(arquivo.name, largura, formato))} {real}w" for largura, real in geradas
+        )
+        for formato in FORMATOS
+    }
+
+
+def menor_variante(arquivo, variantes):
+    """URL da menor variante WebP; a do original enquanto as variantes não foram geradas."""
+    geradas = _larguras(arquivo, variantes)
+    if not geradas:
+        return arquivo.url
+    return arquivo.storage.url(caminho_variante(arquivo.name, geradas[0][0], 'webp'))
+
+
+def _abrir(storage, nome):
+    with storage.open(nome, 'rb') as arquivo:
+        imagem = Image.open(arquivo)
+        imagem.load()
+    return ImageOps.exif_transpose(imagem)
+
+
+def _salvar(imagem, formato, qualidade):
+    if imagem.mode not in ('RGB', 'RGBA'):
+        imagem = imagem.convert('RGBA' if imagem.has_transparency_data else 'RGB')
+    if formato == 'jpeg' and imagem.mode == 'RGBA':
+        # JPEG não tem transparência: compõe sobre fundo branco (logos em PNG)
+        fundo = Image.new('RGB', imagem.size, 'white')
+        fundo.paste(imagem, mask=imagem.getchannel('A'))
+        imagem = fundo
+    buffer = BytesIO()
+    imagem.save(buffer, FORMATOS[formato], quality=qualidade, optimize=formato == 'jpeg', progressive=formato == 'jpeg')
+    return ContentFile(buffer.getvalue())
+
+
+def gerar_variantes(storage, nome, forcar=False, registrar=True):
+    """Gera as variantes de uma imagem; retorna quantos arquivos foram gravados.
+
+    Com registrar=True as variantes prontas também são registradas nas linhas que usam a imagem.
+    """
+    qualidade = settings.IMAGENS['QUALIDADE']
+    pendentes = [
+        (largura, formato) for largura in larguras() for formato in FORMATOS
+        if forcar or not storage.exists(caminho_variante(nome, largura, formato))
+    ]
+    if not pendentes:
+        if registrar:
+            registrar_variantes(storage, nome)
+        return 0
+    try:
+        original = _abrir(storage, nome)
+    except (OSError, UnidentifiedImageError) as exc:
+        logger.warning("Não foi possível gerar variantes de %s: %s", nome, exc)
+        if registrar:
+            registrar_variantes(storage, nome)
+        return 0
+
+    for largura, formato in pendentes:
+        imagem = original.copy()
+        # thumbnail() nunca amplia: originais menores que a largura são mantidos no tamanho real
+        imagem.thumbnail((largura, largura * 10), Image.LANCZOS)
+        caminho = caminho_variante(nome, largura, formato)
+        if storage.exists(caminho):
+            storage.delete(caminho)
+        storage.save(caminho, _salvar(imagem, formato, qualidade))
+    if registrar:
+        registrar_variantes(storage, nome)
+    return len(pendentes)
+
+
+def variantes_existentes(storage, nome):
+    """[[largura configurada, largura real], ...] das variantes gravadas nos dois formatos.
+
+    thumbnail() nunca amplia, então larguras maiores que o original repetem a mesma imagem e ficam de fora.
+    """
+    variantes = []
+    for largura in larguras():
+        if not all(storage.exists(caminho_variante(nome, largura, formato)) for formato in FORMATOS):
+            continue
+        try:
+            with storage.open(caminho_variante(nome, largura, 'jpeg'), 'rb') as arquivo:
+                real = Image.open(arquivo).size[0]  # só o cabeçalho é lido
+        except (OSError, UnidentifiedImageError):
+            continue
+        if not variantes or real > variantes[-1][1]:
+            variantes.append([largura, real])
+    return variantes
+
+
+def registrar_variantes(storage, nome):
+    variantes = {'arquivo': nome, 'larguras': variantes_existentes(storage, nome)}
+    for rotulo, campo, grupo in CAMPOS_IMAGEM:
+        model = apps.get_model(rotulo)
+        # update() não dispara os sinais (que agendariam a geração de novo); o cache é invalidado aqui
+        if model.objects.filter(**{campo: nome}).exclude(variantes=variantes).update(variantes=variantes):
+            invalidar(grupo)
+
+
+def _gerar_com_log(storage, nome):
+    try:
+        gerar_variantes(storage, nome)
+    except Exception:
+        logger.exception("Falha ao gerar variantes de %s", nome)
+
+
+def _gerar_em_thread(storage, nome):
+    try:
+        _gerar_com_log(storage, nome)
+    finally:
+        # Conexões abertas pela thread do pool não são fechadas pelo ciclo da requisição
+        connections.close_all()
+
+
+def agendar(arquivo):
+    """Agenda a geração das variantes para depois do commit, fora da thread da requisição."""
+    global _executor
+    if not arquivo:
+        return
+    # Mesmo com as variantes já gravadas (arquivo reaproveitado pelo hash) a linha precisa registrá-las
+    storage, nome = arquivo.storage, arquivo.name
+    if not settings.IMAGENS['ASSINCRONO']:
+        transaction.on_commit(lambda: _gerar_com_log(storage, nome))
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.IMAGENS['WORKERS'], thread_name_prefix='imagens')
+    transaction.on_commit(lambda: _executor.submit(_gerar_em_thread, storage, nome))
+
+
+def arquivos_existentes():
+    """Percorre (storage, nome) de todas as imagens cadastradas nos CAMPOS_IMAGEM."""
+    for rotulo, campo, _ in CAMPOS_IMAGEM:
+        model = apps.get_model(rotulo)
+        storage = model._meta.get_field(campo).storage
+        nomes = model.objects.exclude(**{campo: ''}).exclude(**{f'{campo}__isnull': True})
+        for nome in nomes.values_list(campo, flat=True).distinct().iterator():
+            yield storage, nome
@@ -0,0 +1,198 @@
+import csv
+import json
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import invalidar
+from .geocoding import preencher_coordenadas
+from .models import Imovel, ImovelFoto
+from .sync import hash_registro
+
+# Importação de imóveis de planilhas e feeds de parceiros (CSV, JSON ou NDJSON).
+# Os registros são lidos em streaming e processados em lotes: uma consulta pelas chaves do lote,
+# comparação pelo hash do conteúdo e bulk_create/bulk_update numa transação por lote.
+# A chave externa fica em Imovel.sigavi_id com o prefixo da origem ("parceiro:123"), para não se
+# misturar com os ids do Sigavi (que a sincronização desativa quando somem do feed).
+
+BATCH_SIZE = 500
+FORMATOS = ['csv', 'json', 'ndjson']
+SEPARADOR_FOTOS = '|'
+MAX_ERROS = 20
+
+# Colunas aceitas: os campos editáveis do imóvel; as demais colunas do arquivo são ignoradas
+CAMPOS = {
+    campo.name: campo for campo in Imovel._meta.concrete_fields
+    if campo.name not in {'id', 'sigavi_id', 'hash_conteudo', 'data_criacao', 'atualizado_em'}
+}
+OBRIGATORIOS = [
+    nome for nome, campo in CAMPOS.items() if not (campo.null or campo.blank or campo.has_default())
+]
+BOOLEANOS = {'sim': True, 's': True, 'nao': False, 'não': False, 'n': False}
+
+
+class RegistroInvalido(Exception):
+    pass
+
+
+def detectar_formato(nome):
+    extensao = str(nome).rsplit('.', 1)[-1].lower()
+    return extensao if extensao in FORMATOS else 'csv'
+
+
+def ler_registros(arquivo, formato):
+    if formato == 'csv':
+        yield from csv.DictReader(arquivo)
+    elif formato == 'ndjson':
+        for linha in arquivo:
+            if linha.strip():
+                yield json.loads(linha)
+    else:
+        # JSON comum precisa ser lido inteiro; para arquivos grandes prefira NDJSON
+        dados = json.load(arquivo)
+        yield from (dados if isinstance(dados, list) else dados.get('imoveis', []))
+
+
+def _vazio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def _fotos(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        valor = valor.split(SEPARADOR_FOTOS)
+    return [str(url).strip() for url in valor if str(url).strip()]
+
+
+def normalizar(registro, chave, origem):
+    """Converte uma linha do arquivo em (sigavi_id, campos, fotos); levanta RegistroInvalido."""
+    codigo = registro.get(chave)
+    if _vazio(codigo):
+        raise RegistroInvalido(f"coluna '{chave}' vazia")
+    sigavi_id = f"{origem}:{str(codigo).strip()}"
+
+    campos, erros = {}, []
+    for nome, valor in registro.items():
+        campo = CAMPOS.get(nome)
+        if campo is None or _vazio(valor):
+            continue
+        if isinstance(valor, str):
+            valor = valor.strip()
+            if campo.get_internal_type() == 'BooleanField':
+                valor = BOOLEANOS.get(valor.lower(), valor)
+        try:
+            campos[nome] = campo.clean(valor, None)
+        except ValidationError as exc:
+            erros.append(f"{nome}: {' '.join(exc.messages)}")
+    if erros:
+        raise RegistroInvalido('; '.join(erros))
+    return sigavi_id, campos, _fotos(registro.get('fotos'))
+
+
+def _lotes(registros, tamanho):
+    lote = []
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _gravar_fotos(instancias, fotos):
+    pks = [instancia.pk for instancia in instancias if instancia.sigavi_id in fotos]
+    ImovelFoto.objects.filter(imovel_id__in=pks).delete()
+    ImovelFoto.objects.bulk_create(
+        [
+            ImovelFoto(imovel=instancia, url_externa=url, ordem=ordem)
+            for instancia in instancias
+            for ordem, url in enumerate(fotos.get(instancia.sigavi_id, []))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def importar(registros, chave='codigo', origem='importacao', lote=BATCH_SIZE, simular=False, progresso=None):
+    """Grava os registros em lotes, pulando os que não mudaram; retorna os totais.
+
+    Com simular=True nada é gravado, mas os totais são os que a importação real teria.
+    progresso, se informado, é chamado com os totais parciais após cada lote.
+    """
+    if not origem:
+        # Sem prefixo a chave seria tratada como id do Sigavi pela sincronização
+        raise ValueError("A origem não pode ser vazia")
+    resultado = {'lidos': 0, 'criados': 0, 'atualizados': 0, 'inalterados': 0, 'invalidos': 0, 'erros': []}
+    inicio = time.perf_counter()
+
+    for linhas in _lotes(registros, lote):
+        registros_lote = {}
+        for linha in linhas:
+            resultado['lidos'] += 1
+            try:
+                sigavi_id, campos, fotos = normalizar(linha, chave, origem)
+            except RegistroInvalido as exc:
+                resultado['invalidos'] += 1
+                if len(resultado['erros']) < MAX_ERROS:
+                    resultado['erros'].append(f"registro {resultado['lidos']}: {exc}")
+                continue
+            # Chave repetida no mesmo lote: vale a última linha, como numa planilha editada
+            registros_lote[sigavi_id] = (campos, fotos)
+
+        existentes = {
+            sigavi_id: (pk, hash_atual)
+            for sigavi_id, pk, hash_atual in Imovel.objects.filter(sigavi_id__in=list(registros_lote)).values_list(
+                'sigavi_id', 'pk', 'hash_conteudo'
+            )
+        }
+
+        agora = timezone.now()
+        novos, alterados, fotos_alteradas = [], {}, {}
+        for sigavi_id, (campos, fotos) in registros_lote.items():
+            hash_novo = hash_registro({**campos, 'fotos': fotos})
+            pk, hash_atual = existentes.get(sigavi_id, (None, None))
+            if pk is not None and hash_atual == hash_novo:
+                resultado['inalterados'] += 1
+                continue
+            if pk is None:
+                faltando = [nome for nome in OBRIGATORIOS if nome not in campos]
+                if faltando:
+                    resultado['invalidos'] += 1
+                    if len(resultado['erros']) < MAX_ERROS:
+                        resultado['erros'].append(f"{sigavi_id}: colunas obrigatórias ausentes ({', '.join(faltando)})")
+                    continue
+            # bulk_update não preenche campos auto_now
+            instancia = Imovel(pk=pk, sigavi_id=sigavi_id, hash_conteudo=hash_novo, atualizado_em=agora, **campos)
+            if pk is None:
+                novos.append(instancia)
+            else:
+                # Só as colunas presentes no arquivo são atualizadas; agrupa registros com as mesmas colunas
+                alterados.setdefault(tuple(sorted(campos)), []).append(instancia)
+            if fotos is not None:
+                fotos_alteradas[sigavi_id] = fotos
+
+        resultado['criados'] += len(novos)
+        resultado['atualizados'] += sum(len(instancias) for instancias in alterados.values())
+        if not simular and (novos or alterados):
+            # Coordenadas ausentes reaproveitam o cache de geocodificação, sem chamar o provedor
+            preencher_coordenadas(novos, consultar_provedor=False)
+            with transaction.atomic():
+                Imovel.objects.bulk_create(novos, batch_size=BATCH_SIZE)
+                for campos, instancias in alterados.items():
+                    Imovel.objects.bulk_update(
+                        instancias, [*campos, 'hash_conteudo', 'atualizado_em'], batch_size=BATCH_SIZE
+                    )
+                if fotos_alteradas:
+                    _gravar_fotos(novos + [i for instancias in alterados.values() for i in instancias], fotos_alteradas)
+
+        if progresso:
+            progresso({**resultado, 'segundos': time.perf_counter() - inicio})
+
+    resultado['segundos'] = time.perf_counter() - inicio
+    # bulk_create/bulk_update não disparam sinais, então o cache é invalidado aqui
+    if not simular and (resultado['criados'] or resultado['atualizados']):
+        invalidar('imoveis')
+    return resultado
@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from project import benchmark
+from project.dados_sinteticos import gerar
+from project.models import Imovel
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede latência (p50/p95/p99), queries por requisição, pico de memória e tamanho das respostas de cada endpoint da API "
+        "com o Client de teste e num servidor local, sobre um catálogo sintético num banco temporário "
+        "(nunca o db.sqlite3). Grava o resultado em JSON para o comparar_bench"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--imoveis', type=int, default=5000, help="Tamanho do catálogo sintético")
+        parser.add_argument('--fotos', type=int, default=4)
+        parser.add_argument('--semente', type=int, default=42)
+        parser.add_argument('--requisicoes', type=int, default=200, help="Requisições medidas por cenário")
+        parser.add_argument('--aquecimento', type=int, default=10, help="Requisições descartadas antes de medir")
+        parser.add_argument(
+            '--cenario', action='append', dest='cenarios', help="Só os cenários indicados (padrão: todos)",
+        )
+        parser.add_argument('--sem-servidor', action='store_true', help="Só o Client de teste, sem HTTP real")
+        parser.add_argument('--latencia-sigavi', type=float, default=0.05, help="Segundos por resposta do Sigavi")
+        parser.add_argument('--saida', help="Arquivo JSON (padrão: bench-AAAAMMDD-HHMMSS.json)")
+
+    def handle(self, *args, **options):
+        if options['requisicoes'] < 1:
+            raise CommandError("--requisicoes deve ser positivo")
+        nomes = [cenario.nome for cenario in benchmark.cenarios()]
+        desconhecidos = set(options['cenarios'] or []) - set(nomes)
+        if desconhecidos:
+            raise CommandError(f"Cenários desconhecidos: {', '.join(sorted(desconhecidos))} (use {', '.join(nomes)})")
+        saida = options['saida'] or f"bench-{timezone.localtime():%Y%m%d-%H%M%S}.json"
+
+        pasta = tempfile.mkdtemp(prefix='bench-api-')
+        sigavi = benchmark.iniciar_sigavi_simulado(options['latencia_sigavi'])
+        # Banco em arquivo: o servidor local atende em outras threads, cada uma com sua conexão
+        connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'bench.sqlite3')
+        nome_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            totais = gerar(imoveis=options['imoveis'], fotos=options['fotos'], semente=options['semente'])
+            self.stderr.write(f"Catálogo: {totais['imoveis']} imóveis, {totais['fotos']} fotos")
+            config_sigavi = {**settings.SIGAVI, 'BASE_URL': 'http://%s:%s' % sigavi.server_address, 'PASSWORD': 'bench'}
+            # DEBUG guardaria cada SQL em connection.queries, distorcendo tempo e memória
+            with override_settings(DEBUG=False, SIGAVI=config_sigavi):
+                resultado = self.medir(options)
+            resultado['meta'] = benchmark.metadados(
+                imoveis=options['imoveis'], fotos=options['fotos'], semente=options['semente'],
+                requisicoes=options['requisicoes'], aquecimento=options['aquecimento'],
+                latencia_sigavi=options['latencia_sigavi'],
+            )
+        finally:
+            sigavi.shutdown()
+            connections.close_all()
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+            shutil.rmtree(pasta, ignore_errors=True)
+
+        with open(saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {saida}"))
+
+    def medir(self, options):
+        staff = get_user_model().objects.create_user('bench', is_staff=True)
+        sessao = Client()
+        sessao.force_login(staff)
+        cookies = f"{settings.SESSION_COOKIE_NAME}={sessao.cookies[settings.SESSION_COOKIE_NAME].value}"
+        imovel_id = Imovel.objects.values_list('pk', flat=True).first()
+        selecionados = [
+            cenario for cenario in benchmark.cenarios(imovel_id)
+            if not options['cenarios'] or cenario.nome in options['cenarios']
+        ]
+
+        resultados = {}
+        cache.clear()
+        for cenario in selecionados:
+            cliente = benchmark.medir_cliente(cenario, options['requisicoes'], options['aquecimento'], staff)
+            resultados[cenario.nome] = {'rota': cenario.rota, 'metodo': cenario.metodo, 'cliente': cliente}
+            self.linha(cenario.nome, 'cliente', cliente)
+        if not options['sem_servidor']:
+            with benchmark.ServidorLocal() as servidor:
+                for cenario in selecionados:
+                    # Numeração longe da do Client: os POSTs não repetem e-mails nem horários
+                    resultados[cenario.nome]['servidor'] = benchmark.medir_servidor(
+                        servidor, cenario, options['requisicoes'], options['aquecimento'], cookies,
+                        inicio=1_000_000,
+                    )
+                    self.linha(cenario.nome, 'servidor', resultados[cenario.nome]['servidor'])
+        return {'cenarios': resultados}
+
+    def linha(self, nome, modo, dados):
+        extras = f" | {dados['queries']:g} queries | {dados['pico_memoria_kb']:.0f} KB" if 'queries' in dados else ''
+        if 'bytes' in dados:
+            extras += f" | {dados['bytes'] / 1024:.1f} KB/resp | render {dados['renderizacao_ms']:.2f} ms"
+        self.stdout.write(
+            f"{nome:>16} {modo:>8}: p50 {dados['p50_ms']:7.2f} ms | p95 {dados['p95_ms']:7.2f} ms | "
+            f"p99 {dados['p99_ms']:7.2f} ms{extras} | status {dados['status']}"
+        )
@@ -0,0 +1,92 @@
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from project.models import Contact
+from project.spool import descarregar_tudo
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a vazão de POST /api/contact/ com vários clientes simultâneos, gravando direto no SQLite "
+        "e com a fila de gravação adiada (LEADS_SPOOL). Usa um banco temporário, nunca o db.sqlite3."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requisicoes', type=int, default=2000)
+        parser.add_argument('--concorrencia', type=int, default=16)
+        parser.add_argument('--durabilidade', choices=['full', 'normal', 'off'], default='normal')
+        parser.add_argument('--modo', choices=['sincrono', 'spool', 'ambos'], default='ambos')
+
+    def handle(self, *args, **options):
+        pasta = tempfile.mkdtemp(prefix='bench-leads-')
+        # Banco de teste em arquivo (o padrão do SQLite nos testes é em memória, sem disputa de lock)
+        connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'bench.sqlite3')
+        nome_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            modos = ['sincrono', 'spool'] if options['modo'] == 'ambos' else [options['modo']]
+            for modo in modos:
+                spool = {
+                    'ATIVO': modo == 'spool', 'CAMINHO': os.path.join(pasta, f'spool-{modo}.sqlite3'),
+                    'DURABILIDADE': options['durabilidade'], 'LOTE': 200, 'INTERVALO': 0.2,
+                }
+                with override_settings(LEADS_SPOOL=spool):
+                    self.relatorio(modo, *self.carga(options['requisicoes'], options['concorrencia']))
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    def carga(self, requisicoes, concorrencia):
+        Contact.objects.all().delete()
+        latencias, erros = [], []
+        lock = threading.Lock()
+        restantes = iter(range(requisicoes))
+        url = reverse('contact')
+
+        def cliente():
+            client = Client(raise_request_exception=False)
+            while True:
+                with lock:
+                    indice = next(restantes, None)
+                if indice is None:
+                    break
+                inicio = time.perf_counter()
+                response = client.post(url, {
+                    'nome': f'Lead {indice}', 'email': f'lead{indice}@example.com',
+                    'telefone': '11999990000', 'mensagem': 'Gostaria de mais informações.',
+                }, content_type='application/json')
+                duracao = time.perf_counter() - inicio
+                with lock:
+                    latencias.append(duracao)
+                    if response.status_code >= 500:
+                        erros.append(response.status_code)
+            connection.close()
+
+        inicio = time.perf_counter()
+        threads = [threading.Thread(target=cliente) for _ in range(concorrencia)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        tempo_respostas = time.perf_counter() - inicio
+        descarregar_tudo()
+        tempo_total = time.perf_counter() - inicio
+        return latencias, erros, tempo_respostas, tempo_total, Contact.objects.count()
+
+    def relatorio(self, modo, latencias, erros, tempo_respostas, tempo_total, gravados):
+        latencias = sorted(latencias)
+        percentil = lambda p: latencias[min(int(len(latencias) * p), len(latencias) - 1)] * 1000  # noqa: E731
+        self.stdout.write(
+            f"{modo:>9}: {len(latencias) / tempo_respostas:8.1f} req/s | "
+            f"p50 {statistics.median(latencias) * 1000:6.1f} ms | p95 {percentil(0.95):6.1f} ms | "
+            f"p99 {percentil(0.99):7.1f} ms | erros {len(erros)} | gravados {gravados} em {tempo_total:.2f}s"
+        )
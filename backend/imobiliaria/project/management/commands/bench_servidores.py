@@ -0,0 +1,171 @@
+import contextlib
+import http.client
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from project.benchmark import iniciar_sigavi_simulado
+from project.dados_sinteticos import gerar
+from project.models import BannerCarrossel
+
+# Servidores comparados: todos sob o gunicorn, com o mesmo número de processos
+MODOS = {
+    'sync': ['imobiliaria.wsgi:application'],
+    'gthread': ['imobiliaria.wsgi:application', '-k', 'gthread', '--threads', '{threads}'],
+    'asgi': ['imobiliaria.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+ENDPOINTS = {
+    'imoveis': '/api/imoveis/?limit=20',
+    'banners': '/api/banners/',
+    # Ficha sem cache: cada requisição espera o Sigavi simulado por --latencia-sigavi
+    'empreendimento': '/api/empreendimentos/{id}/',
+}
+SETTINGS = '''from imobiliaria.settings import *  # noqa: F401,F403
+
+DEBUG = False
+SIGAVI = {{**SIGAVI, 'BASE_URL': {sigavi!r}, 'CACHE_TTL': 0, 'CACHE_STALE': 0}}
+'''
+
+
+def porta_livre():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara req/s e latências de /api/imoveis/, /api/banners/ e do proxy de empreendimentos sob gunicorn "
+        "sync, gthread e ASGI (uvicorn), com o mesmo banco temporário. Nunca usa o db.sqlite3."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modo', action='append', choices=list(MODOS), dest='modos')
+        parser.add_argument('--endpoint', action='append', choices=list(ENDPOINTS), dest='endpoints')
+        parser.add_argument('--imoveis', type=int, default=2000, help="Imóveis no banco de teste")
+        parser.add_argument('--requisicoes', type=int, default=1000, help="Requisições por endpoint")
+        parser.add_argument('--concorrencia', type=int, default=32)
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=8, help="Threads por worker no modo gthread")
+        parser.add_argument('--latencia-sigavi', type=float, default=0.2, help="Segundos por resposta do Sigavi")
+
+    def handle(self, *args, **options):
+        pasta = tempfile.mkdtemp(prefix='bench-servidores-')
+        sigavi = iniciar_sigavi_simulado(options['latencia_sigavi'])
+
+        connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'bench.sqlite3')
+        nome_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.popular(options['imoveis'])
+            connections.close_all()
+            with open(os.path.join(pasta, 'bench_settings.py'), 'w', encoding='utf-8') as arquivo:
+                arquivo.write(SETTINGS.format(sigavi='http://%s:%s' % sigavi.server_address))
+            for modo in options['modos'] or list(MODOS):
+                with self.servidor(modo, pasta, connection.settings_dict['NAME'], options) as porta:
+                    for endpoint in options['endpoints'] or list(ENDPOINTS):
+                        self.relatorio(modo, endpoint, *self.carga(
+                            porta, ENDPOINTS[endpoint], options['requisicoes'], options['concorrencia']
+                        ))
+        finally:
+            sigavi.shutdown()
+            connections.close_all()
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    def popular(self, quantidade):
+        # Mesmo conjunto de dados em todos os modos (semente fixa)
+        gerar(imoveis=quantidade, fotos=3, semente=42)
+        BannerCarrossel.objects.bulk_create([BannerCarrossel(imagem=f'banners/{i}.jpg', ordem=i) for i in range(3)])
+
+    @contextlib.contextmanager
+    def servidor(self, modo, pasta, banco, options):
+        porta = porta_livre()
+        argumentos = [argumento.format(threads=options['threads']) for argumento in MODOS[modo]]
+        ambiente = {
+            # Mesmo journal da produção (WAL), salvo se o ambiente pedir outro
+            'SQLITE_JOURNAL_MODE': 'WAL',
+            **os.environ, 'DJANGO_SETTINGS_MODULE': 'bench_settings',
+            'PYTHONPATH': os.pathsep.join([pasta, str(settings.BASE_DIR)]), 'DB_NAME': str(banco),
+            # Sob ASGI cada requisição roda numa thread nova: conexões persistentes não se aplicam
+            'DB_CONN_MAX_AGE': '0' if modo == 'asgi' else '600',
+        }
+        processo = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', *argumentos, '-w', str(options['workers']),
+             '-b', f'127.0.0.1:{porta}', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env=ambiente,
+        )
+        try:
+            self.aguardar(porta, processo)
+            yield porta
+        finally:
+            processo.terminate()
+            processo.wait(timeout=30)
+
+    def aguardar(self, porta, processo):
+        limite = time.monotonic() + 30
+        while time.monotonic() < limite:
+            if processo.poll() is not None:
+                raise RuntimeError("O servidor terminou antes de responder")
+            try:
+                conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=1)
+                conexao.request('GET', ENDPOINTS['banners'])
+                if conexao.getresponse().status == 200:
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError("O servidor não respondeu em 30s")
+
+    def carga(self, porta, caminho, requisicoes, concorrencia):
+        latencias, erros = [], []
+        lock = threading.Lock()
+        restantes = iter(range(requisicoes))
+
+        def cliente():
+            # Uma conexão keep-alive por cliente (o worker sync fecha a cada resposta e ela é reaberta)
+            conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+            while True:
+                with lock:
+                    indice = next(restantes, None)
+                if indice is None:
+                    break
+                inicio = time.perf_counter()
+                try:
+                    conexao.request('GET', caminho.format(id=indice))
+                    response = conexao.getresponse()
+                    response.read()
+                    status = response.status
+                except (OSError, http.client.HTTPException):
+                    conexao.close()
+                    status = 599
+                duracao = time.perf_counter() - inicio
+                with lock:
+                    latencias.append(duracao)
+                    if status >= 400:
+                        erros.append(status)
+            conexao.close()
+
+        inicio = time.perf_counter()
+        threads = [threading.Thread(target=cliente) for _ in range(concorrencia)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencias, erros, time.perf_counter() - inicio
+
+    def relatorio(self, modo, endpoint, latencias, erros, tempo):
+        latencias = sorted(latencias)
+        percentil = lambda p: latencias[min(int(len(latencias) * p), len(latencias) - 1)] * 1000  # noqa: E731
+        self.stdout.write(
+            f"{modo:>8} {endpoint:>14}: {len(latencias) / tempo:8.1f} req/s | "
+            f"p50 {statistics.median(latencias) * 1000:7.1f} ms | p99 {percentil(0.99):7.1f} ms | erros {len(erros)}"
+        )
@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from project.benchmark import comparar
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara dois resultados do bench_api e falha (código de saída 1) se houver regressão de latência "
+        "p95/p99, de queries por requisição, de pico de memória ou de status HTTP"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base', help="Resultado de referência (ex.: o da branch principal)")
+        parser.add_argument('atual')
+        parser.add_argument('--tolerancia', type=float, default=0.2, help="Piora relativa aceita (0.2 = 20%%)")
+        parser.add_argument('--minimo-ms', type=float, default=1.0, help="Piora absoluta mínima para contar")
+
+    def handle(self, *args, **options):
+        base, atual = self.ler(options['base']), self.ler(options['atual'])
+        if base['meta'].get('imoveis') != atual['meta'].get('imoveis'):
+            self.stderr.write(self.style.WARNING("Os resultados foram medidos com catálogos de tamanhos diferentes"))
+        regressoes = comparar(base, atual, options['tolerancia'], options['minimo_ms'])
+        for regressao in regressoes:
+            self.stdout.write(self.style.ERROR(regressao))
+        if regressoes:
+            raise CommandError(f"{len(regressoes)} regressões em relação a {options['base']}")
+        self.stdout.write(self.style.SUCCESS("Nenhuma regressão"))
+
+    def ler(self, caminho):
+        try:
+            with open(caminho, encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Não foi possível ler {caminho}: {exc}") from exc
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from project.spool import descarregar_tudo, pendentes
+
+
+class Command(BaseCommand):
+    help = "Grava no banco os leads pendentes na fila de gravação adiada (LEADS_SPOOL)"
+
+    def handle(self, *args, **options):
+        total = descarregar_tudo()
+        self.stdout.write(self.style.SUCCESS(f"{total} leads gravados, {pendentes()} pendentes"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from project.newsletter import BATCH_SIZE, exportar
+
+
+class Command(BaseCommand):
+    help = "Exporta os inscritos da newsletter em CSV, lendo o banco em lotes; sem arquivo escreve na saída padrão"
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', nargs='?')
+        parser.add_argument('--lote', type=int, default=BATCH_SIZE, help="Linhas lidas do banco por vez")
+
+    def handle(self, *args, **options):
+        if not options['arquivo']:
+            exportar(self.stdout, options['lote'])
+            return
+        with open(options['arquivo'], 'w', newline='', encoding='utf-8') as arquivo:
+            total = exportar(arquivo, options['lote'])
+        self.stderr.write(self.style.SUCCESS(f"{total} inscritos exportados"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from project.caching import invalidar
+from project.geocoding import backfill
+from project.models import Imovel, Lancamento
+
+
+class Command(BaseCommand):
+    help = "Preenche latitude/longitude de imóveis e lançamentos usando o cache persistente e o provedor de geocodificação"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help="Consultas simultâneas ao provedor")
+        parser.add_argument('--rate', type=float, dest='por_segundo', help="Máximo de consultas por segundo")
+        parser.add_argument('--lote', type=int, default=500, help="Registros lidos por lote")
+
+    def handle(self, *args, **options):
+        for grupo, model in (('imoveis', Imovel), ('lancamentos', Lancamento)):
+            total = backfill(
+                model.objects.all(), lote=options['lote'],
+                workers=options['workers'], por_segundo=options['por_segundo'],
+            )
+            if total:
+                invalidar(grupo)
+            self.stdout.write(self.style.SUCCESS(f"{grupo}: {total} registros geocodificados"))
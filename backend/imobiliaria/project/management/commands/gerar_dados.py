@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from project.dados_sinteticos import BATCH_SIZE, gerar, limpar
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera um catálogo sintético (imóveis, fotos, agendamentos e leads) reproduzível pela semente, "
+        "de mil a milhões de linhas, para testes de carga. --limpar remove só os registros sintéticos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--imoveis', type=int, default=1000)
+        parser.add_argument('--fotos', type=int, default=4, help="Média de fotos por imóvel")
+        parser.add_argument('--agendamentos', type=int, help="Padrão: um para cada dois imóveis")
+        parser.add_argument('--leads', type=int, help="Contatos, ligações e inscrições de cada tipo (padrão: --imoveis)")
+        parser.add_argument('--semente', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=BATCH_SIZE, help="Linhas por bulk_create")
+        parser.add_argument('--limpar', action='store_true', help="Remove os dados sintéticos antes de gerar")
+
+    def handle(self, *args, **options):
+        if options['imoveis'] < 0 or options['lote'] < 1:
+            raise CommandError("--imoveis não pode ser negativo e --lote deve ser positivo")
+        if options['limpar']:
+            self.stdout.write(f"{limpar()} imóveis sintéticos removidos")
+        if not options['imoveis']:
+            return
+        totais = gerar(
+            imoveis=options['imoveis'], fotos=options['fotos'], agendamentos=options['agendamentos'],
+            leads=options['leads'], semente=options['semente'], lote=options['lote'], progresso=self.progresso,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{totais['imoveis']} imóveis, {totais['fotos']} fotos, {totais['agendamentos']} agendamentos, "
+            f"{totais['contatos']} contatos, {totais['ligacoes']} ligações e {totais['newsletter']} inscrições gerados"
+        ))
+
+    def progresso(self, parcial):
+        self.stderr.write(f"{parcial['imoveis']} imóveis | {parcial['fotos']} fotos")
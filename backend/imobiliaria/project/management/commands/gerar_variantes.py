@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from project.imagens import arquivos_existentes, gerar_variantes, registrar_variantes
+
+
+class Command(BaseCommand):
+    help = "Gera (ou regenera) as variantes WebP/JPEG das imagens já enviadas e as registra para o srcset"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forcar', action='store_true', help="Regrava variantes que já existem")
+        parser.add_argument('--workers', type=int, default=4, help="Imagens processadas em paralelo")
+
+    def handle(self, *args, **options):
+        arquivos = list(arquivos_existentes())
+
+        def processar(item):
+            storage, nome = item
+            return gerar_variantes(storage, nome, forcar=options['forcar'], registrar=False)
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            gravadas = sum(executor.map(processar, arquivos))
+        # Registro nas linhas (srcset) fora das threads: um só processo escrevendo no banco
+        for storage, nome in arquivos:
+            registrar_variantes(storage, nome)
+
+        self.stdout.write(self.style.SUCCESS(f"{len(arquivos)} imagens verificadas, {gravadas} variantes gravadas"))
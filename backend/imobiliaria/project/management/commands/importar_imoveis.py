@@ -0,0 +1,57 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from project.importacao import BATCH_SIZE, FORMATOS, detectar_formato, importar, ler_registros
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa imóveis de CSV, JSON ou NDJSON em lotes, criando ou atualizando pela chave externa "
+        "e pulando registros que não mudaram; '-' lê da entrada padrão"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+        parser.add_argument('--formato', choices=FORMATOS, help="Padrão: pela extensão do arquivo (csv para '-')")
+        parser.add_argument('--chave', default='codigo', help="Coluna com o código do imóvel na origem")
+        parser.add_argument(
+            '--origem', default='importacao',
+            help="Prefixo da chave gravada em sigavi_id (ex.: o nome do parceiro); obrigatório para não se confundir com os ids do Sigavi",
+        )
+        parser.add_argument('--lote', type=int, default=BATCH_SIZE, help="Registros por transação")
+        parser.add_argument('--dry-run', action='store_true', help="Só mostra o que seria criado/atualizado")
+
+    def handle(self, *args, **options):
+        if not options['origem'].strip():
+            raise CommandError("A origem não pode ser vazia")
+        if ':' in options['origem']:
+            raise CommandError("A origem não pode conter ':'")
+        formato = options['formato'] or detectar_formato(options['arquivo'])
+        parametros = {
+            'chave': options['chave'], 'origem': options['origem'], 'lote': options['lote'],
+            'simular': options['dry_run'], 'progresso': self.progresso,
+        }
+        try:
+            if options['arquivo'] == '-':
+                resultado = importar(ler_registros(sys.stdin, formato), **parametros)
+            else:
+                with open(options['arquivo'], newline='', encoding='utf-8-sig') as arquivo:
+                    resultado = importar(ler_registros(arquivo, formato), **parametros)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Não foi possível ler {options['arquivo']}: {exc}") from exc
+
+        for erro in resultado['erros']:
+            self.stderr.write(self.style.WARNING(erro))
+        prefixo = "[dry-run] " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixo}{resultado['lidos']} lidos, {resultado['criados']} criados, {resultado['atualizados']} atualizados, "
+            f"{resultado['inalterados']} inalterados, {resultado['invalidos']} inválidos em {resultado['segundos']:.1f}s"
+        ))
+
+    def progresso(self, parcial):
+        taxa = parcial['lidos'] / parcial['segundos'] if parcial['segundos'] else 0
+        self.stderr.write(
+            f"{parcial['lidos']} lidos | {parcial['criados']} criados | {parcial['atualizados']} atualizados | "
+            f"{parcial['inalterados']} inalterados | {taxa:.0f} registros/s"
+        )
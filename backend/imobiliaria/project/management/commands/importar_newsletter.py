@@ -0,0 +1,23 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from project.newsletter import BATCH_SIZE, importar
+
+
+class Command(BaseCommand):
+    help = "Importa inscritos da newsletter de um CSV (primeira coluna = e-mail) em lotes; '-' lê da entrada padrão"
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+        parser.add_argument('--lote', type=int, default=BATCH_SIZE, help="E-mails gravados por INSERT")
+
+    def handle(self, *args, **options):
+        if options['arquivo'] == '-':
+            resultado = importar(sys.stdin, options['lote'])
+        else:
+            with open(options['arquivo'], newline='', encoding='utf-8-sig') as arquivo:
+                resultado = importar(arquivo, options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['validos']} e-mails lidos, {resultado['novos']} novos inscritos, {resultado['invalidos']} inválidos"
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from project.sigavi import SigaviError
+from project.sync import FEEDS, SyncEmAndamento, sincronizar_catalogo
+
+
+class Command(BaseCommand):
+    help = "Sincroniza imóveis, lançamentos e corretores do Sigavi com as tabelas locais"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--feed', action='append', choices=list(FEEDS), dest='feeds',
+            help="Sincroniza apenas o feed informado (pode ser repetido)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            resultados = sincronizar_catalogo(feeds=options['feeds'])
+        except (SigaviError, SyncEmAndamento) as exc:
+            raise CommandError(str(exc)) from exc
+
+        for nome, resultado in resultados.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{nome}: {resultado['criados']} criados, {resultado['atualizados']} atualizados, "
+                f"{resultado['inalterados']} inalterados, {resultado['desativados']} desativados"
+            ))
@@ -0,0 +1,79 @@
+from django.db.models import Avg, Count, F, IntegerField, Min
+from django.db.models.functions import Cast, Floor
+from rest_framework import serializers
+
+# Tamanho da célula de agrupamento em pixels de tela (tiles de 256px, como no Google Maps)
+CELULA_PX = 64
+# A partir deste zoom os imóveis são devolvidos individualmente
+ZOOM_PINS = 16
+MAX_PINS = 500
+# Limite de células por lado da área visível, para a resposta não crescer com bbox grandes
+MAX_CELULAS_LADO = 32
+
+
+class MapaSerializer(serializers.Serializer):
+    bbox = serializers.CharField()
+    zoom = serializers.IntegerField(min_value=0, max_value=22, default=12)
+
+    def validate_bbox(self, value):
+        # bbox=oeste,sul,leste,norte (longitude mínima, latitude mínima, longitude máxima, latitude máxima)
+        try:
+            oeste, sul, leste, norte = [float(parte) for parte in value.split(',')]
+        except ValueError:
+            raise serializers.ValidationError("Use bbox=oeste,sul,leste,norte.")
+        if not (-180 <= oeste < leste <= 180 and -90 <= sul < norte <= 90):
+            raise serializers.ValidationError("Coordenadas fora do intervalo ou invertidas.")
+        return oeste, sul, leste, norte
+
+
+def tamanho_celula(zoom, bbox):
+    # Graus cobertos por uma célula no zoom informado
+    oeste, sul, leste, norte = bbox
+    return max(360 / (2 ** zoom) * CELULA_PX / 256, (leste - oeste) / MAX_CELULAS_LADO, (norte - sul) / MAX_CELULAS_LADO)
+
+
+def na_area(queryset, bbox):
+    oeste, sul, leste, norte = bbox
+    return queryset.filter(latitude__range=(sul, norte), longitude__range=(oeste, leste))
+
+
+def agrupar(queryset, zoom, bbox):
+    """Agrupa os imóveis em uma grade; o cálculo da célula e as médias são feitos pelo banco."""
+    celula = tamanho_celula(zoom, bbox)
+    # Índice da célula: floor() antes do CAST, que trunca no SQLite mas arredonda no PostgreSQL
+    linhas = (
+        queryset.order_by()
+        .annotate(
+            cx=Cast(Floor((F('longitude') + 180.0) / celula), IntegerField()),
+            cy=Cast(Floor((F('latitude') + 90.0) / celula), IntegerField()),
+        )
+        .values('cx', 'cy')
+        .annotate(total=Count('id'), latitude=Avg('latitude'), longitude=Avg('longitude'), imovel_id=Min('id'))
+    )
+    return [
+        {
+            'latitude': linha['latitude'],
+            'longitude': linha['longitude'],
+            'total': linha['total'],
+            # Células com um único imóvel já apontam para ele
+            'id': linha['imovel_id'] if linha['total'] == 1 else None,
+        }
+        for linha in linhas
+    ]
+
+
+def pins(queryset):
+    return list(
+        queryset.order_by('-destaque', '-id')
+        .values('id', 'titulo', 'preco', 'tipo_operacao', 'latitude', 'longitude')[:MAX_PINS + 1]
+    )
+
+
+def marcadores(queryset, bbox, zoom):
+    queryset = na_area(queryset, bbox)
+    if zoom >= ZOOM_PINS:
+        resultado = pins(queryset)
+        # Muitos pins mesmo de perto: volta para os clusters para manter a resposta pequena
+        if len(resultado) <= MAX_PINS:
+            return {'zoom': zoom, 'clusters': [], 'pins': resultado}
+    return {'zoom': zoom, 'clusters': agrupar(queryset, zoom, bbox), 'pins': []}
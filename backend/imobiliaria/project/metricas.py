@@ -0,0 +1,197 @@
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger(__name__)
+
+# Instrumentação por requisição: quantas queries e quanto tempo de banco, de serialização e de
+# renderização cada view gastou. Vai no cabeçalho Server-Timing da resposta e é acumulado por rota
+# em histogramas expostos em /metrics (formato texto do Prometheus). A medição fica num ContextVar,
+# que o asgiref leva junto para as threads do sync_to_async, então as views assíncronas também
+# são medidas. Custo: dois perf_counter() por query e por etapa.
+
+# Limites dos baldes do histograma de duração (segundos)
+LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ETAPAS = ('serializacao', 'renderizacao')
+METODOS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+_medicao = ContextVar('medicao', default=None)
+
+
+class Medicao:
+    __slots__ = ('caminho', 'inicio', 'queries', 'banco', 'etapas', 'abertas')
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.inicio = time.perf_counter()
+        self.queries = 0
+        self.banco = 0.0
+        self.etapas = dict.fromkeys(ETAPAS, 0.0)
+        self.abertas = set()
+
+
+@contextmanager
+def medir(etapa):
+    medicao = _medicao.get()
+    # Fora de uma requisição, ou dentro da mesma etapa (serializer aninhado), não mede de novo
+    if medicao is None or etapa in medicao.abertas:
+        yield
+        return
+    medicao.abertas.add(etapa)
+    inicio, banco = time.perf_counter(), medicao.banco
+    try:
+        yield
+    finally:
+        medicao.abertas.discard(etapa)
+        # Sem as queries feitas dentro da etapa (ex.: fotos da listagem), que já contam em "db"
+        medicao.etapas[etapa] += time.perf_counter() - inicio - (medicao.banco - banco)
+
+
+def medir_query(execute, sql, params, many, context):
+    medicao = _medicao.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracao = time.perf_counter() - inicio
+        medicao.queries += 1
+        medicao.banco += duracao
+        config = settings.METRICAS
+        if config['QUERY_LENTA_MS'] and duracao * 1000 >= config['QUERY_LENTA_MS']:
+            if random.random() < config['AMOSTRAGEM_QUERIES_LENTAS']:
+                # Só o SQL com placeholders: os parâmetros podem ter dados pessoais dos leads
+                logger.warning("Query lenta (%.1f ms) em %s: %s", duracao * 1000, medicao.caminho, sql)
+
+
+def instrumentar_conexao(sender, connection, **kwargs):
+    # No início da lista: connection.execute_wrapper() (testes, benchmarks) remove sempre o último
+    if medir_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, medir_query)
+
+
+def _rotulo(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registro:
+    # Totais por (rota, método, status) deste processo; cada worker do gunicorn tem o seu e os
+    # expõe com o rótulo pid, para que o Prometheus não confunda workers diferentes com reinícios
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def registrar(self, rota, metodo, status, medicao, duracao):
+        with self.lock:
+            serie = self.series.get((rota, metodo, status))
+            if serie is None:
+                serie = self.series[(rota, metodo, status)] = {
+                    'baldes': [0] * (len(LIMITES) + 1), 'soma': 0.0, 'total': 0, 'queries': 0, 'banco': 0.0,
+                    **dict.fromkeys(ETAPAS, 0.0),
+                }
+            serie['baldes'][bisect_left(LIMITES, duracao)] += 1
+            serie['soma'] += duracao
+            serie['total'] += 1
+            serie['queries'] += medicao.queries
+            serie['banco'] += medicao.banco
+            for etapa, segundos in medicao.etapas.items():
+                serie[etapa] += segundos
+
+    def limpar(self):
+        with self.lock:
+            self.series.clear()
+
+    def exportar(self):
+        with self.lock:
+            series = {chave: {**serie, 'baldes': list(serie['baldes'])} for chave, serie in self.series.items()}
+        pid = os.getpid()
+        linhas = [
+            '# HELP imobiliaria_http_requisicao_segundos Duração das requisições por rota.',
+            '# TYPE imobiliaria_http_requisicao_segundos histogram',
+        ]
+        rotulos = {
+            chave: f'rota="{_rotulo(chave[0])}",metodo="{chave[1]}",status="{chave[2]}",pid="{pid}"' for chave in series
+        }
+        for chave, serie in series.items():
+            acumulado = 0
+            for limite, quantidade in zip((*LIMITES, '+Inf'), serie['baldes']):
+                acumulado += quantidade
+                linhas.append(f'imobiliaria_http_requisicao_segundos_bucket{{{rotulos[chave]},le="{limite}"}} {acumulado}')
+            linhas.append(f'imobiliaria_http_requisicao_segundos_sum{{{rotulos[chave]}}} {serie["soma"]:.6f}')
+            linhas.append(f'imobiliaria_http_requisicao_segundos_count{{{rotulos[chave]}}} {serie["total"]}')
+        for nome, campo, descricao in [
+            ('queries_total', 'queries', 'Queries executadas pelas requisições.'),
+            ('banco_segundos_total', 'banco', 'Tempo gasto no banco de dados.'),
+            ('serializacao_segundos_total', 'serializacao', 'Tempo gasto nos serializers (sem o banco).'),
+            ('renderizacao_segundos_total', 'renderizacao', 'Tempo gasto renderizando as respostas.'),
+        ]:
+            linhas.append(f'# HELP imobiliaria_http_{nome} {descricao}')
+            linhas.append(f'# TYPE imobiliaria_http_{nome} counter')
+            for chave, serie in series.items():
+                valor = serie[campo] if campo == 'queries' else f'{serie[campo]:.6f}'
+                linhas.append(f'imobiliaria_http_{nome}{{{rotulos[chave]}}} {valor}')
+        return '\n'.join(linhas) + '\n'
+
+
+registro = Registro()
+
+
+def server_timing(medicao, duracao):
+    partes = [f'db;dur={medicao.banco * 1000:.2f};desc="{medicao.queries} queries"']
+    partes += [f'{etapa};dur={segundos * 1000:.2f}' for etapa, segundos in medicao.etapas.items() if segundos]
+    partes.append(f'total;dur={duracao * 1000:.2f}')
+    return ', '.join(partes)
+
+
+class MetricasMiddleware:
+    # Fica no topo do MIDDLEWARE para o total incluir os demais middlewares. Em respostas em
+    # streaming (exportação de leads) o total vai até o início do envio do corpo
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICAS['ATIVO']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicao = Medicao(request.path)
+        token = _medicao.set(medicao)
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        return self.concluir(request, response, medicao)
+
+    async def __acall__(self, request):
+        medicao = Medicao(request.path)
+        token = _medicao.set(medicao)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        return self.concluir(request, response, medicao)
+
+    def concluir(self, request, response, medicao):
+        duracao = time.perf_counter() - medicao.inicio
+        # O padrão da rota (não o caminho) mantém poucas séries: /api/empreendimentos/<int:sigavi_id>/
+        rota = request.resolver_match.route if request.resolver_match else 'desconhecida'
+        metodo = request.method if request.method in METODOS else 'outro'
+        registro.registrar(rota, metodo, response.status_code, medicao, duracao)
+        if settings.METRICAS['SERVER_TIMING']:
+            response['Server-Timing'] = server_timing(medicao, duracao)
+        return response
@@ -0,0 +1,230 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import StaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+from .imagens import PASTA as PASTA_VARIANTES
+
+# Entrega de mídia: os uploads são gravados com o hash do conteúdo no nome (imoveis/casa.3f2a1b9c4d5e.jpg),
+# então a URL muda sempre que o arquivo muda e pode ser guardada pelo navegador/CDN por um ano
+# (Cache-Control immutable). As variantes ficam numa pasta derivada desse nome e herdam a regra.
+# Em produção o nginx serve /media/ direto; a view servir() é o fallback e, com MIDIA['OFFLOAD'],
+# só devolve X-Accel-Redirect/X-Sendfile para o worker não ficar preso enviando imagem.
+
+DIGITOS_HASH = 12
+IMUTAVEL = 365 * 24 * 3600
+TAMANHO_MAXIMO_BASE = 60
+
+_SUFIXO_HASH = re.compile(rf'\.[0-9a-f]{{{DIGITOS_HASH}}}$')
+_COM_HASH = re.compile(rf'\.[0-9a-f]{{{DIGITOS_HASH}}}(?:\.[^/.]+$|/)')
+
+
+def hash_conteudo(conteudo):
+    digest = hashlib.sha256()
+    for bloco in conteudo.chunks():
+        digest.update(bloco)
+    conteudo.seek(0)
+    return digest.hexdigest()[:DIGITOS_HASH]
+
+
+def nome_com_hash(nome, conteudo):
+    pasta, arquivo = posixpath.split(nome)
+    base, extensao = posixpath.splitext(arquivo)
+    # Sem acumular hashes ao regravar um arquivo que já tem um; a base é encurtada aqui para o
+    # get_available_name() não cortar o hash quando o nome passa do max_length do campo
+    base = _SUFIXO_HASH.sub('', base)[:TAMANHO_MAXIMO_BASE]
+    return posixpath.join(pasta, f"{base}.{hash_conteudo(conteudo)}{extensao.lower()}")
+
+
+def com_hash(nome):
+    return bool(_COM_HASH.search(nome))
+
+
+class ArmazenamentoMidia(FileSystemStorage):
+    """Storage padrão: grava os uploads com o hash do conteúdo no nome."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        # Variantes já ficam numa pasta derivada do nome (com hash) da imagem original
+        if not name.startswith(f'{PASTA_VARIANTES}/'):
+            name = nome_com_hash(name, content)
+            if self.exists(name):
+                return name  # mesmo conteúdo: reaproveita o arquivo
+        return super().save(name, content, max_length)
+
+
+def cache_control(nome):
+    if com_hash(nome):
+        return {'public': True, 'max_age': IMUTAVEL, 'immutable': True}
+    # Arquivos antigos, sem hash no nome, podem ser trocados no mesmo caminho
+    return {'public': True, 'max_age': settings.MIDIA['MAX_AGE']}
+
+
+def intervalo(cabecalho, tamanho):
+    """(início, fim) de um cabeçalho Range com um só intervalo de bytes.
+
+    None quando o cabeçalho deve ser ignorado (inválido ou com vários intervalos: a resposta é o
+    arquivo inteiro) e False quando o intervalo não é satisfazível (416).
+    """
+    unidade, _, especificacao = cabecalho.partition('=')
+    if unidade.strip().lower() != 'bytes' or ',' in especificacao:
+        return None
+    inicio, hifen, fim = especificacao.strip().partition('-')
+    if not hifen or not (inicio or fim) or not all(parte.isdigit() for parte in (inicio, fim) if parte):
+        return None
+    if not inicio:
+        # Sufixo: os últimos N bytes
+        if int(fim) == 0 or tamanho == 0:
+            return False
+        return max(tamanho - int(fim), 0), tamanho - 1
+    inicio, fim = int(inicio), int(fim) if fim else None
+    if fim is not None and inicio > fim:
+        return None
+    if inicio >= tamanho:
+        return False
+    return inicio, tamanho - 1 if fim is None else min(fim, tamanho - 1)
+
+
+class Trecho:
+    """Arquivo limitado a `tamanho` bytes a partir de `inicio` (respostas 206).
+
+    Mantém o fileno(): no gunicorn o wsgi.file_wrapper usa sendfile() a partir da posição atual,
+    limitado pelo Content-Length.
+    """
+
+    def __init__(self, arquivo, inicio, tamanho):
+        arquivo.seek(inicio)
+        self.arquivo = arquivo
+        self.restante = tamanho
+
+    def read(self, tamanho=-1):
+        if tamanho < 0 or tamanho > self.restante:
+            tamanho = self.restante
+        dados = self.arquivo.read(tamanho)
+        self.restante -= len(dados)
+        return dados
+
+    def fileno(self):
+        return self.arquivo.fileno()
+
+    def close(self):
+        self.arquivo.close()
+
+
+def _offload(nome, caminho, tipo):
+    config = settings.MIDIA
+    response = HttpResponse(content_type=tipo)
+    if config['OFFLOAD'] == 'x-accel-redirect':
+        # location interna do nginx: location /_midia/ { internal; alias <MEDIA_ROOT>/; }
+        response['X-Accel-Redirect'] = config['PREFIXO_INTERNO'] + quote(nome)
+    else:
+        response['X-Sendfile'] = caminho
+    return response
+
+
+def servir(request, nome):
+    """Resposta de um arquivo de MEDIA_ROOT com ETag, Last-Modified, Range e Cache-Control."""
+    try:
+        caminho = safe_join(settings.MEDIA_ROOT, nome)
+        info = os.stat(caminho)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404
+
+    modificado = int(info.st_mtime)
+    # Mesmo formato do ETag do nginx: a validação continua valendo quando o nginx passa a servir o arquivo
+    etag = f'"{modificado:x}-{info.st_size:x}"'
+    response = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if response is None:
+        tipo = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+        response = _responder(request, nome, caminho, info.st_size, tipo, etag, modificado)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modificado)
+    patch_cache_control(response, **cache_control(nome))
+    return response
+
+
+def _responder(request, nome, caminho, tamanho, tipo, etag, modificado):
+    if settings.MIDIA['OFFLOAD']:
+        # O servidor web cuida de Range e do envio; o worker só devolve os cabeçalhos
+        return _offload(nome, caminho, tipo)
+
+    trecho = None
+    if 'Range' in request.headers:
+        se_intervalo = request.headers.get('If-Range')
+        if not se_intervalo or se_intervalo == etag or parse_http_date_safe(se_intervalo) == modificado:
+            trecho = intervalo(request.headers['Range'], tamanho)
+    if trecho is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{tamanho}'
+        return response
+
+    arquivo = open(caminho, 'rb')
+    if trecho is None:
+        response = FileResponse(arquivo, content_type=tipo)
+    else:
+        inicio, fim = trecho
+        response = FileResponse(Trecho(arquivo, inicio, fim - inicio + 1), status=206, content_type=tipo)
+        response['Content-Length'] = fim - inicio + 1
+        response['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+# Estáticos: o collectstatic grava também uma cópia .gz dos arquivos de texto, servida pelo
+# nginx com gzip_static on (sem comprimir a cada requisição)
+EXTENSOES_COMPRIMIVEIS = {
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.html', '.txt', '.xml', '.ico', '.ttf', '.otf', '.eot', '.wasm',
+}
+TAMANHO_MINIMO_COMPRESSAO = 256
+
+
+def comprimir(caminho):
+    """Grava caminho.gz ao lado do arquivo; retorna se gravou."""
+    if os.path.splitext(caminho)[1].lower() not in EXTENSOES_COMPRIMIVEIS:
+        return False
+    destino = f'{caminho}.gz'
+    if os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(caminho):
+        return False
+    with open(caminho, 'rb') as arquivo:
+        dados = arquivo.read()
+    comprimido = gzip.compress(dados, compresslevel=9, mtime=0)
+    # Arquivos pequenos (ou que quase não encolhem) não compensam a descompressão no cliente
+    if len(dados) < TAMANHO_MINIMO_COMPRESSAO or len(comprimido) >= len(dados) * 0.95:
+        if os.path.exists(destino):
+            os.remove(destino)
+        return False
+    temporario = f'{destino}.tmp'
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(comprimido)
+    os.replace(temporario, destino)
+    return True
+
+
+class ArmazenamentoEstatico(StaticFilesStorage):
+    """Storage do collectstatic: pós-processa os arquivos copiados gerando as versões .gz."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        for nome in paths:
+            if comprimir(self.path(nome)):
+                yield nome, f'{nome}.gz', True
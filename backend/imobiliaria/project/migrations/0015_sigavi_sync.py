@@ -0,0 +1,152 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0014_alter_bannercarrossel_imagem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Corretor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sigavi_id', models.CharField(max_length=50, unique=True)),
+                ('nome', models.CharField(max_length=255)),
+                ('cargo', models.CharField(blank=True, default='', max_length=100)),
+                ('creci', models.CharField(blank=True, default='', max_length=50)),
+                ('email', models.EmailField(blank=True, default='', max_length=254)),
+                ('telefone', models.CharField(blank=True, default='', max_length=30)),
+                ('foto_url', models.URLField(blank=True, default='', max_length=500)),
+                ('ativo', models.BooleanField(default=True)),
+                ('hash_conteudo', models.CharField(blank=True, default='', max_length=64)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Lancamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sigavi_id', models.CharField(max_length=50, unique=True)),
+                ('nome', models.CharField(max_length=255)),
+                ('descricao', models.TextField(blank=True, default='')),
+                ('fase', models.CharField(blank=True, default='', max_length=100)),
+                ('valor', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('dormitorios', models.PositiveIntegerField(default=0)),
+                ('suites', models.PositiveIntegerField(default=0)),
+                ('vagas', models.PositiveIntegerField(default=0)),
+                ('area_total', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('bairro', models.CharField(blank=True, default='', max_length=100)),
+                ('cidade', models.CharField(blank=True, default='', max_length=100)),
+                ('destaque', models.BooleanField(default=False)),
+                ('ativo', models.BooleanField(default=True)),
+                ('dados', models.JSONField(blank=True, default=dict)),
+                ('hash_conteudo', models.CharField(blank=True, default='', max_length=64)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='area_total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='bairro',
+            field=models.CharField(default='', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='banheiros',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='cidade',
+            field=models.CharField(default='', max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='destaque',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='disponivel',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='dormitorios',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='hash_conteudo',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='sigavi_id',
+            field=models.CharField(blank=True, max_length=50, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='tipo',
+            field=models.CharField(choices=[('CASA', 'Casa'), ('APTO', 'Apartamento'), ('TERRENO', 'Terreno'), ('COMERCIAL', 'Comercial')], default='CASA', max_length=10),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='tipo_operacao',
+            field=models.CharField(choices=[('VENDA', 'Venda'), ('LOCACAO', 'Locação')], default='VENDA', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='vagas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='bannercarrossel',
+            name='imagem',
+            field=models.ImageField(upload_to='banners/'),
+        ),
+        migrations.CreateModel(
+            name='ImovelFoto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('foto', models.ImageField(blank=True, upload_to='imoveis/')),
+                ('url_externa', models.URLField(blank=True, default='', max_length=500)),
+                ('ordem', models.PositiveIntegerField(default=0)),
+                ('imovel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fotos', to='project.imovel')),
+            ],
+            options={
+                'ordering': ['ordem'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LancamentoFoto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500)),
+                ('descricao', models.CharField(blank=True, default='', max_length=255)),
+                ('ordem', models.PositiveIntegerField(default=0)),
+                ('lancamento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fotos', to='project.lancamento')),
+            ],
+            options={
+                'ordering': ['ordem'],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0015_sigavi_sync'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['imovel_id', 'data_visita'], name='agendamento_imovel_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['data_visita'], name='agendamento_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bannercarrossel',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['ordem'], name='banner_ativos_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imovel',
+            index=models.Index(condition=models.Q(('disponivel', True)), fields=['destaque', 'id'], name='imovel_disponiveis_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imovel',
+            index=models.Index(fields=['destaque', 'id'], name='imovel_destaque_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imovel',
+            index=models.Index(fields=['tipo_operacao', 'preco'], name='imovel_operacao_preco_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imovel',
+            index=models.Index(fields=['tipo', 'preco'], name='imovel_tipo_preco_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imovel',
+            index=models.Index(fields=['bairro', 'preco'], name='imovel_bairro_preco_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imovel',
+            index=models.Index(fields=['cidade', 'bairro'], name='imovel_cidade_bairro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imovel',
+            index=models.Index(fields=['preco', 'id'], name='imovel_preco_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imovel',
+            index=models.Index(fields=['area_total', 'id'], name='imovel_area_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imovelfoto',
+            index=models.Index(fields=['imovel', 'ordem'], name='imovelfoto_imovel_ordem_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0017_geocodificacao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='imovel',
+            index=models.Index(fields=['latitude', 'longitude'], name='imovel_lat_lng_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def criar_indice(apps, schema_editor):
+    from project.busca import criar_indice_busca
+    criar_indice_busca(schema_editor.connection)
+
+
+def remover_indice(apps, schema_editor):
+    from project.busca import remover_indice_busca
+    remover_indice_busca(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0018_indice_coordenadas'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
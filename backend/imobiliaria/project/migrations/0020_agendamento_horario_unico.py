@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:39
+
+import re
+
+from django.db import migrations, models
+
+
+def normalizar_horarios(apps, schema_editor):
+    # Padroniza hora_visita em HH:MM. Agendamentos repetidos no mesmo horário são reservas reais
+    # e não são apagados: a migração falha listando os ids para que sejam resolvidos à mão
+    Agendamento = apps.get_model('project', 'Agendamento')
+    horarios = {}
+    for agendamento in Agendamento.objects.order_by('id'):
+        correspondencia = re.fullmatch(r'(\d{1,2}):?(\d{2})', agendamento.hora_visita.strip())
+        if correspondencia:
+            hora = f"{int(correspondencia.group(1)):02d}:{correspondencia.group(2)}"
+            if hora != agendamento.hora_visita:
+                agendamento.hora_visita = hora
+                agendamento.save(update_fields=['hora_visita'])
+        chave = (agendamento.imovel_id, agendamento.data_visita, agendamento.hora_visita)
+        horarios.setdefault(chave, []).append(agendamento.id)
+    conflitos = [
+        f"imóvel {imovel_id} em {data_visita} às {hora_visita}: ids {', '.join(map(str, ids))}"
+        for (imovel_id, data_visita, hora_visita), ids in horarios.items() if len(ids) > 1
+    ]
+    if conflitos:
+        raise RuntimeError(
+            'Há agendamentos repetidos no mesmo horário; remarque ou remova os excedentes e rode a '
+            'migração de novo:\n' + '\n'.join(conflitos)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0019_busca_textual'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_horarios, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='agendamento',
+            name='agendamento_imovel_data_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='agendamento',
+            constraint=models.UniqueConstraint(fields=('imovel_id', 'data_visita', 'hora_visita'), name='agendamento_horario_unico'),
+        ),
+    ]
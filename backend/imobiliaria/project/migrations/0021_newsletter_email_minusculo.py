@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Lower, Trim
+
+
+def normalizar_emails(apps, schema_editor):
+    # A inscrição passa a gravar e-mails em minúsculas; remove os duplicados que só diferiam na
+    # caixa (mantém a inscrição mais antiga) e ajusta os demais, tudo em comandos SQL em lote
+    NewsletterSubscriber = apps.get_model('project', 'NewsletterSubscriber')
+    normalizado = Lower(Trim('email'))
+    anteriores = NewsletterSubscriber.objects.annotate(normalizado=normalizado).filter(
+        Q(subscribed_at__lt=OuterRef('subscribed_at'))
+        | Q(subscribed_at=OuterRef('subscribed_at'), id__lt=OuterRef('id')),
+        normalizado=OuterRef('normalizado'),
+    )
+    NewsletterSubscriber.objects.annotate(normalizado=normalizado).filter(Exists(anteriores)).delete()
+    NewsletterSubscriber.objects.exclude(email=normalizado).update(email=normalizado)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0020_agendamento_horario_unico'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0021_newsletter_email_minusculo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['criado_em'], name='agendamento_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='callrequest',
+            index=models.Index(fields=['requested_at'], name='callrequest_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['data_envio'], name='contact_data_envio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newslettersubscriber',
+            index=models.Index(fields=['subscribed_at'], name='newsletter_inscricao_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0022_indices_exportacao_leads'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agendamento',
+            name='email',
+            field=models.EmailField(db_index=True, max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='callrequest',
+            name='email',
+            field=models.EmailField(db_index=True, max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='email',
+            field=models.EmailField(db_index=True, max_length=254),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0023_indices_email_leads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callrequest',
+            name='id_fila',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='id_fila',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
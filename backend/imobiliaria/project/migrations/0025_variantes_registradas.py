@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0024_id_fila_leads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='about',
+            name='variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='bannercarrossel',
+            name='variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='configuracao',
+            name='variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='imovelfoto',
+            name='variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0025_variantes_registradas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='callrequest',
+            index=models.Index(fields=['name'], name='callrequest_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='callrequest',
+            index=models.Index(fields=['phone'], name='callrequest_telefone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['nome'], name='contact_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['telefone'], name='contact_telefone_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project', '0026_indices_busca_leads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TravaSincronizacao',
+            fields=[
+                ('nome', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('dono', models.UUIDField()),
+                ('expira_em', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.conf import settings
 from django.utils.safestring import mark_safe
 from django.core.validators import FileExtensionValidator
 
+from .imagens import menor_variante, srcset
+
 class Imovel(models.Model):
     titulo = models.CharField(max_length=255)
     descricao = models.TextField()
@@ -13,6 +15,7 @@ class Imovel(models.Model):
 
 class Configuracao(models.Model):
     logo = models.ImageField(upload_to='logos/', null=True, blank=True)  # Campo para upload de imagem
+    variantes = models.JSONField(default=dict, blank=True, editable=False)  # Variantes geradas (imagens.py)
 
     def __str__(self):
         return self.get_absolute_logo_url() or "No Logo"  # Retorna o caminho absoluto do logo ou uma mensagem padrão
@@ -25,9 +28,15 @@ class Configuracao(models.Model):
             return f"{settings.MEDIA_URL}{self.logo}"
         return None  # Retorna None se não houver logo
 
+    @property
+    def logo_srcset(self):
+        return srcset(self.logo, self.variantes)
+
     def logo_tag(self):
         if self.logo:
-            return mark_safe(f'<img src="{self.get_absolute_logo_url()}" width="150" height="150" />')
+            # Usa a menor variante em vez de reduzir a imagem original no navegador
+            miniatura = menor_variante(self.logo, self.variantes)
+            return mark_safe(f'<img src="{miniatura}" width="150" height="150" style="object-fit: contain" />')
         return "No Logo Available"  # Retorna uma mensagem padrão se não houver logo
 
 class Pagina(models.Model):
@@ -42,6 +51,11 @@ class NewsletterSubscriber(models.Model):
     email = models.EmailField(unique=True)
     subscribed_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['subscribed_at'], name='newsletter_inscricao_idx'),
+        ]
+
     def clean(self):
         # Validação adicional do email se necessário
         if not self.email:
@@ -52,26 +66,51 @@ class NewsletterSubscriber(models.Model):
     
 class CallRequest(models.Model):
     name = models.CharField(max_length=255)
-    email = models.EmailField()
+    email = models.EmailField(db_index=True)
     phone = models.CharField(max_length=20)
     requested_at = models.DateTimeField(auto_now_add=True)
+    # Identificador do lead na fila de gravação adiada (project/spool.py): o lote regravado após
+    # uma falha não duplica o pedido
+    id_fila = models.UUIDField(unique=True, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['requested_at'], name='callrequest_data_idx'),
+            # Busca do admin (prefixo do nome e telefone exato)
+            models.Index(fields=['name'], name='callrequest_nome_idx'),
+            models.Index(fields=['phone'], name='callrequest_telefone_idx'),
+        ]
 
     def __str__(self):
         return self.name
     
 class About(models.Model):
     foto = models.ImageField(upload_to='about/')  # Campo para upload de foto
+    variantes = models.JSONField(default=dict, blank=True, editable=False)  # Variantes geradas (imagens.py)
     descricao = models.TextField()  # Campo para a descrição
 
+    @property
+    def foto_srcset(self):
+        return srcset(self.foto, self.variantes)
+
     def __str__(self):
         return f"Sobre Nós - {self.id}"
 
 class Contact(models.Model):
     nome = models.CharField(max_length=255)  # Nome do contato
-    email = models.EmailField()  # E-mail do contato
+    email = models.EmailField(db_index=True)  # E-mail do contato
     telefone = models.CharField(max_length=20)  # Telefone do contato
     mensagem = models.TextField()  # Mensagem do contato
     data_envio = models.DateTimeField(auto_now_add=True)  # Data de envio
+    id_fila = models.UUIDField(unique=True, null=True, blank=True, editable=False)  # Ver CallRequest.id_fila
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['data_envio'], name='contact_data_envio_idx'),
+            # Busca do admin (prefixo do nome e telefone exato)
+            models.Index(fields=['nome'], name='contact_nome_idx'),
+            models.Index(fields=['telefone'], name='contact_telefone_idx'),
+        ]
 
     def __str__(self):
         return f"Contato de {self.nome}"
@@ -84,12 +123,22 @@ class Agendamento(models.Model):
     bairro = models.CharField(max_length=100, blank=True, null=True)
     cidade = models.CharField(max_length=100, blank=True, null=True)
     nome = models.CharField(max_length=100)
-    email = models.EmailField()
+    email = models.EmailField(db_index=True)
     telefone = models.CharField(max_length=20)
     data_visita = models.DateField()
     hora_visita = models.CharField(max_length=5)
     criado_em = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # O índice da constraint (imovel_id, data_visita, hora_visita) também atende a consulta de disponibilidade
+        constraints = [
+            models.UniqueConstraint(fields=['imovel_id', 'data_visita', 'hora_visita'], name='agendamento_horario_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['data_visita'], name='agendamento_data_idx'),
+            models.Index(fields=['criado_em'], name='agendamento_criado_idx'),
+        ]
+
     def __str__(self):
         return f"Agendamento para {self.nome} em {self.data_visita.strftime('%d/%m/%Y')} às {self.hora_visita}"
     
@@ -97,12 +146,17 @@ class BannerCarrossel(models.Model):
     titulo = models.CharField(max_length=100, blank=True, null=True)
     descricao = models.TextField(blank=True, null=True)
     imagem = models.ImageField(upload_to='banners/')
+    variantes = models.JSONField(default=dict, blank=True, editable=False)  # Variantes geradas (imagens.py)
     
     @property
     def imagem_url(self):
         if self.imagem and hasattr(self.imagem, 'url'):
             return self.imagem.url
         return None
+
+    @property
+    def imagem_srcset(self):
+        return srcset(self.imagem, self.variantes)
     
     ordem = models.PositiveIntegerField(default=0)
     ativo = models.BooleanField(default=True)
@@ -112,6 +166,9 @@ class BannerCarrossel(models.Model):
         ordering = ['ordem']
         verbose_name = 'Banner do Carrossel'
         verbose_name_plural = 'Banners do Carrossel'
+        indexes = [
+            models.Index(fields=['ordem'], condition=models.Q(ativo=True), name='banner_ativos_ordem_idx'),
+        ]
 
     def __str__(self):
         return self.titulo or f"Banner {self.id}"
@@ -141,20 +198,136 @@ class Imovel(models.Model):
     cidade = models.CharField(max_length=100)
     disponivel = models.BooleanField(default=True)
     data_criacao = models.DateTimeField(auto_now_add=True)
+
+    operacao_choices = [
+        ('VENDA', 'Venda'),
+        ('LOCACAO', 'Locação'),
+    ]
+
+    tipo_operacao = models.CharField(max_length=10, choices=operacao_choices, default='VENDA')
+    destaque = models.BooleanField(default=False)
+    logradouro = models.CharField(max_length=255, blank=True, default='')
+    numero = models.CharField(max_length=20, blank=True, default='')
+    uf = models.CharField(max_length=2, blank=True, default='')
+    # Coordenadas persistidas (vindas do Sigavi ou do comando geocodificar_imoveis)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Campos preenchidos pela sincronização com o Sigavi (vazios para imóveis cadastrados localmente)
+    sigavi_id = models.CharField(max_length=50, unique=True, null=True, blank=True)
+    hash_conteudo = models.CharField(max_length=64, blank=True, default='')
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Índices alinhados aos filtros e ordenações de /api/imoveis/ e /api/imoveis/facets/.
+        # No SQLite o Django gera "WHERE disponivel" para filtros booleanos, que só casa com índice parcial.
+        indexes = [
+            models.Index(fields=['destaque', 'id'], condition=models.Q(disponivel=True), name='imovel_disponiveis_idx'),
+            models.Index(fields=['destaque', 'id'], name='imovel_destaque_idx'),
+            models.Index(fields=['tipo_operacao', 'preco'], name='imovel_operacao_preco_idx'),
+            models.Index(fields=['tipo', 'preco'], name='imovel_tipo_preco_idx'),
+            models.Index(fields=['bairro', 'preco'], name='imovel_bairro_preco_idx'),
+            models.Index(fields=['cidade', 'bairro'], name='imovel_cidade_bairro_idx'),
+            models.Index(fields=['preco', 'id'], name='imovel_preco_idx'),
+            models.Index(fields=['area_total', 'id'], name='imovel_area_idx'),
+            models.Index(fields=['latitude', 'longitude'], name='imovel_lat_lng_idx'),
+        ]
     
     def __str__(self):
         return self.titulo
 
 class ImovelFoto(models.Model):
     imovel = models.ForeignKey(Imovel, related_name='fotos', on_delete=models.CASCADE)
-    foto = models.ImageField(upload_to='imoveis/')
+    foto = models.ImageField(upload_to='imoveis/', blank=True)
+    url_externa = models.URLField(max_length=500, blank=True, default='')  # Fotos hospedadas no Sigavi
+    variantes = models.JSONField(default=dict, blank=True, editable=False)  # Variantes geradas (imagens.py)
     ordem = models.PositiveIntegerField(default=0)
     
     class Meta:
         ordering = ['ordem']
+        indexes = [
+            models.Index(fields=['imovel', 'ordem'], name='imovelfoto_imovel_ordem_idx'),
+        ]
     
     @property
     def foto_url(self):
         if self.foto and hasattr(self.foto, 'url'):
             return self.foto.url
-        return None
\ No newline at end of file
+        return self.url_externa or None
+
+    @property
+    def srcset(self):
+        # Fotos externas (Sigavi) não têm variantes locais
+        return srcset(self.foto, self.variantes)
+
+class Lancamento(models.Model):
+    # Empreendimentos (lançamentos) sincronizados do Sigavi
+    sigavi_id = models.CharField(max_length=50, unique=True)
+    nome = models.CharField(max_length=255)
+    descricao = models.TextField(blank=True, default='')
+    fase = models.CharField(max_length=100, blank=True, default='')
+    valor = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    dormitorios = models.PositiveIntegerField(default=0)
+    suites = models.PositiveIntegerField(default=0)
+    vagas = models.PositiveIntegerField(default=0)
+    area_total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    bairro = models.CharField(max_length=100, blank=True, default='')
+    cidade = models.CharField(max_length=100, blank=True, default='')
+    logradouro = models.CharField(max_length=255, blank=True, default='')
+    numero = models.CharField(max_length=20, blank=True, default='')
+    uf = models.CharField(max_length=2, blank=True, default='')
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    destaque = models.BooleanField(default=False)
+    ativo = models.BooleanField(default=True)
+    dados = models.JSONField(default=dict, blank=True)  # Payload original do Sigavi
+    hash_conteudo = models.CharField(max_length=64, blank=True, default='')
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.nome
+
+class LancamentoFoto(models.Model):
+    lancamento = models.ForeignKey(Lancamento, related_name='fotos', on_delete=models.CASCADE)
+    url = models.URLField(max_length=500)
+    descricao = models.CharField(max_length=255, blank=True, default='')
+    ordem = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['ordem']
+
+class Corretor(models.Model):
+    # Corretores autônomos sincronizados do Sigavi
+    sigavi_id = models.CharField(max_length=50, unique=True)
+    nome = models.CharField(max_length=255)
+    cargo = models.CharField(max_length=100, blank=True, default='')
+    creci = models.CharField(max_length=50, blank=True, default='')
+    email = models.EmailField(blank=True, default='')
+    telefone = models.CharField(max_length=30, blank=True, default='')
+    foto_url = models.URLField(max_length=500, blank=True, default='')
+    ativo = models.BooleanField(default=True)
+    hash_conteudo = models.CharField(max_length=64, blank=True, default='')
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.nome
+
+class GeocodeCache(models.Model):
+    # Cache persistente endereço -> coordenadas; latitude/longitude nulas indicam endereço não encontrado
+    endereco = models.CharField(max_length=500, unique=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    provedor = models.CharField(max_length=50, blank=True, default='')
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.endereco
+
+class TravaSincronizacao(models.Model):
+    # Trava compartilhada entre processos (cron, comando manual, admin): a linha existe enquanto
+    # uma sincronização roda; expira_em libera a trava de um processo que morreu no meio
+    nome = models.CharField(max_length=100, primary_key=True)
+    dono = models.UUIDField()
+    expira_em = models.DateTimeField()
+
+    def __str__(self):
+        return self.nome
@@ -0,0 +1,177 @@
+import logging
+import re
+import sys
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.models.query import QuerySet
+from django.test.runner import DiscoverRunner
+from rest_framework.fields import Field
+
+logger = logging.getLogger(__name__)
+
+# Detecção de N+1: durante uma requisição (ou um bloco de teste), cada SQL é reduzido a uma
+# "impressão digital" (sem literais e com as listas do IN colapsadas). Quando a mesma consulta se
+# repete LIMITE vezes e vem do acesso a uma relação (querysets de relação carregam a instância de
+# origem nos hints), o model/campo, o campo do serializer e a pilha do código do projeto entram no
+# relatório. Em desenvolvimento o relatório vai para o log; nos testes (TestRunner) vira exceção.
+
+_LISTA_IN = re.compile(r'IN \((?:%s|\?)(?:, ?(?:%s|\?))*\)')
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_PROJETO = str(Path(settings.BASE_DIR).resolve())
+
+_deteccao = ContextVar('n_mais_um', default=None)
+
+
+class NMaisUmDetectado(Exception):
+    pass
+
+
+def impressao_digital(sql):
+    return _LITERAIS.sub('?', _LISTA_IN.sub('IN (...)', sql))
+
+
+def _relacao(queryset):
+    instancia = queryset._hints.get('instance')
+    if instancia is None:
+        return None
+    for campo in type(instancia)._meta.get_fields():
+        if campo.is_relation and campo.related_model is queryset.model:
+            nome = campo.name if campo.concrete else campo.get_accessor_name()
+            return f"{type(instancia).__name__}.{nome}"
+    return f"{type(instancia).__name__} -> {queryset.model.__name__}"
+
+
+def origem():
+    """(relação, campo do serializer, pilha do projeto) da consulta em execução, ou None."""
+    queryset = campo = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        objeto = frame.f_locals.get('self')
+        # O queryset mais interno é o que está executando a consulta
+        if queryset is None and isinstance(objeto, QuerySet):
+            queryset = objeto
+        elif campo is None and isinstance(objeto, Field) and objeto.field_name and objeto.parent is not None:
+            campo = f"{type(objeto.parent).__name__}.{objeto.field_name}"
+        frame = frame.f_back
+    relacao = _relacao(queryset) if queryset is not None else None
+    if relacao is None:
+        return None
+    pilha = [
+        quadro for quadro in traceback.extract_stack()
+        if quadro.filename.startswith(_PROJETO) and quadro.filename != __file__
+    ]
+    return relacao, campo, ''.join(traceback.format_list(pilha))
+
+
+class Deteccao:
+    def __init__(self, limite):
+        self.limite = limite
+        self.contagem = Counter()
+        self.problemas = {}
+
+    def registrar(self, sql):
+        impressao = impressao_digital(sql)
+        self.contagem[impressao] += 1
+        # A pilha só é examinada uma vez por consulta repetida
+        if self.contagem[impressao] == self.limite:
+            encontrada = origem()
+            if encontrada:
+                self.problemas[impressao] = encontrada
+
+    def relatorio(self):
+        partes = []
+        for impressao, (relacao, campo, pilha) in self.problemas.items():
+            no_serializer = f" (campo {campo})" if campo else ''
+            partes.append(
+                f"N+1 em {relacao}{no_serializer}: {self.contagem[impressao]} consultas iguais\n"
+                f"  {impressao}\n{pilha}"
+            )
+        return '\n'.join(partes)
+
+
+def registrar_query(execute, sql, params, many, context):
+    deteccao = _deteccao.get()
+    if deteccao is not None:
+        deteccao.registrar(sql)
+    return execute(sql, params, many, context)
+
+
+def instrumentar_conexao(sender, connection, **kwargs):
+    # No início da lista: connection.execute_wrapper() (testes, benchmarks) remove sempre o último
+    if registrar_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, registrar_query)
+
+
+@contextmanager
+def detectar(limite=None):
+    """Registra as consultas do bloco; depois dele, a Deteccao devolvida tem os problemas encontrados."""
+    deteccao = Deteccao(limite or settings.N_MAIS_UM['LIMITE'])
+    token = _deteccao.set(deteccao)
+    try:
+        yield deteccao
+    finally:
+        _deteccao.reset(token)
+
+
+class NMaisUmMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.N_MAIS_UM['ATIVO']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Dentro de um assertSemNMaisUm quem avalia é o teste
+        if _deteccao.get() is not None:
+            return self.get_response(request)
+        with detectar() as deteccao:
+            response = self.get_response(request)
+        self.avaliar(request, deteccao)
+        return response
+
+    async def __acall__(self, request):
+        if _deteccao.get() is not None:
+            return await self.get_response(request)
+        with detectar() as deteccao:
+            response = await self.get_response(request)
+        self.avaliar(request, deteccao)
+        return response
+
+    def avaliar(self, request, deteccao):
+        if not deteccao.problemas:
+            return
+        mensagem = f"{request.method} {request.path}\n{deteccao.relatorio()}"
+        if settings.N_MAIS_UM['LEVANTAR']:
+            raise NMaisUmDetectado(mensagem)
+        logger.warning(mensagem)
+
+
+class SemNMaisUmMixin:
+    """Mixin de TestCase: `with self.assertSemNMaisUm(): self.client.get(...)`."""
+
+    @contextmanager
+    def assertSemNMaisUm(self, limite=None):
+        with detectar(limite) as deteccao:
+            yield deteccao
+        if deteccao.problemas:
+            self.fail(deteccao.relatorio())
+
+
+class TestRunner(DiscoverRunner):
+    # Na suíte de testes toda requisição com N+1 levanta NMaisUmDetectado
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.N_MAIS_UM = {**settings.N_MAIS_UM, 'ATIVO': True, 'LEVANTAR': True}
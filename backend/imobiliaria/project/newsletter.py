@@ -0,0 +1,73 @@
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from .models import NewsletterSubscriber
+
+BATCH_SIZE = 5000
+
+
+def normalizar_email(email):
+    # E-mails são guardados sempre em minúsculas, então a constraint unique também vale sem diferenciar caixa
+    return str(email or '').strip().lower()
+
+
+def inscrever(email):
+    """Inscreve o e-mail com um único INSERT; retorna (inscrito, criado)."""
+    try:
+        # atomic: a violação de unicidade não pode quebrar uma transação externa
+        with transaction.atomic():
+            return NewsletterSubscriber.objects.create(email=email), True
+    except IntegrityError:
+        return NewsletterSubscriber(email=email), False
+
+
+def _emails_validos(linhas, invalidos):
+    for linha in linhas:
+        email = normalizar_email(linha[0] if linha else '')
+        try:
+            validate_email(email)
+        except ValidationError:
+            invalidos.append(email)
+            continue
+        yield email
+
+
+def importar(arquivo, lote=BATCH_SIZE):
+    """Importa um CSV (primeira coluna = e-mail, cabeçalho opcional) em lotes, sem carregar o arquivo todo."""
+    leitor = csv.reader(arquivo)
+    invalidos = []
+    antes = NewsletterSubscriber.objects.count()
+    pendentes = set()
+    lidos = 0
+
+    def gravar():
+        NewsletterSubscriber.objects.bulk_create(
+            [NewsletterSubscriber(email=email) for email in pendentes], batch_size=lote, ignore_conflicts=True
+        )
+        pendentes.clear()
+
+    for email in _emails_validos(leitor, invalidos):
+        lidos += 1
+        pendentes.add(email)
+        if len(pendentes) >= lote:
+            gravar()
+    if pendentes:
+        gravar()
+
+    # A linha de cabeçalho ("email") conta como inválida, não como erro do arquivo
+    invalidos = [email for email in invalidos if email != 'email']
+    return {'validos': lidos, 'invalidos': len(invalidos), 'novos': NewsletterSubscriber.objects.count() - antes}
+
+
+def exportar(arquivo, lote=BATCH_SIZE):
+    escritor = csv.writer(arquivo)
+    escritor.writerow(['email', 'subscribed_at'])
+    total = 0
+    linhas = NewsletterSubscriber.objects.order_by('id').values_list('email', 'subscribed_at')
+    for email, inscrito_em in linhas.iterator(chunk_size=lote):
+        escritor.writerow([email, inscrito_em.isoformat()])
+        total += 1
+    return total
@@ -0,0 +1,107 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FloatField, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Paginação por cursor (keyset) sobre várias colunas.
+
+    O cursor guarda os valores da ordenação do último item da página, então a
+    página N é buscada com um WHERE sobre o índice em vez de OFFSET.
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = 20
+    max_limit = 100
+
+    def __init__(self, ordering):
+        # ordering: lista como ['-destaque', '-id']; o último campo precisa ser único
+        self.ordering = ordering
+        self.next_cursor = None
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, self.default_limit))
+        except (TypeError, ValueError):
+            raise ValidationError({self.limit_query_param: "Informe um número inteiro."})
+        return max(1, min(limit, self.max_limit))
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (ValueError, UnicodeDecodeError):
+            raise ValidationError({self.cursor_query_param: "Cursor inválido."})
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValidationError({self.cursor_query_param: "Cursor inválido."})
+        return values
+
+    def encode_cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+    def after(self, model, values):
+        # (a, b, c) > (x, y, z) expandido em OR de ANDs, respeitando a direção de cada coluna
+        condition = Q()
+        parsed = [self.to_python(model, term.lstrip('-'), value) for term, value in zip(self.ordering, values)]
+        for position, term in enumerate(self.ordering):
+            name = term.lstrip('-')
+            lookup = f"{name}__lt" if term.startswith('-') else f"{name}__gt"
+            step = Q(**{lookup: parsed[position]})
+            for previous, term_previous in enumerate(self.ordering[:position]):
+                step &= Q(**{term_previous.lstrip('-'): parsed[previous]})
+            condition |= step
+        return condition
+
+    def to_python(self, model, name, value):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = FloatField()  # anotações numéricas, como a relevância da busca
+        try:
+            return field.to_python(value)
+        except Exception:
+            raise ValidationError({self.cursor_query_param: "Cursor inválido."})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.close_page(list(self.page_query(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # Mesma paginação para views assíncronas, lendo a página com o ORM assíncrono
+        return self.close_page([item async for item in self.page_query(queryset, request)])
+
+    def page_query(self, queryset, request):
+        self.request = request
+        self.limit = self.get_limit(request)
+        values = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.ordering)
+        if values is not None:
+            queryset = queryset.filter(self.after(queryset.model, values))
+        return queryset[:self.limit + 1]
+
+    def close_page(self, page):
+        if len(page) > self.limit:
+            page = page[:self.limit]
+            last = page[-1]
+            self.next_cursor = self.encode_cursor([self.get_value(last, term.lstrip('-')) for term in self.ordering])
+        return page
+
+    def get_value(self, item, name):
+        # Aceita tanto instâncias quanto dicts vindos de values()
+        return item[name] if isinstance(item, dict) else getattr(item, name)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
@@ -0,0 +1,24 @@
+from decimal import Decimal
+
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+from .metricas import medir
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    # Decimal (preco, area_total, valor) sai como string exata, igual ao DecimalField com
+    # COERCE_DECIMAL_TO_STRING: os serializers devolvem o Decimal e a formatação acontece só aqui
+    def default(self, obj):
+        if type(obj) is Decimal:
+            return format(obj, 'f')
+        return super().default(obj)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    encoder_class = JSONEncoder
+
+    # Tempo de renderização entra no Server-Timing (project/metricas.py)
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with medir('renderizacao'):
+            return super().render(data, accepted_media_type, renderer_context)
@@ -1,40 +1,102 @@
 from rest_framework import serializers
-from .models import Configuracao, NewsletterSubscriber, Imovel, CallRequest, About, Contact, Agendamento, BannerCarrossel, ImovelFoto
+from django.utils import timezone
+from .agenda import dia_atende, horarios, normalizar_hora
+from .campos import Selecao
+from .filters import ORDENACOES
+from .imagens import srcset
+from .metricas import medir
+from .newsletter import normalizar_email
+from .models import Configuracao, NewsletterSubscriber, Imovel, CallRequest, About, Contact, Agendamento, BannerCarrossel, ImovelFoto, Lancamento, LancamentoFoto, Corretor
 
-class NewsletterSubscriberSerializer(serializers.ModelSerializer):
+class SerializacaoMedida:
+    # Tempo de .data entra no Server-Timing (project/metricas.py)
+    @property
+    def data(self):
+        with medir('serializacao'):
+            return super().data
+
+class ListSerializer(SerializacaoMedida, serializers.ListSerializer):
+    pass
+
+class ModelSerializer(SerializacaoMedida, serializers.ModelSerializer):
+    # Perfis aceitos em ?perfil= (project/campos.py); None = os campos padrão
+    perfis = {'full': None}
+    # Campos que só saem quando pedidos em ?fields= ou num perfil
+    campos_opcionais = []
+
+    def __init__(self, *args, selecao=None, **kwargs):
+        self.selecao = selecao
+        super().__init__(*args, **kwargs)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # many=True também é medido
+        if not hasattr(cls.Meta, 'list_serializer_class'):
+            cls.Meta.list_serializer_class = ListSerializer
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selecao = self.selecao_pedida()
+        padrao = [nome for nome in fields if nome not in self.campos_opcionais]
+        if selecao is None:
+            return {nome: fields[nome] for nome in padrao}
+        aninhados = [nome for nome, campo in fields.items() if isinstance(getattr(campo, 'child', campo), ModelSerializer)]
+        mantidos = {}
+        for nome in selecao.campos(padrao, list(fields), aninhados):
+            campo = mantidos[nome] = fields[nome]
+            if nome in aninhados:
+                getattr(campo, 'child', campo).selecao = selecao.aninhada(nome)
+        return mantidos
+
+    def selecao_pedida(self):
+        if self.selecao is not None or hasattr(self, 'initial_data'):
+            return self.selecao
+        # Só o serializer da resposta (ou o filho do many=True) lê ?fields=/?omit=/?perfil= da requisição
+        pai = self.parent
+        if pai is not None and not (isinstance(pai, serializers.ListSerializer) and pai.parent is None):
+            return None
+        request = self.context.get('request')
+        return Selecao.da_requisicao(request.query_params, self.perfis) if request is not None else None
+
+class NewsletterSubscriberSerializer(ModelSerializer):
     class Meta:
         model = NewsletterSubscriber
         fields = ['email', 'subscribed_at']
+        # Sem o UniqueValidator (um SELECT a mais e sujeito a corrida): a unicidade fica com o INSERT
+        extra_kwargs = {'email': {'validators': []}}
 
-class ImovelSerializer(serializers.ModelSerializer):
+    def validate_email(self, value):
+        return normalizar_email(value)
+
+class ImovelSerializer(ModelSerializer):
     class Meta:
         model = Imovel
         fields = '__all__'
         # Inclui os campos adicionais automaticamente
 
-class ConfiguracaoSerializer(serializers.ModelSerializer):
+class ConfiguracaoSerializer(ModelSerializer):
     logo = serializers.ImageField()  # Retorna a URL da imagem
 
     class Meta:
         model = Configuracao
         fields = ['logo']  # Inclui apenas o campo de imagem
 
-class CallRequestSerializer(serializers.ModelSerializer):
+class CallRequestSerializer(ModelSerializer):
     class Meta:
         model = CallRequest
         fields = ['name', 'email', 'phone', 'requested_at']
 
-class AboutSerializer(serializers.ModelSerializer):
+class AboutSerializer(ModelSerializer):
     class Meta:
         model = About
-        fields = ['foto', 'descricao']
+        fields = ['foto', 'foto_srcset', 'descricao']
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(ModelSerializer):
     class Meta:
         model = Contact
         fields = ['nome', 'email', 'telefone', 'mensagem']
 
-class AgendamentoSerializer(serializers.ModelSerializer):
+class AgendamentoSerializer(ModelSerializer):
     class Meta:
         model = Agendamento
         fields = [
@@ -54,33 +116,202 @@ class AgendamentoSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'titulo': {'required': False, 'allow_null': True},
         }
+        # Horário repetido é barrado pela constraint do banco (sem corrida); a view responde 409
+        validators = []
+
+    def validate_hora_visita(self, value):
+        hora = normalizar_hora(value)
+        if hora not in horarios():
+            raise serializers.ValidationError("Horário fora da agenda de visitas.")
+        return hora
 
-class BannerCarrosselSerializer(serializers.ModelSerializer):
+    def validate_data_visita(self, value):
+        if value < timezone.localdate():
+            raise serializers.ValidationError("A data da visita já passou.")
+        if not dia_atende(value):
+            raise serializers.ValidationError("Não há visitas neste dia da semana.")
+        return value
+
+class BannerCarrosselSerializer(ModelSerializer):
     imagem_url = serializers.SerializerMethodField()
 
     class Meta:
         model = BannerCarrossel
-        fields = ['id', 'titulo', 'descricao', 'imagem_url', 'ordem', 'ativo']
+        fields = ['id', 'titulo', 'descricao', 'imagem_url', 'imagem_srcset', 'ordem', 'ativo']
 
     def get_imagem_url(self, obj):
         return obj.imagem_url
     
-class ImovelFotoSerializer(serializers.ModelSerializer):
+class ImovelFotoSerializer(ModelSerializer):
     class Meta:
         model = ImovelFoto
-        fields = ['foto_url', 'ordem']
+        fields = ['foto_url', 'srcset', 'ordem']
+
+# Perfis de ?perfil= dos imóveis: os cards da listagem só precisam da capa
+PERFIS_IMOVEL = {
+    'card': 'id,titulo,preco,bairro,capa',
+    'full': None,
+}
 
-class ImovelSerializer(serializers.ModelSerializer):
+class ImovelSerializer(ModelSerializer):
     fotos = ImovelFotoSerializer(many=True, read_only=True)
     status = serializers.SerializerMethodField()
+    capa = serializers.SerializerMethodField()
+    perfis = PERFIS_IMOVEL
+    campos_opcionais = ['capa']
     
     class Meta:
         model = Imovel
         fields = [
             'id', 'titulo', 'descricao', 'preco', 'tipo',
             'dormitorios', 'banheiros', 'vagas', 'area_total',
-            'bairro', 'cidade', 'disponivel', 'fotos', 'status'
+            'bairro', 'cidade', 'latitude', 'longitude', 'disponivel', 'fotos', 'status', 'capa'
         ]
     
+    @staticmethod
+    def preparar_queryset(queryset):
+        # Evita uma query de fotos por imóvel ao serializar listas
+        return queryset.prefetch_related('fotos')
+
     def get_status(self, obj):
-        return "Disponível" if obj.disponivel else "Indisponível"
\ No newline at end of file
+        return "Disponível" if obj.disponivel else "Indisponível"
+
+    def get_capa(self, obj):
+        # Primeira foto, das fotos já carregadas pelo preparar_queryset
+        foto = next(iter(obj.fotos.all()), None)
+        return {'foto_url': foto.foto_url, 'srcset': foto.srcset} if foto else None
+
+class LancamentoFotoSerializer(ModelSerializer):
+    class Meta:
+        model = LancamentoFoto
+        fields = ['url', 'descricao', 'ordem']
+
+class LancamentoSerializer(ModelSerializer):
+    fotos = LancamentoFotoSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Lancamento
+        fields = [
+            'sigavi_id', 'nome', 'fase', 'valor', 'dormitorios', 'suites', 'vagas', 'area_total',
+            'bairro', 'cidade', 'destaque', 'fotos',
+        ]
+
+class CorretorSerializer(ModelSerializer):
+    class Meta:
+        model = Corretor
+        fields = ['sigavi_id', 'nome', 'cargo', 'creci', 'email', 'telefone', 'foto_url']
+
+class ImovelListSerializer:
+    # Serialização somente leitura da listagem a partir de dicts de values().
+    # Gera o mesmo JSON do ImovelSerializer, mas com uma única query para todas as fotos
+    # e sem instanciar models nem campos do DRF por linha.
+    campos = [
+        'id', 'titulo', 'descricao', 'preco', 'tipo',
+        'dormitorios', 'banheiros', 'vagas', 'area_total',
+        'bairro', 'cidade', 'latitude', 'longitude', 'disponivel',
+    ]
+    # 'destaque' não sai no JSON, mas é usado pela ordenação/cursor da listagem
+    campos_consulta = campos + ['destaque']
+    # Mesma seleção de campos do ImovelSerializer (?fields=, ?omit=, ?perfil=)
+    perfis = PERFIS_IMOVEL
+    campos_padrao = campos + ['fotos', 'status']
+    campos_disponiveis = campos_padrao + ['capa']
+    campos_foto = ['foto_url', 'srcset', 'ordem']
+    # Colunas lidas mesmo fora da seleção: a chave do cursor de todas as ordenações
+    colunas_fixas = {termo.lstrip('-') for ordenacao in ORDENACOES.values() for termo in ordenacao}
+
+    def __init__(self, rows, selecao=None):
+        self.rows = rows
+        self.mantidos, self.campos_foto_mantidos = self.resolver(selecao)
+
+    @classmethod
+    def resolver(cls, selecao):
+        """(campos do imóvel, campos de cada foto) mantidos pela seleção."""
+        if selecao is None:
+            return cls.campos_padrao, cls.campos_foto
+        mantidos = selecao.campos(cls.campos_padrao, cls.campos_disponiveis, aninhados=['fotos'])
+        fotos = selecao.aninhada('fotos')
+        return mantidos, fotos.campos(cls.campos_foto, cls.campos_foto) if fotos else cls.campos_foto
+
+    @classmethod
+    def queryset(cls, queryset, selecao=None):
+        # Anotações (ex.: relevância da busca) também entram, pois podem ser chave do cursor.
+        # Colunas fora da seleção (ex.: a descrição nos cards) nem são lidas
+        mantidos = set(cls.resolver(selecao)[0])
+        if 'status' in mantidos:
+            mantidos.add('disponivel')
+        colunas = [campo for campo in cls.campos_consulta if campo in mantidos or campo in cls.colunas_fixas]
+        return queryset.values(*colunas, *queryset.query.annotations)
+
+    @staticmethod
+    def consulta_fotos(ids):
+        return ImovelFoto.objects.filter(imovel_id__in=ids).order_by('ordem').values(
+            'imovel_id', 'foto', 'url_externa', 'variantes', 'ordem'
+        )
+
+    @staticmethod
+    def agrupar_fotos(linhas, campos=('foto_url', 'srcset', 'ordem')):
+        campo = ImovelFoto._meta.get_field('foto')
+        fotos = {}
+        for foto in linhas:
+            arquivo = campo.attr_class(None, campo, foto['foto'])
+            item = {}
+            if 'foto_url' in campos:
+                item['foto_url'] = arquivo.url if arquivo else (foto['url_externa'] or None)
+            if 'srcset' in campos:
+                item['srcset'] = srcset(arquivo, foto['variantes'])
+            if 'ordem' in campos:
+                item['ordem'] = foto['ordem']
+            fotos.setdefault(foto['imovel_id'], []).append(item)
+        return fotos
+
+    @classmethod
+    def fotos_por_imovel(cls, ids, campos=('foto_url', 'srcset', 'ordem')):
+        return cls.agrupar_fotos(cls.consulta_fotos(ids), campos)
+
+    def campos_das_fotos(self):
+        """Campos calculados por foto (a capa usa foto_url e srcset); vazio se nenhum é pedido."""
+        campos = set(self.campos_foto_mantidos) if 'fotos' in self.mantidos else set()
+        if 'capa' in self.mantidos:
+            campos |= {'foto_url', 'srcset'}
+        return campos
+
+    @property
+    def data(self):
+        if not self.rows:
+            return []
+        with medir('serializacao'):
+            campos = self.campos_das_fotos()
+            fotos = self.fotos_por_imovel([row['id'] for row in self.rows], campos) if campos else {}
+            return self.montar(fotos)
+
+    async def adata(self):
+        # Para views assíncronas: a query das fotos usa o ORM assíncrono
+        if not self.rows:
+            return []
+        with medir('serializacao'):
+            campos = self.campos_das_fotos()
+            if not campos:
+                return self.montar({})
+            linhas = [foto async for foto in self.consulta_fotos([row['id'] for row in self.rows])]
+            return self.montar(self.agrupar_fotos(linhas, campos))
+
+    def montar(self, fotos):
+        # preco e area_total seguem como Decimal: o JSONRenderer (project/renderers.py) os escreve
+        simples = [campo for campo in self.mantidos if campo in self.campos]
+        com_fotos, com_status, com_capa = ('fotos' in self.mantidos), ('status' in self.mantidos), ('capa' in self.mantidos)
+        projetar = com_fotos and com_capa and len(self.campos_foto_mantidos) < len(self.campos_foto)
+
+        data = []
+        for row in self.rows:
+            item = {campo: row[campo] for campo in simples}
+            lista = fotos.get(row['id'], [])
+            if com_fotos:
+                # Com a capa, as fotos podem ter campos a mais, calculados só para ela
+                item['fotos'] = [{campo: foto[campo] for campo in self.campos_foto_mantidos} for foto in lista] if projetar else lista
+            if com_status:
+                item['status'] = "Disponível" if row['disponivel'] else "Indisponível"
+            if com_capa:
+                item['capa'] = {'foto_url': lista[0]['foto_url'], 'srcset': lista[0]['srcset']} if lista else None
+            data.append(item)
+        return data
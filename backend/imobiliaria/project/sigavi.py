@@ -0,0 +1,371 @@
+import http.client
+import json
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+
+TOKEN_ENDPOINT = '/Sigavi/api/Acesso/Token'
+BUSCA_IMOVEIS = '/Sigavi/Api/Site/Busca'
+BUSCA_EMPREENDIMENTO = '/Sigavi/Api/Site/BuscaEmpreendimento'
+BUSCA_CORRETORES = '/TH/Api/Autonomo/Busca'
+FICHA_EMPREENDIMENTO = '/Sigavi/Api/Site/GetFichaTecnicaEmpreendimento/{id}'
+
+
+class SigaviError(Exception):
+    def __init__(self, mensagem, status=None):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class ConexaoPool:
+    """Conexões HTTP keep-alive reaproveitadas entre requisições, por host."""
+    # Erros de uma conexão ociosa que o servidor já fechou; a requisição é repetida numa conexão nova
+    ERROS_CONEXAO_FECHADA = (http.client.RemoteDisconnected, http.client.CannotSendRequest, ConnectionResetError, BrokenPipeError)
+
+    def __init__(self, maximo=10):
+        self.maximo = maximo
+        self.lock = threading.Lock()
+        self.livres = {}
+
+    def _obter(self, scheme, netloc, timeout):
+        with self.lock:
+            livres = self.livres.get((scheme, netloc))
+            if livres:
+                conexao = livres.pop()
+                conexao.timeout = timeout
+                if conexao.sock is not None:
+                    conexao.sock.settimeout(timeout)
+                return conexao, True
+        classe = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return classe(netloc, timeout=timeout), False
+
+    def _devolver(self, scheme, netloc, conexao):
+        with self.lock:
+            livres = self.livres.setdefault((scheme, netloc), [])
+            if len(livres) < self.maximo:
+                livres.append(conexao)
+                return
+        conexao.close()
+
+    def request(self, method, url, body=None, headers=None, timeout=30):
+        partes = urllib.parse.urlsplit(url)
+        caminho = partes.path + (f"?{partes.query}" if partes.query else '')
+        while True:
+            conexao, reutilizada = self._obter(partes.scheme, partes.netloc, timeout)
+            try:
+                conexao.request(method, caminho, body=body, headers=headers or {})
+                resposta = conexao.getresponse()
+                corpo = resposta.read()
+            except self.ERROS_CONEXAO_FECHADA:
+                conexao.close()
+                if reutilizada:
+                    continue
+                raise
+            except BaseException:
+                conexao.close()
+                raise
+            if resposta.will_close:
+                conexao.close()
+            else:
+                self._devolver(partes.scheme, partes.netloc, conexao)
+            return resposta.status, corpo
+
+    def fechar(self):
+        with self.lock:
+            livres, self.livres = self.livres, {}
+        for conexoes in livres.values():
+            for conexao in conexoes:
+                conexao.close()
+
+
+class TokenBroker:
+    """Guarda o access_token até perto de expirar; só uma thread renova por vez (single-flight)."""
+    margem = 60  # segundos de folga antes do expires_in (no máximo metade da validade)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.token = None
+        self.expira_em = 0.0
+
+    def obter(self, renovar):
+        token = self.token
+        if token is not None and time.monotonic() < self.expira_em:
+            return token
+        with self.lock:
+            # Outra thread pode ter renovado enquanto esta esperava o lock
+            if self.token is not None and time.monotonic() < self.expira_em:
+                return self.token
+            token, expires_in = renovar()
+            self.expira_em = time.monotonic() + max(expires_in - self.margem, expires_in / 2)
+            self.token = token
+            return token
+
+    def descartar(self, token):
+        # Chamado quando o Sigavi recusa o token (401) antes do prazo
+        with self.lock:
+            if self.token == token:
+                self.token = None
+
+
+_pool = None
+_executor = None
+_brokers = {}
+_brokers_lock = threading.Lock()
+_pool_lock = threading.Lock()
+_executor_lock = threading.Lock()
+
+
+def pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConexaoPool(settings.SIGAVI['POOL_SIZE'])
+    return _pool
+
+
+def executor():
+    # Threads onde as views assíncronas esperam o Sigavi. O executor padrão do asyncio tem só
+    # min(32, CPUs + 4) threads, o que limita as chamadas simultâneas em máquinas pequenas
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(settings.SIGAVI['THREADS'], thread_name_prefix='sigavi')
+    return _executor
+
+
+def broker(base_url, username):
+    with _brokers_lock:
+        return _brokers.setdefault((base_url, username), TokenBroker())
+
+
+class SigaviClient:
+    def __init__(self, base_url=None, username=None, password=None, timeout=None):
+        config = settings.SIGAVI
+        self.base_url = (base_url or config['BASE_URL']).rstrip('/')
+        self.username = username or config['USERNAME']
+        self.password = password or config['PASSWORD']
+        self.timeout = timeout or config['TIMEOUT']
+        self.broker = broker(self.base_url, self.username)
+
+    @property
+    def token(self):
+        return self.broker.token
+
+    def _request(self, method, path, data, headers):
+        try:
+            status, corpo = pool().request(method, f"{self.base_url}{path}", data, headers, self.timeout)
+        except (OSError, http.client.HTTPException) as exc:
+            raise SigaviError(f"Falha ao acessar {path}: {exc}") from exc
+        if status >= 400:
+            raise SigaviError(f"Falha ao acessar {path}: HTTP {status}", status=status)
+        try:
+            return json.loads(corpo.decode('utf-8') or 'null')
+        except ValueError as exc:
+            raise SigaviError(f"Falha ao acessar {path}: {exc}") from exc
+
+    def _solicitar_token(self):
+        if not self.password:
+            raise SigaviError("Senha do Sigavi não configurada (defina SIGAVI_PASSWORD)")
+        data = urllib.parse.urlencode({
+            'username': self.username,
+            'password': self.password,
+            'grant_type': 'password',
+        }).encode()
+        payload = self._request('POST', TOKEN_ENDPOINT, data, {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': 'application/json',
+        })
+        if not payload or 'access_token' not in payload:
+            raise SigaviError("Resposta de autenticação sem access_token")
+        # Sem expires_in (ou 0) vale a validade padrão, senão cada chamada pediria um token novo
+        return payload['access_token'], int(payload.get('expires_in') or 0) or settings.SIGAVI['TOKEN_TTL']
+
+    def authenticate(self):
+        # Token compartilhado pelo processo; só vai ao Sigavi quando não há token válido
+        return self.broker.obter(self._solicitar_token)
+
+    def _autenticado(self, method, path, data=None, headers=None):
+        token = self.authenticate()
+        headers = {'Accept': 'application/json', **(headers or {})}
+        try:
+            return self._request(method, path, data, {**headers, 'Authorization': f"Bearer {token}"})
+        except SigaviError as exc:
+            if exc.status != 401:
+                raise
+        # Token revogado antes do prazo: renova uma vez e repete
+        self.broker.descartar(token)
+        token = self.authenticate()
+        return self._request(method, path, data, {**headers, 'Authorization': f"Bearer {token}"})
+
+    def busca(self, path, filtros=None):
+        payload = self._autenticado('POST', path, json.dumps(filtros or {}).encode(), {
+            'Content-Type': 'application/json',
+        })
+        return payload if isinstance(payload, list) else []
+
+    def ficha_empreendimento(self, sigavi_id):
+        ficha = self._autenticado('GET', FICHA_EMPREENDIMENTO.format(id=urllib.parse.quote(str(sigavi_id))))
+        if not isinstance(ficha, dict):
+            # O Sigavi responde 200 com null para ids inexistentes; não entra no cache como ficha
+            raise SigaviError(f"Ficha do empreendimento {sigavi_id} vazia", status=404)
+        return ficha
+
+    def buscar_imoveis(self):
+        return self.busca(BUSCA_IMOVEIS)
+
+    def buscar_lancamentos(self):
+        return self.busca(BUSCA_EMPREENDIMENTO)
+
+    def buscar_corretores(self):
+        return self.busca(BUSCA_CORRETORES)
+
+
+# Normalização dos payloads do Sigavi (mesmas regras usadas em services/api.js)
+
+TIPOS_SIGAVI = {
+    'apartamento': 'APTO',
+    'cobertura': 'APTO',
+    'flat': 'APTO',
+    'kitnet': 'APTO',
+    'studio': 'APTO',
+    'terreno': 'TERRENO',
+    'lote': 'TERRENO',
+    'área': 'TERRENO',
+    'sala': 'COMERCIAL',
+    'loja': 'COMERCIAL',
+    'galpão': 'COMERCIAL',
+    'comercial': 'COMERCIAL',
+    'prédio': 'COMERCIAL',
+}
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value or 0)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        return Decimal('0.00')
+
+
+def _inteiro(value):
+    try:
+        return max(int(value or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _texto(value, max_length):
+    return str(value or '').strip()[:max_length]
+
+
+def _coordenada(value):
+    try:
+        value = float(str(value).replace(',', '.'))
+    except (TypeError, ValueError):
+        return None
+    return value or None
+
+
+def _endereco(payload):
+    return {
+        'logradouro': _texto(payload.get('Logradouro') or payload.get('Endereco'), 255),
+        'numero': _texto(payload.get('Numero'), 20),
+        'uf': _texto(payload.get('UF') or payload.get('Estado'), 2).upper(),
+        'latitude': _coordenada(payload.get('Latitude')),
+        'longitude': _coordenada(payload.get('Longitude')),
+    }
+
+
+def tipo_local(tipo):
+    nome = str(tipo or '').lower()
+    for chave, codigo in TIPOS_SIGAVI.items():
+        if chave in nome:
+            return codigo
+    return 'CASA'
+
+
+def tipo_operacao(valor_tipo_exibicao, valor_venda, valor_locacao):
+    if isinstance(valor_tipo_exibicao, (int, float)) and not isinstance(valor_tipo_exibicao, bool):
+        if valor_tipo_exibicao == 2:
+            return 'LOCACAO'
+        if valor_tipo_exibicao == 3:
+            return 'VENDA' if valor_venda > 0 else 'LOCACAO'
+        return 'VENDA'
+    normalizado = str(valor_tipo_exibicao or '').lower().strip()
+    if 'somente locação' in normalizado or 'somente locacao' in normalizado:
+        return 'LOCACAO'
+    if 'venda e locação' in normalizado or 'venda e locacao' in normalizado:
+        return 'VENDA' if valor_venda > 0 else 'LOCACAO'
+    return 'VENDA'
+
+
+def _fotos(payload):
+    fotos = sorted(payload.get('Fotos') or [], key=lambda foto: _inteiro(foto.get('Ordem')))
+    urls = [foto.get('Url') for foto in fotos if foto.get('Url')]
+    if not urls and payload.get('UrlFoto'):
+        urls = [payload['UrlFoto']]
+    return urls
+
+
+def normalizar_imovel(payload):
+    valor_venda = _decimal(payload.get('ValorVenda') or payload.get('Valor'))
+    valor_locacao = _decimal(payload.get('ValorLocacao'))
+    operacao = tipo_operacao(payload.get('ValorTipoExibicao'), valor_venda, valor_locacao)
+    return {
+        'sigavi_id': str(payload['Id']),
+        'titulo': _texto(payload.get('Titulo') or payload.get('Referencia') or 'Imóvel sem título', 255),
+        'descricao': str(payload.get('Descricao') or ''),
+        'preco': valor_locacao if operacao == 'LOCACAO' else valor_venda,
+        'tipo': tipo_local(payload.get('Tipo')),
+        'tipo_operacao': operacao,
+        'dormitorios': _inteiro(payload.get('Dormitorio') or payload.get('Dormitorios')),
+        'banheiros': _inteiro(payload.get('WC') or payload.get('Banheiros')),
+        'vagas': _inteiro(payload.get('Vaga') or payload.get('Vagas')),
+        'area_total': _decimal(payload.get('AreaTotal') or payload.get('Area')),
+        'bairro': _texto(payload.get('Bairro'), 100),
+        'cidade': _texto(payload.get('Cidade'), 100),
+        **_endereco(payload),
+        'destaque': bool(payload.get('Destaque')),
+        'disponivel': True,
+        'fotos': _fotos(payload),
+    }
+
+
+def normalizar_lancamento(payload):
+    tipologia = (payload.get('Tipologias') or [{}])[0] or {}
+    return {
+        'sigavi_id': str(payload['Id']),
+        'nome': _texto(payload.get('Nome') or payload.get('Titulo') or 'Empreendimento sem título', 255),
+        'descricao': str(payload.get('Descricao') or ''),
+        'fase': _texto(payload.get('Fase') or payload.get('Status'), 100),
+        'valor': _decimal(tipologia.get('Valor') or payload.get('Valor')),
+        'dormitorios': _inteiro(tipologia.get('Dormitorios') or payload.get('Dormitorios')),
+        'suites': _inteiro(tipologia.get('Suites') or payload.get('Suites')),
+        'vagas': _inteiro(tipologia.get('Vagas') or payload.get('Vagas')),
+        'area_total': _decimal(tipologia.get('AreaTotal') or payload.get('Area')),
+        'bairro': _texto(payload.get('Bairro'), 100),
+        'cidade': _texto(payload.get('Cidade'), 100),
+        **_endereco(payload),
+        'destaque': bool(payload.get('Destaque')),
+        'ativo': True,
+        'dados': payload,
+        'fotos': _fotos(payload),
+    }
+
+
+def normalizar_corretor(payload):
+    return {
+        'sigavi_id': str(payload['Id']),
+        'nome': _texto(payload.get('NomeComercial') or payload.get('Nome'), 255),
+        'cargo': _texto(payload.get('Cargo'), 100),
+        'creci': _texto(payload.get('Creci'), 50),
+        'email': _texto(payload.get('Email'), 254),
+        'telefone': _texto(payload.get('Celular') or payload.get('Telefone'), 30),
+        'foto_url': _texto(payload.get('UrlAvatar'), 500),
+        'ativo': bool(payload.get('Ativo', True)),
+    }
@@ -0,0 +1,75 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .agenda import invalidar_dia
+from .caching import invalidar
+from .imagens import agendar
+from .models import (
+    Imovel, ImovelFoto, Configuracao, About, BannerCarrossel, Agendamento, Lancamento, LancamentoFoto, Corretor,
+)
+
+
+@receiver([post_save, post_delete], sender=Imovel)
+@receiver([post_save, post_delete], sender=ImovelFoto)
+def invalidar_imoveis(sender, **kwargs):
+    invalidar('imoveis')
+
+
+@receiver([post_save, post_delete], sender=Configuracao)
+def invalidar_configuracao(sender, **kwargs):
+    invalidar('configuracao')
+
+
+@receiver([post_save, post_delete], sender=About)
+def invalidar_about(sender, **kwargs):
+    invalidar('about')
+
+
+@receiver([post_save, post_delete], sender=BannerCarrossel)
+def invalidar_banners(sender, **kwargs):
+    invalidar('banners')
+
+
+@receiver([post_save, post_delete], sender=Lancamento)
+@receiver([post_save, post_delete], sender=LancamentoFoto)
+def invalidar_lancamentos(sender, **kwargs):
+    invalidar('lancamentos')
+
+
+@receiver([post_save, post_delete], sender=Corretor)
+def invalidar_corretores(sender, **kwargs):
+    invalidar('corretores')
+
+
+@receiver([post_save, post_delete], sender=Agendamento)
+def invalidar_disponibilidade(sender, instance, **kwargs):
+    invalidar_dia(instance.imovel_id, instance.data_visita)
+
+
+@receiver(pre_save, sender=Agendamento)
+def invalidar_disponibilidade_anterior(sender, instance, **kwargs):
+    # Agendamento remarcado (ex.: pelo admin) libera o dia antigo
+    if instance.pk:
+        anterior = Agendamento.objects.filter(pk=instance.pk).values('imovel_id', 'data_visita').first()
+        if anterior:
+            invalidar_dia(anterior['imovel_id'], anterior['data_visita'])
+
+
+@receiver(post_save, sender=ImovelFoto)
+def variantes_foto(sender, instance, **kwargs):
+    agendar(instance.foto)
+
+
+@receiver(post_save, sender=BannerCarrossel)
+def variantes_banner(sender, instance, **kwargs):
+    agendar(instance.imagem)
+
+
+@receiver(post_save, sender=About)
+def variantes_about(sender, instance, **kwargs):
+    agendar(instance.foto)
+
+
+@receiver(post_save, sender=Configuracao)
+def variantes_logo(sender, instance, **kwargs):
+    agendar(instance.logo)
@@ -0,0 +1,155 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from rest_framework import status
+
+logger = logging.getLogger(__name__)
+
+# Gravação adiada (write-behind) dos formulários de contato/newsletter/ligação.
+# Com LEADS_SPOOL['ATIVO'] a requisição só anexa o lead validado numa fila SQLite local
+# (arquivo próprio, em WAL) e responde 202; uma thread por processo descarrega a fila no
+# banco principal com bulk_create em lotes, então os workers deixam de disputar o lock do
+# banco a cada POST. A entrega é "pelo menos uma vez": se o processo cair entre o commit no
+# banco principal e a remoção da fila, o lote é regravado na próxima descarga. Cada lead leva
+# um id_fila (UUID, único no model) gerado ao enfileirar, então a regravação não duplica nada;
+# na newsletter o próprio e-mail, único, faz esse papel.
+# Agendamento continua síncrono: o 409 de horário ocupado depende da constraint no momento do POST.
+
+SINCRONISMO = {'full': 'FULL', 'normal': 'NORMAL', 'off': 'OFF'}
+
+_local = threading.local()
+_flusher = None
+_flusher_lock = threading.Lock()
+_acordar = threading.Event()
+
+
+def config():
+    return settings.LEADS_SPOOL
+
+
+def ativo():
+    return config()['ATIVO']
+
+
+def _conexao():
+    caminho = str(config()['CAMINHO'])
+    conexao = getattr(_local, 'conexao', None)
+    if conexao is None or _local.caminho != caminho:
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        # isolation_level=None: transações controladas explicitamente (BEGIN IMMEDIATE)
+        conexao = sqlite3.connect(caminho, timeout=30, isolation_level=None)
+        conexao.execute('PRAGMA journal_mode=WAL')
+        conexao.execute(f"PRAGMA synchronous={SINCRONISMO[config()['DURABILIDADE']]}")
+        conexao.execute(
+            'CREATE TABLE IF NOT EXISTS fila ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, modelo TEXT NOT NULL, dados TEXT NOT NULL, criado_em REAL NOT NULL)'
+        )
+        _local.conexao, _local.caminho = conexao, caminho
+    return conexao
+
+
+def enfileirar(model, dados):
+    if any(campo.name == 'id_fila' for campo in model._meta.fields):
+        dados = {**dados, 'id_fila': uuid.uuid4()}
+    cursor = _conexao().execute(
+        'INSERT INTO fila (modelo, dados, criado_em) VALUES (?, ?, ?)',
+        (model._meta.label, json.dumps(dados, default=str), time.time()),
+    )
+    iniciar_flusher()
+    # Descarrega antes do intervalo quando a fila acumula um lote completo
+    if cursor.lastrowid % config()['LOTE'] == 0:
+        _acordar.set()
+
+
+def salvar_ou_enfileirar(serializer):
+    """Salva o serializer validado ou, no modo write-behind, coloca-o na fila. Retorna o status HTTP."""
+    if not ativo():
+        serializer.save()
+        return status.HTTP_201_CREATED
+    enfileirar(serializer.Meta.model, serializer.validated_data)
+    return status.HTTP_202_ACCEPTED
+
+
+def pendentes():
+    return _conexao().execute('SELECT COUNT(*) FROM fila').fetchone()[0]
+
+
+def descarregar(limite=None):
+    """Grava um lote da fila no banco principal; retorna quantos leads foram gravados."""
+    conexao = _conexao()
+    # BEGIN IMMEDIATE impede que dois processos descarreguem o mesmo lote
+    conexao.execute('BEGIN IMMEDIATE')
+    try:
+        linhas = conexao.execute(
+            'SELECT id, modelo, dados FROM fila ORDER BY id LIMIT ?', (limite or config()['LOTE'],)
+        ).fetchall()
+        if linhas:
+            por_modelo = {}
+            for _, rotulo, dados in linhas:
+                por_modelo.setdefault(rotulo, []).append(json.loads(dados))
+            with transaction.atomic():
+                for rotulo, registros in por_modelo.items():
+                    model = apps.get_model(rotulo)
+                    # ignore_conflicts: e-mails repetidos da newsletter e leads (id_fila) já gravados
+                    # por um lote regravado após falha
+                    model.objects.bulk_create([model(**dados) for dados in registros], ignore_conflicts=True)
+            conexao.execute('DELETE FROM fila WHERE id <= ?', (linhas[-1][0],))
+        conexao.execute('COMMIT')
+    except BaseException:
+        conexao.execute('ROLLBACK')
+        raise
+    return len(linhas)
+
+
+def descarregar_tudo():
+    total = 0
+    while True:
+        gravados = descarregar()
+        if not gravados:
+            return total
+        total += gravados
+
+
+def _loop():
+    while True:
+        _acordar.wait(config()['INTERVALO'])
+        _acordar.clear()
+        if not ativo():
+            continue
+        try:
+            descarregar_tudo()
+        except Exception:
+            # Banco principal ocupado ou fora do ar: os leads continuam na fila para a próxima volta
+            logger.exception("Falha ao descarregar a fila de leads")
+        finally:
+            close_old_connections()
+
+
+def iniciar_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _flusher_lock:
+        # Depois de um fork (gunicorn) a thread do processo pai não existe no filho
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_loop, name='leads-spool', daemon=True)
+            _flusher.start()
+
+
+@atexit.register
+def _descarregar_na_saida():
+    if _flusher is None or not ativo():
+        return
+    try:
+        descarregar_tudo()
+    except Exception:
+        logger.exception("Leads mantidos na fila ao encerrar o processo")
@@ -0,0 +1,171 @@
+import datetime
+import hashlib
+import json
+import logging
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .caching import invalidar
+from .geocoding import preencher_coordenadas
+from .models import Imovel, ImovelFoto, Lancamento, LancamentoFoto, Corretor, TravaSincronizacao
+from .sigavi import SigaviClient, normalizar_imovel, normalizar_lancamento, normalizar_corretor
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = 'sigavi-sync'
+LOCK_TIMEOUT = 15 * 60
+BATCH_SIZE = 500
+
+
+class SyncEmAndamento(Exception):
+    pass
+
+
+def hash_registro(registro):
+    conteudo = json.dumps(registro, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+class Feed:
+    # Descreve como um feed do Sigavi é gravado nas tabelas locais
+    def __init__(self, nome, model, normalizar, campo_ativo, foto_model=None, foto_fk=None, foto_campo=None):
+        self.nome = nome
+        self.model = model
+        self.normalizar = normalizar
+        self.campo_ativo = campo_ativo
+        self.foto_model = foto_model
+        self.foto_fk = foto_fk
+        self.foto_campo = foto_campo
+
+    def sincronizar(self, payloads):
+        resultado = {'criados': 0, 'atualizados': 0, 'inalterados': 0, 'desativados': 0}
+
+        registros = {}
+        for payload in payloads:
+            if not isinstance(payload, dict) or not payload.get('Id'):
+                continue
+            registro = self.normalizar(payload)
+            # O Sigavi pode repetir registros; mantém a primeira ocorrência, como o frontend fazia
+            registros.setdefault(registro['sigavi_id'], registro)
+
+        # Chaves com prefixo ("parceiro:123") vêm do comando importar_imoveis, não do Sigavi
+        existentes = {
+            sigavi_id: (pk, hash_atual)
+            for sigavi_id, pk, hash_atual in self.model.objects.exclude(sigavi_id=None).exclude(
+                sigavi_id__contains=':'
+            ).values_list(
+                'sigavi_id', 'pk', 'hash_conteudo'
+            )
+        }
+
+        agora = timezone.now()
+        novos, alterados, fotos, campos = [], [], {}, []
+        for sigavi_id, registro in registros.items():
+            urls = registro.pop('fotos', None)
+            registro['hash_conteudo'] = hash_registro({**registro, 'fotos': urls})
+            pk, hash_atual = existentes.get(sigavi_id, (None, None))
+            if pk is not None and hash_atual == registro['hash_conteudo']:
+                resultado['inalterados'] += 1
+                continue
+            # bulk_update não preenche campos auto_now
+            instancia = self.model(pk=pk, atualizado_em=agora, **registro)
+            (alterados if pk is not None else novos).append(instancia)
+            if urls is not None:
+                fotos[sigavi_id] = urls
+            campos = [campo for campo in registro if campo != 'sigavi_id'] + ['atualizado_em']
+
+        removidos = [pk for sigavi_id, (pk, _) in existentes.items() if sigavi_id not in registros]
+
+        # Registros sem coordenadas no Sigavi reaproveitam o cache de geocodificação (sem chamar o provedor)
+        if 'latitude' in campos:
+            preencher_coordenadas(novos + alterados, consultar_provedor=False)
+
+        with transaction.atomic():
+            self.model.objects.bulk_create(novos, batch_size=BATCH_SIZE)
+            if alterados:
+                self.model.objects.bulk_update(alterados, campos, batch_size=BATCH_SIZE)
+            if self.foto_model is not None:
+                self._gravar_fotos(novos + alterados, fotos)
+            # Um feed vazio costuma ser falha do Sigavi; nesse caso não desativa o catálogo inteiro
+            if registros:
+                for inicio in range(0, len(removidos), BATCH_SIZE):
+                    resultado['desativados'] += self.model.objects.filter(
+                        pk__in=removidos[inicio:inicio + BATCH_SIZE], **{self.campo_ativo: True}
+                    ).update(**{self.campo_ativo: False, 'hash_conteudo': ''})
+
+        resultado['criados'] = len(novos)
+        resultado['atualizados'] = len(alterados)
+        # bulk_create/bulk_update não disparam sinais, então o cache é invalidado aqui
+        if novos or alterados or resultado['desativados']:
+            invalidar(self.nome)
+        return resultado
+
+    def _gravar_fotos(self, instancias, fotos):
+        pks = [instancia.pk for instancia in instancias if instancia.sigavi_id in fotos]
+        for inicio in range(0, len(pks), BATCH_SIZE):
+            self.foto_model.objects.filter(**{f"{self.foto_fk}__in": pks[inicio:inicio + BATCH_SIZE]}).delete()
+        self.foto_model.objects.bulk_create(
+            [
+                self.foto_model(**{self.foto_fk: instancia, self.foto_campo: url, 'ordem': ordem})
+                for instancia in instancias
+                for ordem, url in enumerate(fotos.get(instancia.sigavi_id, []))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+FEEDS = {
+    'imoveis': (
+        Feed('imoveis', Imovel, normalizar_imovel, 'disponivel', ImovelFoto, 'imovel', 'url_externa'),
+        SigaviClient.buscar_imoveis,
+    ),
+    'lancamentos': (
+        Feed('lancamentos', Lancamento, normalizar_lancamento, 'ativo', LancamentoFoto, 'lancamento', 'url'),
+        SigaviClient.buscar_lancamentos,
+    ),
+    'corretores': (
+        Feed('corretores', Corretor, normalizar_corretor, 'ativo'),
+        SigaviClient.buscar_corretores,
+    ),
+}
+
+
+def adquirir_trava(nome, duracao):
+    """Dono (UUID) da trava `nome` no banco, ou None quando outro processo já a tem."""
+    # A trava fica no banco, e não no cache (LocMemCache é por processo), para valer entre o cron,
+    # o comando manual e o admin. A chave primária garante que só um INSERT vence.
+    agora = timezone.now()
+    TravaSincronizacao.objects.filter(nome=nome, expira_em__lte=agora).delete()
+    dono = uuid.uuid4()
+    try:
+        with transaction.atomic():
+            TravaSincronizacao.objects.create(
+                nome=nome, dono=dono, expira_em=agora + datetime.timedelta(seconds=duracao),
+            )
+    except IntegrityError:
+        return None
+    return dono
+
+
+def liberar_trava(nome, dono):
+    # Só apaga a própria trava: se ela expirou e outro processo a pegou, a dele continua valendo
+    TravaSincronizacao.objects.filter(nome=nome, dono=dono).delete()
+
+
+def sincronizar_catalogo(client=None, feeds=None):
+    """Ponto de entrada para cron/agendadores: baixa os feeds do Sigavi e grava só o que mudou."""
+    dono = adquirir_trava(LOCK_KEY, LOCK_TIMEOUT)
+    if dono is None:
+        raise SyncEmAndamento("Já existe uma sincronização do Sigavi em andamento")
+    try:
+        client = client or SigaviClient()
+        resultados = {}
+        for nome in feeds or FEEDS:
+            feed, buscar = FEEDS[nome]
+            resultados[nome] = feed.sincronizar(buscar(client))
+            logger.info("Sigavi %s: %s", nome, resultados[nome])
+        return resultados
+    finally:
+        liberar_trava(LOCK_KEY, dono)
@@ -1,3 +1,1911 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from decimal import Decimal
+from io import BytesIO, StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import CommandError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+
+from .models import (
+    Imovel, ImovelFoto, Lancamento, Corretor, Agendamento, BannerCarrossel, About, Configuracao, GeocodeCache,
+    Contact, CallRequest, NewsletterSubscriber, TravaSincronizacao,
+)
+from .sigavi import (
+    SigaviClient, SigaviError, BUSCA_IMOVEIS, BUSCA_EMPREENDIMENTO, BUSCA_CORRETORES, FICHA_EMPREENDIMENTO, TOKEN_ENDPOINT, pool,
+)
+from .geocoding import (
+    GeocodingError, OfflineGeocodingProvider, RateLimiter, geocodificar_enderecos, normalizar_endereco,
+)
+from .serializers import ImovelSerializer, ImovelListSerializer
+from .sync import LOCK_KEY, SyncEmAndamento, sincronizar_catalogo
+from .imagens import caminho_variante, gerar_variantes, menor_variante
+from .renderers import JSONRenderer
+from .campos import Selecao
+from .midia import ArmazenamentoEstatico, intervalo
+from .importacao import importar, ler_registros
+from .dados_sinteticos import gerar, limpar
+from .admin import EstimatedCountPaginator
+from . import benchmark, busca
+from . import metricas, spool, urls
+from .n_mais_um import NMaisUmDetectado, NMaisUmMiddleware, SemNMaisUmMixin, impressao_digital
+from imobiliaria import banco
+
+TESTDATA = Path(__file__).resolve().parent / 'testdata' / 'sigavi'
+
+
+def carregar_payload(nome):
+    return json.loads((TESTDATA / nome).read_text(encoding='utf-8'))
+
+
+def criar_imovel(**campos):
+    dados = {
+        'titulo': 'Imóvel', 'descricao': 'Descrição', 'preco': Decimal('500000'), 'tipo': 'APTO',
+        'area_total': Decimal('80'), 'bairro': 'Moema', 'cidade': 'São Paulo',
+    }
+    dados.update(campos)
+    return Imovel.objects.create(**dados)
+
+
+class SigaviStubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 para que o cliente possa reaproveitar a conexão (keep-alive)
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.responder()
+
+    def do_GET(self):
+        self.responder()
+
+    def responder(self):
+        self.server.chamadas.append(self.path)
+        self.server.conexoes.add(self.client_address)
+        if self.path != TOKEN_ENDPOINT:
+            time.sleep(self.server.latencia)
+        if self.path != TOKEN_ENDPOINT and self.headers.get('Authorization') != f'Bearer {self.server.token_aceito}':
+            self.responder_vazio(401)
+            return
+        if self.path not in self.server.respostas:
+            self.responder_vazio(404)
+            return
+        corpo = json.dumps(self.server.respostas[self.path]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def responder_vazio(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SigaviStubServer:
+    # Servidor HTTP local que reproduz payloads gravados do Sigavi
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), SigaviStubHandler)
+        self.httpd.chamadas = []
+        self.httpd.conexoes = set()
+        self.httpd.token_aceito = 'token-de-teste'
+        self.httpd.latencia = 0  # segundos de espera por resposta (exceto o token), para simular o Sigavi lento
+        self.httpd.respostas = {
+            TOKEN_ENDPOINT: carregar_payload('token.json'),
+            BUSCA_IMOVEIS: carregar_payload('busca.json'),
+            BUSCA_EMPREENDIMENTO: carregar_payload('busca_empreendimento.json'),
+            BUSCA_CORRETORES: carregar_payload('autonomo_busca.json'),
+        }
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def respostas(self):
+        return self.httpd.respostas
+
+    @property
+    def chamadas(self):
+        return self.httpd.chamadas
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class SigaviSyncTests(TestCase):
+    def setUp(self):
+        self.stub = SigaviStubServer().__enter__()
+        self.addCleanup(self.stub.__exit__)
+        settings_override = override_settings(SIGAVI={
+            **settings.SIGAVI, 'BASE_URL': self.stub.url, 'USERNAME': 'integracao', 'PASSWORD': 'senha', 'TIMEOUT': 5,
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_sincroniza_feeds_nas_tabelas_locais(self):
+        resultados = sincronizar_catalogo()
+
+        self.assertEqual(resultados['imoveis']['criados'], 3)
+        self.assertEqual(resultados['lancamentos']['criados'], 2)
+        self.assertEqual(resultados['corretores']['criados'], 2)
+
+        apto = Imovel.objects.get(sigavi_id='1201')
+        self.assertEqual(apto.tipo, 'APTO')
+        self.assertEqual(apto.tipo_operacao, 'VENDA')
+        self.assertEqual(apto.preco, Decimal('980000.00'))
+        self.assertTrue(apto.destaque)
+        self.assertEqual(
+            [foto.foto_url for foto in apto.fotos.all()],
+            ['https://cdn.sigavi360.com.br/fotos/1201/1.jpg', 'https://cdn.sigavi360.com.br/fotos/1201/2.jpg'],
+        )
+
+        casa = Imovel.objects.get(sigavi_id='1202')
+        self.assertEqual(casa.tipo_operacao, 'LOCACAO')
+        self.assertEqual(casa.preco, Decimal('7500.00'))
+        self.assertEqual(Imovel.objects.get(sigavi_id='1203').tipo, 'COMERCIAL')
+
+        lancamento = Lancamento.objects.get(sigavi_id='88')
+        self.assertEqual(lancamento.valor, Decimal('720000.00'))
+        self.assertEqual(lancamento.fotos.first().url, 'https://cdn.sigavi360.com.br/empreendimentos/88/1.jpg')
+        self.assertFalse(Corretor.objects.get(sigavi_id='502').ativo)
+
+    def test_sincronizacao_incremental_grava_apenas_alteracoes(self):
+        sincronizar_catalogo()
+        fotos_antes = set(ImovelFoto.objects.filter(imovel__sigavi_id='1201').values_list('pk', flat=True))
+
+        imoveis = carregar_payload('busca.json')
+        imoveis[1]['ValorLocacao'] = 8000
+        del imoveis[3]
+        self.stub.respostas[BUSCA_IMOVEIS] = imoveis
+
+        resultados = sincronizar_catalogo(feeds=['imoveis'])
+
+        self.assertEqual(resultados['imoveis'], {'criados': 0, 'atualizados': 1, 'inalterados': 1, 'desativados': 1})
+        self.assertEqual(Imovel.objects.get(sigavi_id='1202').preco, Decimal('8000.00'))
+        self.assertFalse(Imovel.objects.get(sigavi_id='1203').disponivel)
+        # Fotos de registros inalterados não são regravadas
+        self.assertEqual(
+            set(ImovelFoto.objects.filter(imovel__sigavi_id='1201').values_list('pk', flat=True)), fotos_antes
+        )
+
+        # Reaparecer no feed reativa o imóvel
+        self.stub.respostas[BUSCA_IMOVEIS] = carregar_payload('busca.json')
+        resultados = sincronizar_catalogo(feeds=['imoveis'])
+        self.assertEqual(resultados['imoveis']['atualizados'], 2)
+        self.assertTrue(Imovel.objects.get(sigavi_id='1203').disponivel)
+
+    def test_feed_vazio_nao_desativa_catalogo(self):
+        sincronizar_catalogo(feeds=['imoveis'])
+        self.stub.respostas[BUSCA_IMOVEIS] = []
+
+        resultados = sincronizar_catalogo(feeds=['imoveis'])
+
+        self.assertEqual(resultados['imoveis']['desativados'], 0)
+        self.assertEqual(Imovel.objects.filter(disponivel=True).count(), 3)
+
+    def test_preserva_imoveis_cadastrados_localmente(self):
+        local = Imovel.objects.create(
+            titulo='Cadastro manual', descricao='', preco=1, tipo='CASA', area_total=1, bairro='Centro', cidade='SP'
+        )
+        importado = criar_imovel(sigavi_id='parceiro:77')
+        sincronizar_catalogo(feeds=['imoveis'])
+        local.refresh_from_db()
+        importado.refresh_from_db()
+        self.assertTrue(local.disponivel)
+        self.assertTrue(importado.disponivel)
+
+    def test_falha_de_autenticacao(self):
+        client = SigaviClient(base_url=self.stub.url)
+        del self.stub.respostas[TOKEN_ENDPOINT]
+        with self.assertRaises(SigaviError):
+            client.buscar_imoveis()
+
+    def test_management_command(self):
+        call_command('sync_sigavi', '--feed', 'corretores', stdout=StringIO())
+        self.assertEqual(Corretor.objects.count(), 2)
+        self.assertEqual(Imovel.objects.count(), 0)
+
+    def test_sem_senha_configurada_nao_acessa_o_sigavi(self):
+        with override_settings(SIGAVI={**settings.SIGAVI, 'PASSWORD': ''}):
+            with self.assertRaisesMessage(CommandError, 'SIGAVI_PASSWORD'):
+                call_command('sync_sigavi', '--feed', 'corretores', stdout=StringIO())
+        self.assertEqual(self.stub.chamadas, [])
+        self.assertEqual(Corretor.objects.count(), 0)
+
+    def test_trava_no_banco_impede_sincronizacoes_simultaneas(self):
+        # Trava de outro processo (cron): o cache local não a enxerga, o banco sim
+        TravaSincronizacao.objects.create(
+            nome=LOCK_KEY, dono=uuid.uuid4(), expira_em=timezone.now() + datetime.timedelta(minutes=5),
+        )
+        with self.assertRaises(SyncEmAndamento):
+            sincronizar_catalogo(feeds=['corretores'])
+        self.assertEqual(self.stub.chamadas, [])
+
+        # Trava vencida (processo que morreu no meio) é assumida e liberada ao final
+        TravaSincronizacao.objects.update(expira_em=timezone.now() - datetime.timedelta(seconds=1))
+        sincronizar_catalogo(feeds=['corretores'])
+        self.assertEqual(Corretor.objects.count(), 2)
+        self.assertFalse(TravaSincronizacao.objects.exists())
+
+
+class ImovelListTests(TestCase):
+    def setUp(self):
+        self.url = reverse('imoveis')
+
+    def test_filtros_por_query_params(self):
+        criar_imovel(titulo='A', bairro='Moema', preco=Decimal('300000'), dormitorios=2, vagas=1)
+        criar_imovel(titulo='B', bairro='Pinheiros', preco=Decimal('900000'), dormitorios=3, vagas=2)
+        criar_imovel(titulo='C', bairro='Moema', preco=Decimal('4500'), tipo_operacao='LOCACAO', dormitorios=1)
+        criar_imovel(titulo='D', bairro='Saúde', preco=Decimal('700000'), area_total=Decimal('200'), destaque=True)
+
+        def titulos(**params):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            return sorted(imovel['titulo'] for imovel in response.json()['results'])
+
+        self.assertEqual(titulos(bairro='Moema'), ['A', 'C'])
+        self.assertEqual(titulos(bairro='Moema,Saúde'), ['A', 'C', 'D'])
+        self.assertEqual(titulos(preco_min='400000', preco_max='800000'), ['D'])
+        self.assertEqual(titulos(dormitorios=2), ['A', 'B'])
+        self.assertEqual(titulos(vagas=2), ['B'])
+        self.assertEqual(titulos(area_min='100'), ['D'])
+        self.assertEqual(titulos(tipo_operacao='LOCACAO'), ['C'])
+        self.assertEqual(titulos(destaque='true'), ['D'])
+
+    def test_parametro_invalido_retorna_400(self):
+        self.assertEqual(self.client.get(self.url, {'preco_min': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'ordenacao': 'titulo'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nao-e-cursor'}).status_code, 400)
+
+    def test_destaques_primeiro(self):
+        criar_imovel(titulo='Comum')
+        criar_imovel(titulo='Destaque', destaque=True)
+        criar_imovel(titulo='Outro')
+        results = self.client.get(self.url).json()['results']
+        self.assertEqual([imovel['titulo'] for imovel in results], ['Destaque', 'Outro', 'Comum'])
+
+    def test_cursor_percorre_todas_as_paginas(self):
+        for indice in range(25):
+            criar_imovel(titulo=f'Imóvel {indice}', preco=Decimal(100000 + (indice % 5) * 1000), destaque=indice % 3 == 0)
+
+        for ordenacao in ['destaque', 'preco', '-preco', 'area', 'recentes']:
+            vistos = []
+            response = self.client.get(self.url, {'ordenacao': ordenacao, 'limit': 7})
+            while True:
+                data = response.json()
+                self.assertLessEqual(len(data['results']), 7)
+                vistos.extend(imovel['id'] for imovel in data['results'])
+                if data['next'] is None:
+                    break
+                response = self.client.get(data['next'])
+            self.assertEqual(len(vistos), 25)
+            self.assertEqual(len(set(vistos)), 25)
+
+        precos = [Decimal(imovel['preco']) for imovel in self.client.get(self.url, {'ordenacao': 'preco', 'limit': 25}).json()['results']]
+        self.assertEqual(precos, sorted(precos))
+
+
+class ImovelFacetsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('imoveis-facets')
+        criar_imovel(bairro='Moema', preco=Decimal('100000'), dormitorios=1, vagas=0, area_total=Decimal('40'))
+        criar_imovel(bairro='Moema', preco=Decimal('550000'), dormitorios=2, vagas=1, area_total=Decimal('70'))
+        criar_imovel(bairro='Pinheiros', tipo='CASA', preco=Decimal('1000000'), dormitorios=4, vagas=3, area_total=Decimal('250'))
+
+    def test_agregacoes(self):
+        data = self.client.get(self.url).json()
+
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['bairros'], [{'bairro': 'Moema', 'total': 2}, {'bairro': 'Pinheiros', 'total': 1}])
+        self.assertEqual(data['tipos'], [{'tipo': 'APTO', 'total': 2}, {'tipo': 'CASA', 'total': 1}])
+        self.assertEqual(data['faixas']['dormitorios'], {'min': 1, 'max': 4})
+        self.assertEqual(data['faixas']['vagas'], {'min': 0, 'max': 3})
+        self.assertEqual(Decimal(str(data['faixas']['preco']['max'])), Decimal('1000000'))
+
+        histograma = data['histograma_preco']
+        self.assertEqual(len(histograma), 10)
+        self.assertEqual(sum(faixa['total'] for faixa in histograma), 3)
+        self.assertEqual(histograma[0]['total'], 1)
+        self.assertEqual(histograma[5]['total'], 1)
+        self.assertEqual(histograma[-1]['total'], 1)
+
+    def test_respeita_filtros(self):
+        data = self.client.get(self.url, {'bairro': 'Moema'}).json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['faixas']['dormitorios'], {'min': 1, 'max': 2})
+        self.assertEqual(data['tipos'], [{'tipo': 'APTO', 'total': 2}])
+
+    def test_facet_ignora_o_proprio_filtro(self):
+        # Com um bairro escolhido os outros continuam no facet, para o usuário poder trocar
+        data = self.client.get(self.url, {'bairro': 'Moema', 'tipo': 'APTO', 'preco_max': '600000'}).json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['bairros'], [{'bairro': 'Moema', 'total': 2}])
+        self.assertEqual(data['tipos'], [{'tipo': 'APTO', 'total': 2}])
+
+        data = self.client.get(self.url, {'bairro': 'Pinheiros'}).json()
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['bairros'], [{'bairro': 'Moema', 'total': 2}, {'bairro': 'Pinheiros', 'total': 1}])
+        self.assertEqual(data['tipos'], [{'tipo': 'CASA', 'total': 1}])
+
+        data = self.client.get(self.url, {'preco_max': '600000', 'vagas': 1}).json()
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(Decimal(str(data['faixas']['preco']['max'])), Decimal('1000000'))
+        self.assertEqual(sum(faixa['total'] for faixa in data['histograma_preco']), 2)
+        self.assertEqual(data['faixas']['vagas'], {'min': 0, 'max': 1})
+        self.assertEqual(data['faixas']['dormitorios'], {'min': 2, 'max': 2})
+
+    def test_cache_invalidado_quando_imovel_muda(self):
+        self.assertEqual(self.client.get(self.url).json()['total'], 3)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        criar_imovel(bairro='Saúde')
+        self.assertEqual(self.client.get(self.url).json()['total'], 4)
+
+    def test_catalogo_vazio(self):
+        Imovel.objects.all().delete()
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['total'], 0)
+        self.assertEqual(data['histograma_preco'], [])
+
+
+class ImovelSerializacaoTests(TestCase):
+    def criar_catalogo(self, quantidade):
+        for indice in range(quantidade):
+            imovel = criar_imovel(titulo=f'Imóvel {indice}', preco=Decimal('123456.7'), disponivel=indice % 2 == 0)
+            ImovelFoto.objects.create(imovel=imovel, url_externa=f'https://cdn.example.com/{indice}/b.jpg', ordem=2)
+            ImovelFoto.objects.create(imovel=imovel, foto=f'imoveis/{indice}.jpg', ordem=1)
+
+    def test_listagem_rapida_gera_mesmo_json(self):
+        self.criar_catalogo(3)
+        criar_imovel(titulo='Sem fotos')
+
+        completo = ImovelSerializer(ImovelSerializer.preparar_queryset(Imovel.objects.order_by('id')), many=True).data
+        rapido = ImovelListSerializer(list(ImovelListSerializer.queryset(Imovel.objects.order_by('id')))).data
+
+        # Os dois devolvem Decimal; o JSON sai pelo JSONRenderer do projeto
+        completo, rapido = json.loads(JSONRenderer().render(completo)), json.loads(JSONRenderer().render(rapido))
+        self.assertEqual(completo, rapido)
+        self.assertEqual(rapido[0]['preco'], '123456.70')
+        self.assertEqual(rapido[0]['fotos'][0]['foto_url'], '/media/imoveis/0.jpg')
+        self.assertEqual(rapido[0]['fotos'][1], {'foto_url': 'https://cdn.example.com/0/b.jpg', 'srcset': None, 'ordem': 2})
+
+    def test_numero_de_queries_nao_depende_do_tamanho_da_pagina(self):
+        self.criar_catalogo(3)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('imoveis'), {'limit': 3})
+
+        self.criar_catalogo(40)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('imoveis'), {'limit': 40})
+        self.assertEqual(len(response.json()['results']), 40)
+
+    def test_prefetch_no_serializer_completo(self):
+        self.criar_catalogo(10)
+        with self.assertNumQueries(2):
+            ImovelSerializer(ImovelSerializer.preparar_queryset(Imovel.objects.all()), many=True).data
+
+
+
+class CamposEsparsosTests(TestCase):
+    def setUp(self):
+        for indice in range(3):
+            imovel = criar_imovel(titulo=f'Imóvel {indice}', preco=Decimal('123456.7'), area_total=Decimal('80.5'))
+            ImovelFoto.objects.create(imovel=imovel, url_externa=f'https://cdn.example.com/{indice}/b.jpg', ordem=2)
+            ImovelFoto.objects.create(imovel=imovel, url_externa=f'https://cdn.example.com/{indice}/a.jpg', ordem=1)
+        self.url = reverse('imoveis')
+
+    def listar(self, **params):
+        # Todos com o mesmo preço: a ordenação por preço fica na ordem de criação
+        response = self.client.get(self.url, {'ordenacao': 'preco', **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['results']
+
+    def test_perfil_card(self):
+        with CaptureQueriesContext(connection) as queries:
+            itens = self.listar(perfil='card')
+        self.assertEqual(list(itens[0]), ['id', 'titulo', 'preco', 'bairro', 'capa'])
+        self.assertEqual(itens[0]['preco'], '123456.70')
+        self.assertEqual(itens[0]['capa'], {'foto_url': 'https://cdn.example.com/0/a.jpg', 'srcset': None})
+        # A descrição nem é lida do banco
+        self.assertNotIn('descricao', queries[0]['sql'])
+        self.assertEqual(list(self.listar(perfil='card', fields='cidade')[0]), ['id', 'titulo', 'preco', 'bairro', 'cidade', 'capa'])
+        self.assertEqual(self.listar(perfil='full'), self.listar())
+
+    def test_fields_e_omit_com_fotos_aninhadas(self):
+        item = self.listar(fields='id,fotos.foto_url')[0]
+        self.assertEqual(item, {'id': item['id'], 'fotos': [
+            {'foto_url': 'https://cdn.example.com/0/a.jpg'}, {'foto_url': 'https://cdn.example.com/0/b.jpg'},
+        ]})
+        item = self.listar(omit='descricao,status,fotos.srcset')[0]
+        self.assertNotIn('descricao', item)
+        self.assertNotIn('status', item)
+        self.assertEqual(item['fotos'][0], {'foto_url': 'https://cdn.example.com/0/a.jpg', 'ordem': 1})
+        # Capa e fotos juntas: a capa continua com foto_url e srcset
+        item = self.listar(fields='capa,fotos.ordem')[0]
+        self.assertEqual(item, {'fotos': [{'ordem': 1}, {'ordem': 2}], 'capa': {'foto_url': 'https://cdn.example.com/0/a.jpg', 'srcset': None}})
+
+    def test_sem_fotos_nao_consulta_as_fotos(self):
+        with self.assertNumQueries(1):
+            itens = self.listar(fields='titulo,preco', ordenacao='preco')
+        self.assertEqual(list(itens[0]), ['titulo', 'preco'])
+
+    def test_campos_invalidos(self):
+        for params, parametro in [
+            ({'fields': 'titulo,senha'}, 'fields'), ({'omit': 'fotos.nada'}, 'omit'),
+            ({'fields': 'titulo.texto'}, 'fields'), ({'perfil': 'mini'}, 'perfil'),
+        ]:
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(parametro, response.json())
+
+    def test_serializer_completo_aceita_a_mesma_selecao(self):
+        params = {'perfil': 'card', 'fields': 'fotos.ordem', 'omit': 'preco'}
+        request = Request(RequestFactory().get('/', params))
+        completo = ImovelSerializer(
+            ImovelSerializer.preparar_queryset(Imovel.objects.order_by('id')), many=True, context={'request': request},
+        ).data
+        selecao = Selecao.da_requisicao(request.query_params, ImovelListSerializer.perfis)
+        rapido = ImovelListSerializer(list(ImovelListSerializer.queryset(Imovel.objects.order_by('id'), selecao)), selecao).data
+        renderer = JSONRenderer()
+        self.assertEqual(json.loads(renderer.render(completo)), json.loads(renderer.render(rapido)))
+        self.assertEqual(list(completo[0]), ['id', 'titulo', 'bairro', 'fotos', 'capa'])
+        # Sem requisição no contexto (ex.: o POST de cadastro) saem os campos padrão, sem a capa
+        self.assertNotIn('capa', ImovelSerializer(Imovel.objects.first()).data)
+
+    def test_renderer_escreve_decimal_como_string(self):
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render({'preco': Decimal('1500000.00'), 'area_total': Decimal('0.50'), 'texto': 'a\u2028b'}),
+            b'{"preco":"1500000.00","area_total":"0.50","texto":"a\\u2028b"}',
+        )
+        self.assertIn(b'"preco": "10.00"', renderer.render({'preco': Decimal('10.00')}, 'application/json; indent=2'))
+        facets = self.client.get(reverse('imoveis-facets')).json()
+        self.assertEqual(facets['faixas']['preco'], {'min': '123456.70', 'max': '123456.70'})
+
+
+class QueryPlanMixin:
+    # Roda EXPLAIN QUERY PLAN e falha se alguma tabela for lida por varredura completa
+    SCAN_COMPLETO = re.compile(r'^SCAN (\w+)$')
+
+    def plano(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [linha[-1] for linha in cursor.fetchall()]
+
+    def assertSemScanCompleto(self, sql, params=()):
+        plano = self.plano(sql, params)
+        scans = [passo for passo in plano if self.SCAN_COMPLETO.match(passo.strip())]
+        self.assertFalse(scans, f"Varredura completa em:\n{sql}\nPlano: {plano}")
+
+    def assertQuerysetIndexado(self, queryset):
+        self.assertSemScanCompleto(*queryset.query.sql_with_params())
+
+    def assertRequisicaoIndexada(self, url, params=None):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        for query in contexto.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                self.assertSemScanCompleto(query['sql'])
+
+
+class QueryPlanTests(QueryPlanMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        for indice in range(30):
+            imovel = criar_imovel(bairro=['Moema', 'Saúde', 'Pinheiros'][indice % 3], destaque=indice % 4 == 0)
+            ImovelFoto.objects.create(imovel=imovel, url_externa='https://cdn.example.com/a.jpg')
+
+    def test_listagem_de_imoveis(self):
+        url = reverse('imoveis')
+        self.assertRequisicaoIndexada(url)
+        self.assertRequisicaoIndexada(url, {'disponivel': 'true'})
+        self.assertRequisicaoIndexada(url, {'bairro': 'Moema,Saúde'})
+        self.assertRequisicaoIndexada(url, {'tipo_operacao': 'VENDA', 'preco_min': '1000', 'preco_max': '900000'})
+        self.assertRequisicaoIndexada(url, {'tipo': 'CASA'})
+        self.assertRequisicaoIndexada(url, {'cidade': 'São Paulo'})
+        self.assertRequisicaoIndexada(url, {'ordenacao': 'preco'})
+        self.assertRequisicaoIndexada(url, {'ordenacao': '-area'})
+
+        proxima = self.client.get(url, {'limit': 5, 'disponivel': 'true'}).json()['next']
+        self.assertRequisicaoIndexada(proxima)
+
+    def test_facets(self):
+        self.assertRequisicaoIndexada(reverse('imoveis-facets'), {'bairro': 'Moema'})
+
+    def test_banners_e_agendamentos(self):
+        self.assertQuerysetIndexado(BannerCarrossel.objects.filter(ativo=True).order_by('ordem'))
+        self.assertQuerysetIndexado(Agendamento.objects.filter(
+            imovel_id='1201', data_visita__range=(datetime.date(2025, 1, 1), datetime.date(2025, 1, 31))
+        ))
+        self.assertQuerysetIndexado(Agendamento.objects.filter(data_visita=datetime.date(2025, 1, 1)))
+
+    def test_detecta_scan_completo(self):
+        with self.assertRaises(AssertionError):
+            self.assertQuerysetIndexado(Imovel.objects.filter(descricao='x'))
+
+
+class ConteudoEmCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_banners_cacheados_e_invalidados_por_sinal(self):
+        banner = BannerCarrossel.objects.create(titulo='Primeiro', imagem='banners/a.png', ordem=1)
+        BannerCarrossel.objects.create(titulo='Inativo', imagem='banners/b.png', ativo=False)
+
+        self.assertEqual([b['titulo'] for b in self.client.get(reverse('banners')).json()], ['Primeiro'])
+        with self.assertNumQueries(0):
+            self.client.get(reverse('banners'))
+
+        banner.titulo = 'Renomeado'
+        banner.save()
+        self.assertEqual(self.client.get(reverse('banners')).json()[0]['titulo'], 'Renomeado')
+
+        banner.delete()
+        self.assertEqual(self.client.get(reverse('banners')).json(), [])
+
+    def test_etag_e_304(self):
+        About.objects.create(foto='about/costas.png', descricao='Sobre nós')
+        response = self.client.get(reverse('abouts'))
+        etag = response['ETag']
+        self.assertEqual(response.json()['descricao'], 'Sobre nós')
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        response = self.client.get(reverse('abouts'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        About.objects.update(descricao='Alterado')  # update() não dispara sinais
+        About.objects.first().save()
+        response = self.client.get(reverse('abouts'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_logo(self):
+        response = self.client.get(reverse('logo'))
+        self.assertEqual(response.json(), {'logoUrl': 'http://testserver/static/logos/banner_1.png', 'logoSrcset': None})
+
+        Configuracao.objects.create(
+            logo='logos/logo.jpg', variantes={'arquivo': 'logos/logo.jpg', 'larguras': [[320, 320], [640, 500]]},
+        )
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('logo'))
+        self.assertEqual(response.json()['logoUrl'], '/media/logos/logo.jpg')
+        self.assertEqual(
+            response.json()['logoSrcset']['webp'], '/media/variantes/logos/logo/320.webp 320w, /media/variantes/logos/logo/640.webp 500w'
+        )
+
+
+OFFLINE_GEOCODING = {
+    'PROVIDER': 'project.geocoding.OfflineGeocodingProvider', 'API_KEY': '', 'RATE_LIMIT': 1000, 'WORKERS': 4,
+}
+
+
+@override_settings(GEOCODING=OFFLINE_GEOCODING)
+class GeocodingTests(TestCase):
+    def test_normalizacao_do_endereco(self):
+        self.assertEqual(
+            normalizar_endereco('Rua  Bela Cintra', '10', 'Consolação', 'São Paulo', 'SP'),
+            'rua bela cintra, 10 - consolacao - sao paulo - sp - brasil',
+        )
+
+    def test_cache_persistente_evita_novas_consultas(self):
+        provider = OfflineGeocodingProvider()
+        enderecos = ['rua a, 1 - sao paulo', 'rua b, 2 - sao paulo']
+
+        primeira = geocodificar_enderecos(enderecos + enderecos, provider=provider)
+        self.assertEqual(sorted(provider.chamadas), enderecos)
+        self.assertEqual(GeocodeCache.objects.count(), 2)
+
+        segunda = geocodificar_enderecos(enderecos, provider=provider)
+        self.assertEqual(len(provider.chamadas), 2)
+        self.assertEqual(primeira, segunda)
+
+    def test_nao_encontrado_e_cacheado_mas_erro_nao(self):
+        class Provider(OfflineGeocodingProvider):
+            def geocodificar(self, endereco):
+                self.chamadas.append(endereco)
+                if endereco == 'erro':
+                    raise GeocodingError('OVER_QUERY_LIMIT')
+                return None
+
+        provider = Provider()
+        with self.assertLogs('project.geocoding', 'WARNING'):
+            resultado = geocodificar_enderecos(['inexistente', 'erro'], provider=provider)
+        self.assertEqual(resultado, {'inexistente': None, 'erro': None})
+        self.assertEqual(list(GeocodeCache.objects.values_list('endereco', flat=True)), ['inexistente'])
+
+        with self.assertLogs('project.geocoding', 'WARNING'):
+            geocodificar_enderecos(['inexistente', 'erro'], provider=provider)
+        self.assertEqual(provider.chamadas.count('inexistente'), 1)
+        self.assertEqual(provider.chamadas.count('erro'), 2)
+
+    def test_rate_limiter(self):
+        limiter = RateLimiter(50)
+        inicio = time.monotonic()
+        for _ in range(6):
+            limiter.aguardar()
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.09)
+
+    def test_comando_de_backfill(self):
+        com_endereco = criar_imovel(logradouro='Rua Augusta', numero='100', bairro='Consolação', uf='SP')
+        mesmo_endereco = criar_imovel(logradouro='Rua Augusta', numero='100', bairro='Consolação', uf='SP')
+        ja_geocodificado = criar_imovel(logradouro='Rua Oscar Freire', latitude=-23.56, longitude=-46.67)
+        sem_endereco = criar_imovel(bairro='')
+
+        out = StringIO()
+        call_command('geocodificar_imoveis', stdout=out)
+        self.assertIn('imoveis: 2 registros geocodificados', out.getvalue())
+
+        com_endereco.refresh_from_db()
+        mesmo_endereco.refresh_from_db()
+        ja_geocodificado.refresh_from_db()
+        sem_endereco.refresh_from_db()
+        self.assertIsNotNone(com_endereco.latitude)
+        self.assertEqual((com_endereco.latitude, com_endereco.longitude), (mesmo_endereco.latitude, mesmo_endereco.longitude))
+        self.assertEqual(ja_geocodificado.latitude, -23.56)
+        self.assertIsNone(sem_endereco.latitude)
+        self.assertEqual(GeocodeCache.objects.count(), 1)
+
+        resposta = self.client.get(reverse('imoveis'), {'limit': 10}).json()['results']
+        self.assertIn(com_endereco.latitude, [imovel['latitude'] for imovel in resposta])
+
+    def test_sincronizacao_usa_coordenadas_do_sigavi_e_do_cache(self):
+        GeocodeCache.objects.create(
+            endereco=normalizar_endereco('Alameda dos Arapanés', '900', 'Moema', 'São Paulo', 'SP'),
+            latitude=-23.6, longitude=-46.66,
+        )
+        with SigaviStubServer() as stub, override_settings(SIGAVI={
+            'BASE_URL': stub.url, 'USERNAME': 'integracao', 'PASSWORD': 'senha', 'TIMEOUT': 5,
+        }):
+            sincronizar_catalogo(feeds=['imoveis'])
+
+        self.assertEqual(Imovel.objects.get(sigavi_id='1201').latitude, -23.5891)
+        self.assertEqual(Imovel.objects.get(sigavi_id='1202').latitude, -23.6)
+        self.assertIsNone(Imovel.objects.get(sigavi_id='1203').latitude)
+
+
+class ImovelMapaTests(QueryPlanMixin, TestCase):
+    def setUp(self):
+        self.url = reverse('imoveis-map')
+        # Dois grupos próximos em Moema e um imóvel isolado em Pinheiros
+        for indice in range(5):
+            criar_imovel(titulo=f'Moema {indice}', latitude=-23.6000 + indice * 0.0001, longitude=-46.6600 + indice * 0.0001)
+        criar_imovel(titulo='Pinheiros', latitude=-23.5600, longitude=-46.6900)
+        criar_imovel(titulo='Sem coordenadas')
+        criar_imovel(titulo='Fora da área', latitude=-22.9, longitude=-43.2)
+        self.bbox = '-46.80,-23.70,-46.55,-23.50'
+
+    def test_clusters_em_zoom_baixo(self):
+        data = self.client.get(self.url, {'bbox': self.bbox, 'zoom': 11}).json()
+        self.assertEqual(data['pins'], [])
+        clusters = sorted(data['clusters'], key=lambda cluster: cluster['total'])
+        self.assertEqual([cluster['total'] for cluster in clusters], [1, 5])
+        self.assertIsNotNone(clusters[0]['id'])
+        self.assertIsNone(clusters[1]['id'])
+        self.assertAlmostEqual(clusters[1]['latitude'], -23.5998, places=4)
+
+    def test_pins_em_zoom_alto(self):
+        data = self.client.get(self.url, {'bbox': self.bbox, 'zoom': 17}).json()
+        self.assertEqual(data['clusters'], [])
+        self.assertEqual(len(data['pins']), 6)
+        self.assertEqual(set(data['pins'][0]), {'id', 'titulo', 'preco', 'tipo_operacao', 'latitude', 'longitude'})
+
+    def test_respeita_filtros(self):
+        data = self.client.get(self.url, {'bbox': self.bbox, 'zoom': 17, 'bairro': 'Inexistente'}).json()
+        self.assertEqual(data['pins'], [])
+
+    def test_bbox_invalido(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'bbox': '1,2,3'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'bbox': '-46.5,-23.5,-46.8,-23.7'}).status_code, 400)
+
+    def test_consulta_indexada(self):
+        self.assertRequisicaoIndexada(self.url, {'bbox': self.bbox, 'zoom': 11})
+        self.assertRequisicaoIndexada(self.url, {'bbox': self.bbox, 'zoom': 17})
+
+
+class BuscaTextualTests(QueryPlanMixin, TestCase):
+    def setUp(self):
+        self.url = reverse('imoveis')
+        self.casa = criar_imovel(titulo='Casa para locação em Moema', descricao='Quintal amplo', bairro='Moema')
+        self.apto = criar_imovel(titulo='Apartamento com varanda', descricao='Ótima locacao, perto do metrô', bairro='Vila Mariana')
+        self.sala = criar_imovel(titulo='Sala comercial', descricao='Andar alto', bairro='Pinheiros', cidade='São Paulo')
+
+    def buscar(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [imovel['id'] for imovel in response.json()['results']]
+
+    def test_ignora_acentos_e_maiusculas(self):
+        self.assertEqual(set(self.buscar('LOCACAO')), {self.casa.id, self.apto.id})
+        self.assertEqual(set(self.buscar('locação')), {self.casa.id, self.apto.id})
+        self.assertEqual(self.buscar('metro'), [self.apto.id])
+        self.assertEqual(self.buscar('sao paulo sala'), [self.sala.id])
+
+    def test_prefixo_na_ultima_palavra(self):
+        self.assertEqual(self.buscar('pinhei'), [self.sala.id])
+
+    def test_relevancia_prioriza_titulo(self):
+        self.assertEqual(self.buscar('locação'), [self.casa.id, self.apto.id])
+
+    def test_indice_acompanha_alteracoes(self):
+        self.sala.titulo = 'Loja de rua'
+        self.sala.save()
+        self.assertEqual(self.buscar('loja'), [self.sala.id])
+        self.assertEqual(self.buscar('sala'), [])
+
+        Imovel.objects.filter(pk=self.casa.pk).update(descricao='Piscina aquecida')
+        self.assertEqual(self.buscar('piscina'), [self.casa.id])
+
+        self.apto.delete()
+        self.assertEqual(self.buscar('varanda'), [])
+
+    def test_busca_combinada_com_filtros_e_cursor(self):
+        for indice in range(6):
+            criar_imovel(titulo=f'Casa térrea {indice}', bairro='Saúde')
+        vistos = []
+        response = self.client.get(self.url, {'q': 'casa', 'limit': 4})
+        while True:
+            data = response.json()
+            vistos.extend(imovel['id'] for imovel in data['results'])
+            if not data['next']:
+                break
+            response = self.client.get(data['next'])
+        self.assertEqual(len(vistos), 7)
+        self.assertEqual(len(set(vistos)), 7)
+
+        self.assertEqual(len(self.buscar('casa', bairro='Saúde')), 6)
+        self.assertEqual(len(self.buscar('casa', ordenacao='preco')), 7)
+
+    def test_relevancia_exige_q(self):
+        self.assertEqual(self.client.get(self.url, {'ordenacao': 'relevancia'}).status_code, 400)
+
+    def test_caracteres_especiais_nao_quebram_a_busca(self):
+        self.assertEqual(self.buscar('"casa" (moema*'), [self.casa.id])
+        self.assertEqual(len(self.buscar('***')), 3)
+
+    def test_busca_usa_indice(self):
+        self.assertRequisicaoIndexada(self.url, {'q': 'casa moema'})
+
+
+class BuscaTextualMigracoesTests(TransactionTestCase):
+    def tabelas_busca(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE 'project_imovel_fts%'")
+            return {linha[0] for linha in cursor.fetchall()}
+
+    def migrar(self, *alvo):
+        # Pelo comando, que também dispara os sinais pre/post_migrate
+        call_command('migrate', 'project', *alvo, verbosity=0)
+
+    def test_desfaz_e_refaz_as_migracoes_da_busca(self):
+        self.addCleanup(self.migrar)
+        # Voltar para antes da 0019 tira o índice (e não o recria) e chega antes das colunas indexadas
+        self.migrar('0018')
+        self.assertEqual(self.tabelas_busca(), set())
+        self.migrar('0014')
+        self.assertEqual(self.tabelas_busca(), set())
+
+        self.migrar()
+        self.assertTrue({busca.TABELA, *busca.TRIGGERS} <= self.tabelas_busca())
+        casa = criar_imovel(titulo='Casa com quintal', bairro='Moema')
+        self.assertEqual(list(busca.filtrar(Imovel.objects.all(), 'quintal')), [casa])
+
+
+def imagem_de_teste(nome, tamanho, modo='RGB', formato='JPEG'):
+    buffer = BytesIO()
+    Image.new(modo, tamanho, (200, 30, 30, 128) if modo == 'RGBA' else (200, 30, 30)).save(buffer, formato)
+    return SimpleUploadedFile(nome, buffer.getvalue())
+
+
+class ImagemVariantesTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        override = override_settings(
+            MEDIA_ROOT=self.media,
+            IMAGENS={'LARGURAS': [320, 640], 'QUALIDADE': 80, 'ASSINCRONO': False, 'WORKERS': 1},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def abrir_variante(self, nome, largura, formato):
+        with default_storage.open(caminho_variante(nome, largura, formato)) as arquivo:
+            imagem = Image.open(arquivo)
+            imagem.load()
+        return imagem
+
+    def test_variantes_geradas_apos_o_upload(self):
+        imovel = criar_imovel()
+        with self.captureOnCommitCallbacks(execute=True):
+            foto = ImovelFoto.objects.create(imovel=imovel, foto=imagem_de_teste('casa.jpg', (2000, 1000)))
+
+        webp = self.abrir_variante(foto.foto.name, 320, 'webp')
+        self.assertEqual((webp.format, webp.size), ('WEBP', (320, 160)))
+        jpeg = self.abrir_variante(foto.foto.name, 640, 'jpeg')
+        self.assertEqual((jpeg.format, jpeg.size), ('JPEG', (640, 320)))
+
+        item = self.client.get(reverse('imoveis')).json()['results'][0]['fotos'][0]
+        base = f"/media/variantes/{foto.foto.name.rsplit('.', 1)[0]}"
+        self.assertEqual(item['srcset'], {
+            'webp': f"{base}/320.webp 320w, {base}/640.webp 640w",
+            'jpeg': f"{base}/320.jpeg 320w, {base}/640.jpeg 640w",
+        })
+
+    def test_nao_amplia_imagens_pequenas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            banner = BannerCarrossel.objects.create(imagem=imagem_de_teste('banner.jpg', (300, 100)))
+        self.assertEqual(self.abrir_variante(banner.imagem.name, 640, 'webp').size, (300, 100))
+        # A variante de 320 já tem a largura real do original; a de 640 repetiria a mesma imagem
+        base = f"/media/variantes/{banner.imagem.name.rsplit('.', 1)[0]}"
+        self.assertEqual(self.client.get(reverse('banners')).json()[0]['imagem_srcset']['webp'], f"{base}/320.webp 300w")
+
+    def test_srcset_so_com_variantes_gravadas(self):
+        imovel = criar_imovel()
+        with self.captureOnCommitCallbacks(execute=False):
+            foto = ImovelFoto.objects.create(imovel=imovel, foto=imagem_de_teste('casa.jpg', (800, 600)))
+        # Antes da geração: sem srcset, e o admin mostra o original
+        self.assertIsNone(self.client.get(reverse('imoveis')).json()['results'][0]['fotos'][0]['srcset'])
+        self.assertEqual(foto.foto.url, menor_variante(foto.foto, foto.variantes))
+
+        gerar_variantes(default_storage, foto.foto.name)
+        self.assertIsNotNone(self.client.get(reverse('imoveis')).json()['results'][0]['fotos'][0]['srcset'])
+
+        # Arquivo trocado: as variantes registradas eram do anterior
+        foto.refresh_from_db()
+        foto.foto.name = 'imoveis/outra.jpg'
+        self.assertIsNone(foto.srcset)
+
+    def test_logo_com_transparencia(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            configuracao = Configuracao.objects.create(logo=imagem_de_teste('logo.png', (800, 800), 'RGBA', 'PNG'))
+        self.assertEqual(self.abrir_variante(configuracao.logo.name, 320, 'webp').mode, 'RGBA')
+        self.assertEqual(self.abrir_variante(configuracao.logo.name, 320, 'jpeg').mode, 'RGB')
+        configuracao.refresh_from_db()
+        self.assertIn('/320.webp', configuracao.logo_tag())
+
+    def test_comando_regenera_midia_existente(self):
+        nome = default_storage.save('about/equipe.jpg', imagem_de_teste('equipe.jpg', (1200, 800)))
+        About.objects.bulk_create([About(foto=nome, descricao='Sobre')])  # sem sinais
+        ImovelFoto.objects.bulk_create([ImovelFoto(imovel=criar_imovel(), url_externa='https://cdn.example.com/a.jpg')])
+
+        out = StringIO()
+        call_command('gerar_variantes', stdout=out)
+        self.assertIn('1 imagens verificadas, 4 variantes gravadas', out.getvalue())
+        self.assertEqual(self.abrir_variante(nome, 640, 'jpeg').size, (640, 427))
+        self.assertEqual(About.objects.get().variantes, {'arquivo': nome, 'larguras': [[320, 320], [640, 640]]})
+
+        out = StringIO()
+        call_command('gerar_variantes', stdout=out)
+        self.assertIn('0 variantes gravadas', out.getvalue())
+        call_command('gerar_variantes', '--forcar', stdout=out)
+        self.assertIn('4 variantes gravadas', out.getvalue())
+
+    def test_arquivo_invalido_nao_quebra_o_upload(self):
+        with self.assertLogs('project.imagens', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            About.objects.create(foto=SimpleUploadedFile('quebrada.jpg', b'nao e imagem'), descricao='x')
+        self.assertIsNone(self.client.get(reverse('abouts')).json()['foto_srcset'])
+
+
+
+class MidiaTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        override = override_settings(
+            MEDIA_ROOT=self.media,
+            IMAGENS={'LARGURAS': [320], 'QUALIDADE': 80, 'ASSINCRONO': False, 'WORKERS': 1},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.conteudo = bytes(range(256)) * 4
+
+    def test_upload_com_hash_do_conteudo(self):
+        imovel = criar_imovel()
+        primeira = ImovelFoto.objects.create(imovel=imovel, foto=imagem_de_teste('Casa Nova.JPG', (50, 50)))
+        segunda = ImovelFoto.objects.create(imovel=imovel, foto=imagem_de_teste('outra.jpg', (50, 50)))
+        self.assertRegex(primeira.foto.name, r'^imoveis/Casa_Nova\.[0-9a-f]{12}\.jpg$')
+        # Mesmo conteúdo, mesmo hash: o arquivo é reaproveitado
+        self.assertEqual(primeira.foto.name.split('.')[1], segunda.foto.name.split('.')[1])
+        # Regravar com outro conteúdo troca o hash em vez de acumular outro
+        nome = default_storage.save(primeira.foto.name, BytesIO(b'novo'))
+        self.assertRegex(nome, r'^imoveis/Casa_Nova\.[0-9a-f]{12}\.jpg$')
+        self.assertNotEqual(nome, primeira.foto.name)
+
+    def test_arquivo_com_hash_imutavel(self):
+        nome = default_storage.save('banners/topo.bin', BytesIO(self.conteudo))
+        response = self.client.get(f'/media/{nome}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Length'], str(len(self.conteudo)))
+
+        self.assertEqual(self.client.get(f'/media/{nome}', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        revalidacao = self.client.get(f'/media/{nome}', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(revalidacao.status_code, 304)
+        self.assertIn('immutable', revalidacao['Cache-Control'])
+
+    def test_arquivo_antigo_sem_hash(self):
+        os.makedirs(os.path.join(self.media, 'logos'))
+        with open(os.path.join(self.media, 'logos', 'logo.png'), 'wb') as arquivo:
+            arquivo.write(self.conteudo)
+        response = self.client.get('/media/logos/logo.png')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(self.client.post('/media/logos/logo.png').status_code, 405)
+        self.assertEqual(self.client.get('/media/logos/').status_code, 404)
+        self.assertEqual(self.client.get('/media/logos/..%2F..%2Fsettings.py').status_code, 404)
+
+    def test_range(self):
+        nome = default_storage.save('banners/video.bin', BytesIO(self.conteudo))
+        response = self.client.get(f'/media/{nome}', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.conteudo)}')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), self.conteudo[10:20])
+
+        final = self.client.get(f'/media/{nome}', HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(final.streaming_content), self.conteudo[-5:])
+        fora = self.client.get(f'/media/{nome}', HTTP_RANGE=f'bytes={len(self.conteudo)}-')
+        self.assertEqual((fora.status_code, fora['Content-Range']), (416, f'bytes */{len(self.conteudo)}'))
+        # If-Range de outra versão do arquivo: responde o arquivo inteiro
+        outra = self.client.get(f'/media/{nome}', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"antigo"')
+        self.assertEqual(outra.status_code, 200)
+
+    def test_intervalo(self):
+        self.assertEqual(intervalo('bytes=0-', 10), (0, 9))
+        self.assertEqual(intervalo('bytes=5-100', 10), (5, 9))
+        self.assertEqual(intervalo('bytes=-20', 10), (0, 9))
+        self.assertIsNone(intervalo('bytes=0-1,4-5', 10))
+        self.assertIsNone(intervalo('bytes=5-2', 10))
+        self.assertIsNone(intervalo('itens=0-1', 10))
+        self.assertIs(intervalo('bytes=-0', 10), False)
+
+    def test_offload(self):
+        nome = default_storage.save('imoveis/sala.jpg', BytesIO(self.conteudo))
+        with override_settings(MIDIA={**settings.MIDIA, 'OFFLOAD': 'x-accel-redirect'}):
+            response = self.client.get(f'/media/{nome}', HTTP_RANGE='bytes=0-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/_midia/{nome}')
+        self.assertEqual((response.content, response['Content-Type']), (b'', 'image/jpeg'))
+        self.assertIn('immutable', response['Cache-Control'])
+
+        with override_settings(MIDIA={**settings.MIDIA, 'OFFLOAD': 'x-sendfile'}):
+            response = self.client.get(f'/media/{nome}')
+        self.assertEqual(response['X-Sendfile'], default_storage.path(nome))
+
+    def test_estaticos_pre_comprimidos(self):
+        storage = ArmazenamentoEstatico(location=self.media)
+        css = storage.save('css/site.css', BytesIO(b'.imovel { color: red; }\n' * 100))
+        storage.save('css/mini.css', BytesIO(b'a{}'))
+        storage.save('logos/logo.png', BytesIO(self.conteudo))
+
+        processados = list(storage.post_process({'css/site.css': None, 'css/mini.css': None, 'logos/logo.png': None}))
+        self.assertEqual(processados, [('css/site.css', 'css/site.css.gz', True)])
+        with gzip.open(storage.path(f'{css}.gz')) as arquivo:
+            self.assertEqual(arquivo.read(), b'.imovel { color: red; }\n' * 100)
+        # Sem mudanças, o collectstatic seguinte não recomprime
+        self.assertEqual(list(storage.post_process({'css/site.css': None})), [])
+
+
+class EmpreendimentoProxyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.stub = SigaviStubServer().__enter__()
+        self.addCleanup(self.stub.__exit__)
+        self.addCleanup(pool().fechar)
+        self.ficha = {'Id': 88, 'Nome': 'Residencial Jardins', 'Fotos': []}
+        self.stub.respostas[FICHA_EMPREENDIMENTO.format(id=88)] = self.ficha
+        self.stub.respostas[FICHA_EMPREENDIMENTO.format(id=89)] = {'Id': 89, 'Nome': 'Torre Norte'}
+        self.configurar()
+
+    def configurar(self, **extra):
+        settings_override = override_settings(SIGAVI={
+            **settings.SIGAVI, 'BASE_URL': self.stub.url, 'PASSWORD': 'senha', 'TIMEOUT': 5, 'CACHE_TTL': 300, 'CACHE_STALE': 3600, **extra,
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def chamadas(self, caminho):
+        return self.stub.chamadas.count(caminho)
+
+    def test_token_reaproveitado_e_conexao_keep_alive(self):
+        for sigavi_id in (88, 89):
+            self.assertEqual(self.client.get(reverse('empreendimento', args=[sigavi_id])).status_code, 200)
+        self.assertEqual(self.chamadas(TOKEN_ENDPOINT), 1)
+        self.assertEqual(len(self.stub.httpd.conexoes), 1)
+
+    def test_ficha_em_cache_com_etag(self):
+        response = self.client.get(reverse('empreendimento', args=[88]))
+        self.assertEqual(response.json(), self.ficha)
+        response = self.client.get(reverse('empreendimento', args=[88]), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.chamadas(FICHA_EMPREENDIMENTO.format(id=88)), 1)
+
+    async def test_chamadas_lentas_ao_sigavi_nao_bloqueiam_o_servidor(self):
+        self.stub.httpd.latencia = 0.3
+        for sigavi_id in range(100, 104):
+            self.stub.respostas[FICHA_EMPREENDIMENTO.format(id=sigavi_id)] = {'Id': sigavi_id}
+        inicio = time.perf_counter()
+        respostas = await asyncio.gather(*[
+            self.async_client.get(reverse('empreendimento', args=[sigavi_id])) for sigavi_id in range(100, 104)
+        ])
+        # Em série seriam 4 x 0,3s; a view assíncrona espera o Sigavi fora do event loop
+        self.assertLess(time.perf_counter() - inicio, 0.9)
+        self.assertEqual([r.json()['Id'] for r in respostas], [100, 101, 102, 103])
+
+    def test_stale_while_revalidate(self):
+        self.configurar(CACHE_TTL=0)
+        url = reverse('empreendimento', args=[88])
+        self.client.get(url)
+        self.stub.respostas[FICHA_EMPREENDIMENTO.format(id=88)] = {**self.ficha, 'Nome': 'Novo nome'}
+
+        # Vencida: responde na hora com a versão antiga e revalida em segundo plano
+        self.assertEqual(self.client.get(url).json()['Nome'], 'Residencial Jardins')
+        for _ in range(100):
+            nome = self.client.get(url).json()['Nome']
+            if nome == 'Novo nome':
+                break
+            time.sleep(0.02)
+        self.assertEqual(nome, 'Novo nome')
+
+    def test_renova_token_recusado(self):
+        self.client.get(reverse('empreendimento', args=[88]))
+        self.stub.httpd.token_aceito = 'token-novo'
+        self.stub.respostas[TOKEN_ENDPOINT] = {'access_token': 'token-novo', 'expires_in': 3600}
+
+        self.assertEqual(self.client.get(reverse('empreendimento', args=[89])).status_code, 200)
+        self.assertEqual(self.chamadas(TOKEN_ENDPOINT), 2)
+
+    def test_renovacao_single_flight(self):
+        inicio = threading.Barrier(8)
+
+        def autenticar():
+            inicio.wait()
+            SigaviClient().authenticate()
+
+        threads = [threading.Thread(target=autenticar) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.chamadas(TOKEN_ENDPOINT), 1)
+
+    def test_token_sem_expires_in_usa_validade_padrao(self):
+        self.stub.respostas[TOKEN_ENDPOINT] = {'access_token': 'token-de-teste'}
+        for sigavi_id in (88, 89):
+            self.assertEqual(self.client.get(reverse('empreendimento', args=[sigavi_id])).status_code, 200)
+        self.assertEqual(self.chamadas(TOKEN_ENDPOINT), 1)
+
+    def test_erros_do_sigavi(self):
+        self.assertEqual(self.client.get(reverse('empreendimento', args=[404])).status_code, 404)
+        # 200 com corpo null: não é guardado como ficha
+        self.stub.respostas[FICHA_EMPREENDIMENTO.format(id=91)] = None
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse('empreendimento', args=[91])).status_code, 404)
+        self.assertEqual(self.chamadas(FICHA_EMPREENDIMENTO.format(id=91)), 2)
+        self.configurar(BASE_URL='http://127.0.0.1:1')
+        self.assertEqual(self.client.get(reverse('empreendimento', args=[90])).status_code, 502)
+
+
+class DisponibilidadeAgendaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        hoje = timezone.localdate()
+        self.segunda = hoje + datetime.timedelta(days=7 - hoje.weekday())
+        self.url = reverse('agendamentos-disponibilidade')
+
+    def agendar(self, hora, data=None, imovel_id='1201'):
+        return self.client.post(reverse('agendamentos'), {
+            'imovel_id': imovel_id, 'nome': 'Ana', 'email': 'ana@example.com', 'telefone': '11999990000',
+            'data_visita': (data or self.segunda).isoformat(), 'hora_visita': hora,
+        })
+
+    def consultar(self, **params):
+        params = {'imovel_id': '1201', 'from': self.segunda.isoformat(), **params}
+        return self.client.get(self.url, params)
+
+    def test_horarios_livres_por_dia(self):
+        self.agendar('10:00')
+        self.agendar('0900')  # formato antigo do frontend
+        self.agendar('11:00', imovel_id='1202')
+
+        dias = self.consultar(to=(self.segunda + datetime.timedelta(days=6)).isoformat()).json()['dias']
+
+        # Sábado e domingo não entram
+        self.assertEqual([dia['data'] for dia in dias], [(self.segunda + datetime.timedelta(days=n)).isoformat() for n in range(5)])
+        self.assertEqual(dias[0]['horarios'][:2], ['11:00', '12:00'])
+        self.assertEqual(len(dias[1]['horarios']), len(settings.AGENDA['HORARIOS']))
+
+    def test_cache_por_dia_invalidado_no_agendamento(self):
+        with self.assertNumQueries(1):
+            self.consultar(to=(self.segunda + datetime.timedelta(days=4)).isoformat())
+        with self.assertNumQueries(0):
+            self.consultar(to=(self.segunda + datetime.timedelta(days=4)).isoformat())
+
+        self.agendar('15:00')
+        with self.assertNumQueries(1):
+            dias = self.consultar(to=(self.segunda + datetime.timedelta(days=4)).isoformat()).json()['dias']
+        self.assertNotIn('15:00', dias[0]['horarios'])
+        self.assertIn('15:00', dias[1]['horarios'])
+
+    def test_horario_ocupado_retorna_409(self):
+        self.assertEqual(self.agendar('14:00').status_code, 201)
+        response = self.agendar('14:00')
+        self.assertEqual(response.status_code, 409)
+        self.assertNotIn('14:00', response.json()['horarios_livres'])
+        self.assertEqual(Agendamento.objects.count(), 1)
+
+    def test_409_ignora_cache_desatualizado(self):
+        # Reserva feita por outro worker: o cache deste processo não foi invalidado
+        self.consultar(to=self.segunda.isoformat())
+        Agendamento.objects.bulk_create([Agendamento(
+            imovel_id='1201', nome='Bia', email='bia@example.com', telefone='1',
+            data_visita=self.segunda, hora_visita='13:00',
+        )])
+        response = self.agendar('13:00')
+        self.assertEqual(response.status_code, 409)
+        self.assertNotIn('13:00', response.json()['horarios_livres'])
+
+    def test_constraint_no_banco(self):
+        self.agendar('16:00')
+        with self.assertRaises(IntegrityError):
+            Agendamento.objects.create(
+                imovel_id='1201', nome='Bia', email='bia@example.com', telefone='1',
+                data_visita=self.segunda, hora_visita='16:00',
+            )
+
+    def test_validacoes(self):
+        self.assertEqual(self.agendar('08:00').status_code, 400)
+        self.assertEqual(self.agendar('10:00', data=self.segunda - datetime.timedelta(days=7)).status_code, 400)
+        self.assertEqual(self.agendar('10:00', data=self.segunda + datetime.timedelta(days=5)).status_code, 400)
+        self.assertEqual(self.consultar(to=(self.segunda - datetime.timedelta(days=1)).isoformat()).status_code, 400)
+        self.assertEqual(self.consultar(to=(self.segunda + datetime.timedelta(days=100)).isoformat()).status_code, 400)
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+
+class LeadsSpoolTests(TestCase):
+    def setUp(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        # Intervalo longo: a descarga é feita pelo próprio teste
+        override = override_settings(LEADS_SPOOL={
+            'ATIVO': True, 'CAMINHO': os.path.join(pasta, 'leads.sqlite3'), 'DURABILIDADE': 'full',
+            'LOTE': 1000, 'INTERVALO': 3600,
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(lambda: spool._local.__dict__.clear())
+
+    def test_post_enfileira_e_descarga_em_lote(self):
+        for indice in range(5):
+            response = self.client.post(reverse('contact'), {
+                'nome': f'Lead {indice}', 'email': f'lead{indice}@example.com', 'telefone': '11', 'mensagem': 'Oi',
+            })
+            self.assertEqual(response.status_code, 202)
+        self.client.post(reverse('call-request'), {'name': 'Bia', 'email': 'bia@example.com', 'phone': '11'})
+        self.client.post(reverse('newsletter'), {'email': 'bia@example.com'})
+
+        self.assertEqual(Contact.objects.count(), 0)
+        self.assertEqual(spool.pendentes(), 7)
+        with self.assertNumQueries(5):  # savepoint + um INSERT por model + release
+            self.assertEqual(spool.descarregar(), 7)
+        self.assertEqual(Contact.objects.count(), 5)
+        self.assertEqual(CallRequest.objects.get().name, 'Bia')
+        self.assertTrue(NewsletterSubscriber.objects.filter(email='bia@example.com').exists())
+        self.assertEqual(spool.pendentes(), 0)
+
+    def test_fila_sobrevive_a_reinicio_e_falha_do_banco(self):
+        self.client.post(reverse('newsletter'), {'email': 'ana@example.com'})
+        self.assertEqual(spool._conexao().execute('PRAGMA synchronous').fetchone()[0], 2)  # FULL
+
+        spool._local.__dict__.clear()  # outro processo: nova conexão com o mesmo arquivo
+        with mock.patch.object(NewsletterSubscriber.objects, 'bulk_create', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                spool.descarregar()
+        self.assertEqual(spool.pendentes(), 1)
+
+        out = StringIO()
+        call_command('descarregar_leads', stdout=out)
+        self.assertIn('1 leads gravados, 0 pendentes', out.getvalue())
+        self.assertEqual(NewsletterSubscriber.objects.get().email, 'ana@example.com')
+
+    def test_lote_regravado_nao_duplica_leads(self):
+        self.client.post(reverse('contact'), {'nome': 'Ana', 'email': 'ana@example.com', 'telefone': '11', 'mensagem': 'Oi'})
+        self.client.post(reverse('call-request'), {'name': 'Bia', 'email': 'bia@example.com', 'phone': '11'})
+        linhas = spool._conexao().execute('SELECT modelo, dados, criado_em FROM fila').fetchall()
+        spool.descarregar()
+
+        # Queda entre o commit no banco principal e a remoção da fila: o lote volta para a fila
+        spool._conexao().executemany('INSERT INTO fila (modelo, dados, criado_em) VALUES (?, ?, ?)', linhas)
+        self.assertEqual(spool.descarregar(), 2)
+        self.assertEqual(Contact.objects.count(), 1)
+        self.assertEqual(CallRequest.objects.count(), 1)
+        self.assertIsNotNone(Contact.objects.get().id_fila)
+
+    def test_modo_sincrono_padrao(self):
+        with override_settings(LEADS_SPOOL={**settings.LEADS_SPOOL, 'ATIVO': False}):
+            response = self.client.post(reverse('call-request'), {'name': 'Caio', 'email': 'caio@example.com', 'phone': '11'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(CallRequest.objects.count(), 1)
+
+
+class NewsletterTests(TestCase):
+    def test_inscricao_com_um_insert_e_email_normalizado(self):
+        with self.assertNumQueries(3):  # savepoint + INSERT + release
+            response = self.client.post(reverse('newsletter'), {'email': '  Ana@Example.COM '})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['email'], 'ana@example.com')
+
+        response = self.client.post(reverse('newsletter'), {'email': 'ANA@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['message'], 'Email já cadastrado')
+        self.assertEqual(NewsletterSubscriber.objects.count(), 1)
+
+    def test_email_invalido(self):
+        self.assertEqual(self.client.post(reverse('newsletter'), {'email': 'nao-e-email'}).status_code, 400)
+        self.assertEqual(self.client.post(reverse('newsletter'), {}).json(), {'error': 'Email é obrigatório'})
+
+    def test_importacao_e_exportacao_em_lotes(self):
+        NewsletterSubscriber.objects.create(email='ja@example.com')
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        entrada = os.path.join(pasta, 'inscritos.csv')
+        with open(entrada, 'w', encoding='utf-8') as arquivo:
+            arquivo.write('email\n')
+            for indice in range(250):
+                arquivo.write(f'Pessoa{indice}@Example.com\n')
+            arquivo.write('JA@example.com\npessoa0@example.com\ninvalido\n\n')
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as consultas:
+            call_command('importar_newsletter', entrada, '--lote', '100', stdout=out)
+        self.assertIn('252 e-mails lidos, 250 novos inscritos, 2 inválidos', out.getvalue())
+        inserts = [q for q in consultas.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)  # 252 válidos em lotes de 100
+        self.assertTrue(NewsletterSubscriber.objects.filter(email='pessoa249@example.com').exists())
+
+        saida = os.path.join(pasta, 'export.csv')
+        call_command('exportar_newsletter', saida, '--lote', '50', stderr=StringIO())
+        with open(saida, encoding='utf-8') as arquivo:
+            linhas = arquivo.read().splitlines()
+        self.assertEqual(linhas[0], 'email,subscribed_at')
+        self.assertEqual(len(linhas), 252)
+        self.assertTrue(linhas[1].startswith('ja@example.com,'))
+
+
+class ExportacaoLeadsTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user('vendas', is_staff=True)
+        for indice in range(5):
+            Contact.objects.create(nome=f'Lead {indice}', email=f'lead{indice}@example.com', telefone='11', mensagem='Oi, "tudo" bem?')
+        Contact.objects.filter(nome='Lead 0').update(data_envio=timezone.make_aware(datetime.datetime(2025, 1, 10, 12)))
+        self.url = reverse('leads-export', args=['contatos'])
+
+    def baixar(self, **params):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_exige_staff(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_login(User.objects.create_user('comum'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_csv_com_cursor_incremental(self):
+        response, conteudo = self.baixar()
+        linhas = list(csv.reader(StringIO(conteudo)))
+        self.assertEqual(linhas[0], ['id', 'nome', 'email', 'telefone', 'mensagem', 'data_envio'])
+        self.assertEqual(len(linhas), 6)
+        self.assertEqual(linhas[1][4], 'Oi, "tudo" bem?')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+
+        cursor = response['X-Export-Cursor']
+        Contact.objects.create(nome='Novo', email='novo@example.com', telefone='11', mensagem='')
+        response, conteudo = self.baixar(cursor=cursor)
+        self.assertEqual([linha[1] for linha in csv.reader(StringIO(conteudo))][1:], ['Novo'])
+
+        response, conteudo = self.baixar(cursor=response['X-Export-Cursor'])
+        self.assertEqual(conteudo.count('\n'), 1)  # só o cabeçalho
+        self.assertEqual(response['X-Export-Cursor'], str(Contact.objects.latest('id').id))
+
+    def test_ndjson_com_intervalo_de_datas(self):
+        _, conteudo = self.baixar(formato='ndjson', desde='2025-01-01', ate='2025-01-31')
+        registros = [json.loads(linha) for linha in conteudo.splitlines()]
+        self.assertEqual([registro['nome'] for registro in registros], ['Lead 0'])
+        self.assertTrue(registros[0]['data_envio'].startswith('2025-01-10T12:00:00'))
+
+    def test_parametros_invalidos(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('leads-export', args=['clientes'])).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'desde': '2025-02-01', 'ate': '2025-01-01'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'formato': 'xml'}).status_code, 400)
+
+    def test_acao_do_admin(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', None))
+        agendamento = Agendamento.objects.create(
+            imovel_id='1201', nome='Ana', email='ana@example.com', telefone='11',
+            data_visita=datetime.date(2025, 1, 6), hora_visita='10:00', valor=Decimal('100.50'),
+        )
+        response = self.client.post(reverse('admin:project_agendamento_changelist'), {
+            'action': 'exportar_ndjson', '_selected_action': [agendamento.pk],
+        })
+        registro = json.loads(b''.join(response.streaming_content))
+        self.assertEqual((registro['nome'], registro['valor'], registro['data_visita']), ('Ana', '100.50', '2025-01-06'))
+
+    def test_memoria_constante_com_iterator(self):
+        self.client.force_login(self.staff)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url)
+            b''.join(response.streaming_content)
+        # Max(id) + uma leitura em blocos; sem carregar o queryset inteiro em cache
+        self.assertEqual(len([q for q in consultas.captured_queries if 'project_contact' in q['sql']]), 2)
+
+
+class AdminTests(QueryPlanMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', None))
+
+    def changelist(self, model, **params):
+        return self.client.get(reverse(f'admin:project_{model}_changelist'), params)
+
+    def test_changelist_sem_count_exato_e_sem_n_mais_1(self):
+        imovel = criar_imovel(titulo='Casa')
+        ImovelFoto.objects.bulk_create([ImovelFoto(imovel=imovel, url_externa=f'https://cdn/{i}.jpg', ordem=i) for i in range(30)])
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.changelist('imovelfoto')
+        self.assertEqual(response.status_code, 200)
+        sqls = [q['sql'] for q in consultas.captured_queries if 'project_imovelfoto' in q['sql']]
+        # Contagem limitada a LIMITE linhas + página; o imóvel vem no mesmo SELECT (list_select_related)
+        self.assertEqual(len(sqls), 2)
+        self.assertIn(f'LIMIT {EstimatedCountPaginator.LIMITE}', sqls[0])
+        self.assertFalse(any('FROM "project_imovel" ' in q['sql'] for q in consultas.captured_queries))
+
+    def test_contagem_exata_abaixo_do_limite_e_estimada_acima(self):
+        imovel = criar_imovel(titulo='Casa')
+        fotos = ImovelFoto.objects.bulk_create([ImovelFoto(imovel=imovel, url_externa='https://cdn/a.jpg') for _ in range(5)])
+        ImovelFoto.objects.filter(pk__in=[foto.pk for foto in fotos[1:]]).delete()
+        # Depois das exclusões o maior id (5) não é mais o total
+        self.assertEqual(self.changelist('imovelfoto').context['cl'].paginator.count, 1)
+
+        with mock.patch.object(EstimatedCountPaginator, 'LIMITE', 1), \
+                mock.patch.object(EstimatedCountPaginator, 'estimar', return_value=500):
+            self.assertEqual(self.changelist('imovelfoto').context['cl'].paginator.count, 500)
+
+    def test_busca_por_email_e_codigo_usa_igualdade(self):
+        Contact.objects.create(nome='Ana', email='ana@example.com', telefone='11', mensagem='')
+        Contact.objects.create(nome='Bia', email='bia@example.com', telefone='11', mensagem='')
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.changelist('contact', q='ANA@example.com')
+        self.assertEqual([c.nome for c in response.context['cl'].result_list], ['Ana'])
+        self.assertFalse(any('LIKE' in q['sql'] for q in consultas.captured_queries))
+
+        Agendamento.objects.create(
+            imovel_id='1201', nome='Ana', email='ana@example.com', telefone='11',
+            data_visita=datetime.date(2025, 1, 6), hora_visita='10:00',
+        )
+        response = self.changelist('agendamento', q='1201')
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+        self.assertEqual(len(self.changelist('agendamento', q='12').context['cl'].result_list), 0)
+
+    def test_busca_de_leads_por_nome_e_telefone_usa_indice(self):
+        Contact.objects.create(nome='Ana Souza', email='ana@example.com', telefone='(11) 99999-0000', mensagem='')
+        Contact.objects.create(nome='Mariana', email='mari@example.com', telefone='11', mensagem='')
+        CallRequest.objects.create(name='Ana', email='ana@example.com', phone='11988887777')
+        for model, params, esperados in [
+            ('contact', {'q': 'ana'}, ['Ana Souza']),
+            ('contact', {'q': 'ana sou'}, ['Ana Souza']),
+            ('contact', {'q': '(11) 99999-0000'}, ['Ana Souza']),
+            ('callrequest', {'q': 'Ana'}, ['Ana']),
+            ('callrequest', {'q': '11988887777'}, ['Ana']),
+        ]:
+            with self.subTest(model=model, **params), CaptureQueriesContext(connection) as consultas:
+                response = self.changelist(model, **params)
+                nomes = [getattr(lead, 'nome', None) or lead.name for lead in response.context['cl'].result_list]
+                self.assertEqual(nomes, esperados)
+                for consulta in consultas.captured_queries:
+                    if f'project_{model}' in consulta['sql']:
+                        self.assertNotIn('LIKE', consulta['sql'])
+                        # A contagem limitada lê a subquery inteira, mas a tabela vem pelo índice
+                        self.assertNotIn(f'SCAN project_{model}', self.plano(consulta['sql']))
+
+    def test_busca_de_imoveis_pelo_indice_textual(self):
+        criar_imovel(titulo='Cobertura com piscina')
+        criar_imovel(titulo='Studio compacto')
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.changelist('imovel', q='piscina')
+        self.assertEqual([i.titulo for i in response.context['cl'].result_list], ['Cobertura com piscina'])
+        self.assertTrue(any('MATCH' in q['sql'] for q in consultas.captured_queries))
+
+    def test_miniaturas_usam_variantes(self):
+        imovel = criar_imovel()
+        ImovelFoto.objects.create(
+            imovel=imovel, foto='imoveis/casa.jpg', ordem=1, variantes={'arquivo': 'imoveis/casa.jpg', 'larguras': [[320, 320]]},
+        )
+        response = self.client.get(reverse('admin:project_imovel_change', args=[imovel.pk]))
+        self.assertContains(response, caminho_variante('imoveis/casa.jpg', 320, 'webp'))
+
+
+class ImportacaoImoveisTests(TestCase):
+    CSV = (
+        "codigo,titulo,descricao,preco,tipo,area_total,bairro,cidade,destaque,fotos\n"
+        "10,Casa térrea,Quintal,450000.00,CASA,120,Moema,São Paulo,sim,https://cdn/a.jpg|https://cdn/b.jpg\n"
+        "11,Apartamento,Varanda,380000,APTO,65,Pinheiros,São Paulo,não,\n"
+        "12,Sem preço,,,APTO,65,Pinheiros,São Paulo,,\n"
+        "13,Tipo errado,,1,CHALE,1,Centro,São Paulo,,\n"
+    )
+
+    def importar_csv(self, conteudo=CSV, **opcoes):
+        return importar(ler_registros(StringIO(conteudo), 'csv'), origem='parceiro', **opcoes)
+
+    def test_cria_e_pula_registros_inalterados(self):
+        resultado = self.importar_csv()
+        self.assertEqual(
+            {k: resultado[k] for k in ('lidos', 'criados', 'atualizados', 'inalterados', 'invalidos')},
+            {'lidos': 4, 'criados': 2, 'atualizados': 0, 'inalterados': 0, 'invalidos': 2},
+        )
+        self.assertEqual(len(resultado['erros']), 2)
+        casa = Imovel.objects.get(sigavi_id='parceiro:10')
+        self.assertEqual((casa.preco, casa.destaque), (Decimal('450000.00'), True))
+        self.assertEqual(list(casa.fotos.order_by('ordem').values_list('url_externa', flat=True)), ['https://cdn/a.jpg', 'https://cdn/b.jpg'])
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = self.importar_csv()
+        self.assertEqual(resultado['inalterados'], 2)
+        # Só o SELECT das chaves do lote; nenhuma escrita
+        self.assertEqual(len(consultas), 1)
+
+    def test_atualiza_so_o_que_mudou(self):
+        self.importar_csv()
+        apto = Imovel.objects.get(sigavi_id='parceiro:11')
+        fotos_casa = set(ImovelFoto.objects.values_list('pk', flat=True))
+        alterado = self.CSV.replace('380000,APTO', '399000,APTO')
+        resultado = self.importar_csv(alterado)
+        self.assertEqual((resultado['atualizados'], resultado['inalterados']), (1, 1))
+        apto.refresh_from_db()
+        self.assertEqual(apto.preco, Decimal('399000.00'))
+        self.assertEqual(set(ImovelFoto.objects.values_list('pk', flat=True)), fotos_casa)
+
+        # NDJSON só com parte das colunas não apaga as demais
+        ndjson = json.dumps({'codigo': 11, 'preco': '410000', 'fotos': ['https://cdn/c.jpg']}) + '\n'
+        importar(ler_registros(StringIO(ndjson), 'ndjson'), origem='parceiro')
+        apto.refresh_from_db()
+        self.assertEqual((apto.preco, apto.bairro), (Decimal('410000.00'), 'Pinheiros'))
+        self.assertEqual(apto.fotos.get().url_externa, 'https://cdn/c.jpg')
+
+    def test_dry_run_e_comando(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        caminho = os.path.join(pasta, 'imoveis.csv')
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(self.CSV)
+
+        saida, progresso = StringIO(), StringIO()
+        call_command('importar_imoveis', caminho, '--dry-run', '--origem', 'parceiro', stdout=saida, stderr=progresso)
+        self.assertEqual(Imovel.objects.count(), 0)
+        self.assertIn('[dry-run] 4 lidos, 2 criados', saida.getvalue())
+        self.assertIn('registros/s', progresso.getvalue())
+
+        call_command('importar_imoveis', caminho, '--origem', 'parceiro', '--lote', '2', stdout=saida, stderr=StringIO())
+        self.assertEqual(Imovel.objects.filter(sigavi_id__startswith='parceiro:').count(), 2)
+        # Os imóveis importados entram na busca textual (triggers do índice FTS)
+        self.assertEqual(self.client.get(reverse('imoveis'), {'q': 'térrea'}).json()['results'][0]['titulo'], 'Casa térrea')
+
+        # Sem prefixo a chave se confundiria com os ids do Sigavi
+        with self.assertRaisesMessage(CommandError, 'vazia'):
+            call_command('importar_imoveis', caminho, '--origem', '', stdout=saida, stderr=StringIO())
+
+
+class ViewsAssincronasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for indice in range(3):
+            imovel = criar_imovel(titulo=f'Casa {indice}', destaque=indice == 1)
+            ImovelFoto.objects.create(imovel=imovel, url_externa=f'https://cdn/{indice}.jpg', ordem=0)
+        BannerCarrossel.objects.create(imagem='banners/a.jpg', ordem=1, ativo=True)
+
+    async def test_mesmo_json_que_o_cliente_sincrono(self):
+        for url, params in [(reverse('imoveis'), {'limit': 2}), (reverse('banners'), {}), (reverse('logo'), {})]:
+            sincrona = await sync_to_async(self.client.get)(url, params)
+            assincrona = await self.async_client.get(url, params)
+            self.assertEqual(assincrona.status_code, 200)
+            self.assertEqual(assincrona.json(), sincrona.json())
+            self.assertEqual(assincrona['Content-Type'], 'application/json')
+
+        response = await self.async_client.get(reverse('imoveis'), {'limit': 2})
+        proxima = await self.async_client.get(response.json()['next'])
+        self.assertEqual([i['titulo'] for i in proxima.json()['results']], ['Casa 0'])
+
+    async def test_etag_erros_e_metodos(self):
+        response = await self.async_client.get(reverse('banners'))
+        response = await self.async_client.get(reverse('banners'), headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual((await self.async_client.get(reverse('imoveis'), {'tipo': 'CASTELO'})).status_code, 400)
+        self.assertEqual((await self.async_client.delete(reverse('banners'))).status_code, 405)
+
+    async def test_usuario_logado_e_post(self):
+        usuario = await User.objects.acreate(username='admin', is_staff=True)
+        await self.async_client.aforce_login(usuario)
+        self.assertEqual((await self.async_client.get(reverse('abouts'))).status_code, 200)
+        response = await self.async_client.post(reverse('imoveis'), {
+            'titulo': 'Novo', 'descricao': 'x', 'preco': '100.00', 'tipo': 'CASA', 'area_total': '10',
+            'bairro': 'Centro', 'cidade': 'SP',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(await Imovel.objects.filter(titulo='Novo').aexists())
+
+
+class PerfilBancoTests(SimpleTestCase):
+    def setUp(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        self.caminho = os.path.join(pasta, 'concorrencia.sqlite3')
+
+    def config(self, **ambiente):
+        return connections.configure_settings(banco.configurar(settings.BASE_DIR, {'DB_NAME': self.caminho, **ambiente}))['default']
+
+    def pragmas(self, **ambiente):
+        conexao = DatabaseWrapper(self.config(**ambiente), 'perfil')
+        self.addCleanup(conexao.close)
+        with conexao.cursor() as cursor:
+            valores = {}
+            for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size'):
+                cursor.execute(f'PRAGMA {pragma}')
+                valores[pragma] = cursor.fetchone()[0]
+        return valores
+
+    def test_pragmas_aplicados_na_conexao(self):
+        valores = self.pragmas(SQLITE_JOURNAL_MODE='WAL', SQLITE_BUSY_TIMEOUT='2500')
+        self.assertEqual(valores, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 2500, 'cache_size': -20000})
+
+    def test_wal_so_quando_configurado(self):
+        # O journal_mode fica gravado no arquivo; sem SQLITE_JOURNAL_MODE o banco não é alterado
+        self.assertEqual(self.pragmas()['journal_mode'], 'delete')
+        self.assertFalse(os.path.exists(f'{self.caminho}-wal'))
+
+    def test_postgresql_e_motor_invalido(self):
+        config = banco.configurar(settings.BASE_DIR, {'DB_ENGINE': 'postgresql', 'DB_HOST': 'db'})['default']
+        self.assertEqual((config['ENGINE'], config['HOST'], config['CONN_HEALTH_CHECKS']), ('django.db.backends.postgresql', 'db', True))
+        self.assertNotIn('pool', config['OPTIONS'])
+        with self.assertRaises(ImproperlyConfigured):
+            banco.configurar(settings.BASE_DIR, {'DB_ENGINE': 'mysql'})
+
+    def test_leituras_e_escritas_simultaneas_sem_lock(self):
+        config = self.config(SQLITE_JOURNAL_MODE='WAL')
+        conexao = DatabaseWrapper(config, 'concorrencia')
+        conexao.cursor().execute('CREATE TABLE reserva (numero INTEGER)')
+        conexao.close()
+        erros = []
+
+        def cliente():
+            conexao = DatabaseWrapper(config, 'concorrencia')
+            connections['concorrencia'] = conexao
+            try:
+                for _ in range(25):
+                    # Lê e depois escreve na mesma transação (padrão de get_or_create/validações)
+                    with transaction.atomic(using='concorrencia'), conexao.cursor() as cursor:
+                        cursor.execute('SELECT COALESCE(MAX(numero), 0) FROM reserva')
+                        cursor.execute('INSERT INTO reserva VALUES (%s)', [cursor.fetchone()[0] + 1])
+                    with conexao.cursor() as cursor:
+                        cursor.execute('SELECT COUNT(*) FROM reserva')
+            except OperationalError as exc:
+                erros.append(exc)
+            finally:
+                conexao.close()
+                del connections['concorrencia']
+
+        threads = [threading.Thread(target=cliente) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(erros, [])
+        conexao = DatabaseWrapper(config, 'concorrencia')
+        self.addCleanup(conexao.close)
+        with conexao.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*), COUNT(DISTINCT numero) FROM reserva')
+            self.assertEqual(cursor.fetchone(), (200, 200))
+
+
+class DadosSinteticosTests(TestCase):
+    def catalogo(self):
+        return list(Imovel.objects.order_by('sigavi_id').values_list('sigavi_id', 'titulo', 'preco', 'latitude'))
+
+    def test_mesma_semente_gera_os_mesmos_dados(self):
+        totais = gerar(imoveis=30, fotos=2, semente=7, lote=8)
+        self.assertEqual(totais['imoveis'], 30)
+        self.assertEqual(totais['fotos'], ImovelFoto.objects.count())
+        self.assertEqual(totais['agendamentos'], Agendamento.objects.count())
+        self.assertEqual(Contact.objects.count(), 30)
+        primeiro = self.catalogo()
+
+        self.assertEqual(limpar(), 30)
+        gerar(imoveis=30, fotos=2, semente=7, lote=8)
+        self.assertEqual(self.catalogo(), primeiro)
+
+        limpar()
+        gerar(imoveis=30, fotos=2, semente=8)
+        self.assertNotEqual(self.catalogo(), primeiro)
+
+    def test_limpar_preserva_registros_reais(self):
+        real = criar_imovel(sigavi_id='123')
+        Contact.objects.create(nome='Cliente', email='cliente@example.com', telefone='1', mensagem='Oi')
+        gerar(imoveis=10, fotos=1)
+        limpar()
+        self.assertEqual(list(Imovel.objects.all()), [real])
+        self.assertEqual(Contact.objects.count(), 1)
+        self.assertFalse(NewsletterSubscriber.objects.exists())
+
+
+class BenchmarkApiTests(TestCase):
+    def test_cenarios_cobrem_todas_as_rotas(self):
+        rotas = {cenario.rota for cenario in benchmark.cenarios()}
+        self.assertEqual(rotas, {padrao.name for padrao in urls.urlpatterns})
+
+    def test_todos_os_cenarios_respondem(self):
+        cache.clear()
+        gerar(imoveis=20, fotos=1)
+        staff = User.objects.create_user('bench', is_staff=True)
+        sigavi = benchmark.iniciar_sigavi_simulado(0)
+        self.addCleanup(sigavi.shutdown)
+        config = {**settings.SIGAVI, 'BASE_URL': 'http://%s:%s' % sigavi.server_address, 'PASSWORD': 'senha'}
+        with override_settings(SIGAVI=config):
+            for cenario in benchmark.cenarios(Imovel.objects.first().pk):
+                with self.subTest(cenario=cenario.nome):
+                    resultado = benchmark.medir_cliente(cenario, 3, 1, staff)
+                    self.assertEqual(resultado['requisicoes'], 3)
+                    self.assertTrue(all(int(codigo) < 400 for codigo in resultado['status']), resultado['status'])
+                    self.assertLessEqual(resultado['p50_ms'], resultado['p99_ms'])
+                    self.assertGreater(resultado['pico_memoria_kb'], 0)
+
+        lista = benchmark.medir_cliente(benchmark.cenarios()[0], 2, 0, staff)
+        self.assertGreaterEqual(lista['queries'], 1)
+        cards = benchmark.medir_cliente(benchmark.cenarios()[1], 2, 0, staff)
+        self.assertLess(cards['bytes'], lista['bytes'])
+
+    def test_comparar_bench_aponta_regressoes(self):
+        def resultado(p95, queries, status='200', tamanho=4000):
+            medidas = {
+                'p50_ms': 1.0, 'p95_ms': p95, 'p99_ms': p95, 'queries': queries, 'pico_memoria_kb': 100.0,
+                'bytes': tamanho, 'renderizacao_ms': 0.1, 'status': {status: 10},
+            }
+            return {'meta': {'imoveis': 100}, 'cenarios': {'imoveis-lista': {'cliente': medidas}}}
+
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        arquivos = {}
+        for nome, dados in {
+            'base': resultado(10.0, 2), 'ruido': resultado(10.5, 2),
+            'lento': resultado(20.0, 2), 'n_mais_1': resultado(10.0, 22), 'erro': resultado(10.0, 2, '500'),
+            'pesado': resultado(10.0, 2, tamanho=40000),
+        }.items():
+            arquivos[nome] = os.path.join(pasta, f'{nome}.json')
+            with open(arquivos[nome], 'w', encoding='utf-8') as arquivo:
+                json.dump(dados, arquivo)
+
+        out = StringIO()
+        call_command('comparar_bench', arquivos['base'], arquivos['ruido'], stdout=out)
+        self.assertIn('Nenhuma regressão', out.getvalue())
+        for nome, trecho in [
+            ('lento', 'p95_ms 10.0 -> 20.0'), ('n_mais_1', 'queries'), ('erro', 'status'), ('pesado', '4000 -> 40000 bytes'),
+        ]:
+            out = StringIO()
+            with self.subTest(nome=nome), self.assertRaises(CommandError):
+                call_command('comparar_bench', arquivos['base'], arquivos[nome], stdout=out)
+            self.assertIn(trecho, out.getvalue())
+
+
+@override_settings(METRICAS={**settings.METRICAS, 'ATIVO': True, 'SERVER_TIMING': True})
+class MetricasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metricas.registro.limpar()
+        for indice in range(3):
+            imovel = criar_imovel(titulo=f'Casa {indice}')
+            ImovelFoto.objects.create(imovel=imovel, url_externa=f'https://cdn/{indice}.jpg', ordem=0)
+
+    def etapas(self, response):
+        return {
+            parte.split(';')[0].strip(): parte for parte in response['Server-Timing'].split(',')
+        }
+
+    def test_server_timing_separa_banco_serializacao_e_renderizacao(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('imoveis'), {'limit': 2})
+        etapas = self.etapas(response)
+        self.assertEqual(set(etapas), {'db', 'serializacao', 'renderizacao', 'total'})
+        self.assertIn(f'desc="{len(queries)} queries"', etapas['db'])
+
+        response = self.client.post(reverse('contact'), {
+            'nome': 'Ana', 'email': 'ana@example.com', 'telefone': '1', 'mensagem': 'Oi',
+        }, content_type='application/json')
+        self.assertIn('serializacao', self.etapas(response))
+
+    async def test_views_assincronas_tambem_sao_medidas(self):
+        response = await self.async_client.get(reverse('imoveis'), {'limit': 2})
+        etapas = self.etapas(response)
+        self.assertIn('desc="2 queries"', etapas['db'])
+        self.assertIn('serializacao', etapas)
+
+    def test_metrics_expoe_histograma_por_rota(self):
+        self.client.get(reverse('imoveis'))
+        self.client.get(reverse('imoveis'))
+        self.client.get(reverse('imoveis'), {'tipo': 'CASTELO'})
+        self.client.get('/api/nao-existe/')
+        texto = self.client.get(reverse('metrics')).content.decode()
+        pid = os.getpid()
+        self.assertIn(
+            f'imobiliaria_http_requisicao_segundos_count{{rota="api/imoveis/",metodo="GET",status="200",pid="{pid}"}} 2',
+            texto,
+        )
+        self.assertIn(f'rota="api/imoveis/",metodo="GET",status="400",pid="{pid}",le="+Inf"}} 1', texto)
+        self.assertIn('rota="desconhecida",metodo="GET",status="404"', texto)
+        self.assertRegex(texto, r'imobiliaria_http_queries_total\{rota="api/imoveis/",metodo="GET",status="200".*\} 4')
+
+    @override_settings(METRICAS={**settings.METRICAS, 'ATIVO': True, 'TOKEN': 'segredo'})
+    def test_metrics_com_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer segredo'})
+        self.assertEqual(response.status_code, 200)
+        # Cabeçalho com caracteres fora do ASCII: 401, não erro 500
+        self.assertEqual(self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer señha'}).status_code, 401)
+
+    @override_settings(METRICAS={**settings.METRICAS, 'ATIVO': False})
+    def test_metrics_desligado(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+    def test_log_amostrado_de_queries_lentas(self):
+        with override_settings(METRICAS={**settings.METRICAS, 'QUERY_LENTA_MS': 0.000001}):
+            with self.assertLogs('project.metricas', 'WARNING') as logs:
+                self.client.get(reverse('imoveis'), {'limit': 2})
+            self.assertIn('/api/imoveis/', logs.output[0])
+        with override_settings(METRICAS={**settings.METRICAS, 'QUERY_LENTA_MS': 0.000001, 'AMOSTRAGEM_QUERIES_LENTAS': 0}):
+            with self.assertNoLogs('project.metricas', 'WARNING'):
+                self.client.get(reverse('imoveis'), {'limit': 2})
+
+
+class NMaisUmTests(SemNMaisUmMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        for indice in range(4):
+            imovel = criar_imovel(titulo=f'Casa {indice}')
+            ImovelFoto.objects.create(imovel=imovel, url_externa=f'https://cdn/{indice}.jpg', ordem=0)
+
+    def test_impressao_digital_ignora_literais_e_tamanho_do_in(self):
+        self.assertEqual(
+            impressao_digital("SELECT * FROM t WHERE a = 'x' AND b IN (%s, %s, %s) LIMIT 21"),
+            impressao_digital("SELECT * FROM t WHERE a = 'y' AND b IN (%s) LIMIT 21"),
+        )
+
+    def test_aponta_relacao_campo_do_serializer_e_pilha(self):
+        with self.assertRaises(AssertionError) as erro, self.assertSemNMaisUm():
+            ImovelSerializer(Imovel.objects.order_by('id'), many=True).data
+        mensagem = str(erro.exception)
+        self.assertIn('N+1 em Imovel.fotos (campo ImovelSerializer.fotos): 4 consultas iguais', mensagem)
+        self.assertIn('project/tests.py', mensagem)
+
+        with self.assertRaises(AssertionError) as erro, self.assertSemNMaisUm():
+            [foto.imovel.titulo for foto in ImovelFoto.objects.all()]
+        self.assertIn('N+1 em ImovelFoto.imovel:', str(erro.exception))
+
+        with self.assertSemNMaisUm():
+            ImovelSerializer(ImovelSerializer.preparar_queryset(Imovel.objects.all()), many=True).data
+            # Consultas repetidas que não vêm de relações não são N+1
+            for _ in range(4):
+                Imovel.objects.filter(destaque=True).exists()
+
+    def test_middleware_levanta_ou_loga(self):
+        def view(request):
+            ImovelSerializer(Imovel.objects.all(), many=True).data
+            return HttpResponse()
+
+        request = RequestFactory().get('/api/imoveis/')
+        with self.assertRaisesMessage(NMaisUmDetectado, 'GET /api/imoveis/\nN+1 em Imovel.fotos'):
+            NMaisUmMiddleware(view)(request)
+        with override_settings(N_MAIS_UM={**settings.N_MAIS_UM, 'LEVANTAR': False}):
+            with self.assertLogs('project.n_mais_um', 'WARNING'):
+                NMaisUmMiddleware(view)(request)
+
+    def test_endpoints_sem_n_mais_um(self):
+        gerar(imoveis=20, fotos=3)
+        staff = User.objects.create_user('n1', is_staff=True)
+        self.client.force_login(staff)
+        sigavi = benchmark.iniciar_sigavi_simulado(0)
+        self.addCleanup(sigavi.shutdown)
+        config = {**settings.SIGAVI, 'BASE_URL': 'http://%s:%s' % sigavi.server_address, 'PASSWORD': 'senha'}
+        with override_settings(SIGAVI=config):
+            for cenario in benchmark.cenarios(Imovel.objects.first().pk):
+                with self.subTest(cenario=cenario.nome), self.assertSemNMaisUm():
+                    response = cenario.executar(self.client, 0)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    self.assertLess(response.status_code, 400)
+
+
+class BootstrapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        criar_imovel(titulo='Destaque', destaque=True)
+        criar_imovel(titulo='Comum')
+        criar_imovel(titulo='Vendido', destaque=True, disponivel=False)
+        BannerCarrossel.objects.create(imagem='banners/a.jpg', ordem=1, ativo=True)
+        BannerCarrossel.objects.create(imagem='banners/b.jpg', ordem=2, ativo=False)
+        About.objects.create(foto='about/a.jpg', descricao='Quem somos')
+        lancamento = Lancamento.objects.create(sigavi_id='10', nome='Residencial', destaque=True)
+        lancamento.fotos.create(url='https://cdn/l.jpg', ordem=0)
+        Lancamento.objects.create(sigavi_id='11', nome='Encerrado', ativo=False)
+        Corretor.objects.create(sigavi_id='20', nome='Ana')
+
+    def test_junta_o_conteudo_da_home(self):
+        dados = self.client.get(reverse('bootstrap')).json()
+        self.assertEqual(set(dados), {'logo', 'banners', 'about', 'destaques', 'lancamentos', 'corretores'})
+        self.assertEqual(dados['banners'], self.client.get(reverse('banners')).json())
+        self.assertEqual(dados['about']['descricao'], 'Quem somos')
+        self.assertEqual([imovel['titulo'] for imovel in dados['destaques']], ['Destaque'])
+        self.assertEqual([(l['nome'], len(l['fotos'])) for l in dados['lancamentos']], [('Residencial', 1)])
+        self.assertEqual([corretor['nome'] for corretor in dados['corretores']], ['Ana'])
+
+    def test_cache_com_um_etag_invalidado_por_qualquer_grupo(self):
+        etag = self.client.get(reverse('bootstrap'))['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('bootstrap'), headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        for alterar in [
+            lambda: BannerCarrossel.objects.create(imagem='banners/c.jpg', ordem=3),
+            lambda: Corretor.objects.create(sigavi_id='21', nome='Bruno'),
+            lambda: Lancamento.objects.get(sigavi_id='10').fotos.create(url='https://cdn/l2.jpg', ordem=1),
+            lambda: criar_imovel(titulo='Outro destaque', destaque=True),
+        ]:
+            alterar()
+            response = self.client.get(reverse('bootstrap'), headers={'If-None-Match': etag})
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
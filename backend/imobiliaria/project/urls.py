@@ -1,13 +1,19 @@
 from django.urls import path
-from .views import ImovelView, LogoView, AboutView, ContactView, NewsletterView, CallRequestView, AgendamentoView, BannerCarrosselView
+from .views import ImovelView, ImovelFacetsView, ImovelMapaView, EmpreendimentoView, LogoView, AboutView, ContactView, NewsletterView, CallRequestView, AgendamentoView, DisponibilidadeView, LeadsExportView, BannerCarrosselView, BootstrapView
 
 urlpatterns = [
     path('imoveis/', ImovelView.as_view(), name='imoveis'),
+    path('imoveis/facets/', ImovelFacetsView.as_view(), name='imoveis-facets'),
+    path('imoveis/map/', ImovelMapaView.as_view(), name='imoveis-map'),
+    path('empreendimentos/<int:sigavi_id>/', EmpreendimentoView.as_view(), name='empreendimento'),
     path('logo/', LogoView.as_view(), name='logo'),
     path('abouts/', AboutView.as_view(), name='abouts'),
     path('contact/', ContactView.as_view(), name='contact'),
     path('newsletter/', NewsletterView.as_view(), name='newsletter'),
     path('call-request/', CallRequestView.as_view(), name='call-request'),
     path('agendamentos/', AgendamentoView.as_view(), name='agendamentos'),
+    path('agendamentos/disponibilidade/', DisponibilidadeView.as_view(), name='agendamentos-disponibilidade'),
+    path('leads/export/<str:tipo>/', LeadsExportView.as_view(), name='leads-export'),
     path('banners/', BannerCarrosselView.as_view(), name='banners'),
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
 ]
\ No newline at end of file
@@ -1,55 +1,187 @@
+import hmac
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Imovel, Configuracao, About, BannerCarrossel, NewsletterSubscriber
-from .serializers import ImovelSerializer, NewsletterSubscriberSerializer, CallRequestSerializer, AboutSerializer, ContactSerializer, AgendamentoSerializer, BannerCarrosselSerializer
-from django.http import JsonResponse
+from .models import Imovel, Configuracao, About, BannerCarrossel, Lancamento, Corretor
+from .serializers import ImovelSerializer, ImovelListSerializer, NewsletterSubscriberSerializer, CallRequestSerializer, AboutSerializer, ContactSerializer, AgendamentoSerializer, BannerCarrosselSerializer, LancamentoSerializer, CorretorSerializer
+from .filters import filtrar_imoveis, ordenar_imoveis, validar_filtros
+from .campos import Selecao
+from .pagination import KeysetPagination
+from .facets import calcular_facets
+from .mapa import MapaSerializer, marcadores
+from .caching import aresposta_condicional, aversoes, com_etag, obter_com_revalidacao, obter_ou_calcular, responder_com_etag
+from .assincrono import AsyncAPIView
+from .sigavi import SigaviClient, SigaviError, executor as sigavi_executor
+from .agenda import DisponibilidadeSerializer, disponibilidade
+from . import spool
+from .newsletter import inscrever
+from .metricas import registro
+from . import midia
+from .exportacao import EXPORTACOES, ExportacaoFiltroSerializer, filtrar, resposta_streaming
+from rest_framework.permissions import IsAdminUser
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, JsonResponse
 from django.conf import settings
 from django.templatetags.static import static
 from django.views import View
+from django.views.decorators.http import require_safe
+from asgiref.sync import sync_to_async
 
-class ImovelView(APIView):
-    def post(self, request):
+class ImovelView(AsyncAPIView):
+    async def post(self, request):
+        return await sync_to_async(self.criar)(request)
+
+    def criar(self, request):
         serializer = ImovelSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    async def get(self, request):
+        filtros = validar_filtros(request.query_params)
+        # ?fields=, ?omit= e ?perfil=card (project/campos.py)
+        selecao = Selecao.da_requisicao(request.query_params, ImovelListSerializer.perfis)
+        imoveis, ordenacao = ordenar_imoveis(filtrar_imoveis(Imovel.objects.all(), filtros), filtros)
+        imoveis = ImovelListSerializer.queryset(imoveis, selecao)
+        paginator = KeysetPagination(ordenacao)
+        pagina = await paginator.apaginate_queryset(imoveis, request, view=self)
+        return paginator.get_paginated_response(await ImovelListSerializer(pagina, selecao).adata())
+
+class ImovelFacetsView(APIView):
     def get(self, request):
-        disponivel = request.query_params.get('disponivel')
-        if disponivel is not None:
-            imoveis = Imovel.objects.filter(disponivel=disponivel.lower() == 'true')
-        else:
-            imoveis = Imovel.objects.all()
-        serializer = ImovelSerializer(imoveis, many=True)
-        return Response(serializer.data)
-
-class LogoView(APIView):
+        filtros = validar_filtros(request.query_params)
+        filtros.pop('ordenacao', None)
+        facets = obter_ou_calcular(
+            'imoveis', 'facets',
+            lambda: calcular_facets(Imovel.objects.all(), filtros),
+            parametros=filtros,
+        )
+        return Response(facets)
+
+class ImovelMapaView(APIView):
     def get(self, request):
-        configuracao = Configuracao.objects.first()
-        if configuracao and configuracao.get_logo_url():
-            logo_url = configuracao.get_logo_url()
-        else:
+        mapa = MapaSerializer(data=request.query_params.dict())
+        mapa.is_valid(raise_exception=True)
+        imoveis = filtrar_imoveis(Imovel.objects.all(), validar_filtros(request.query_params))
+        return Response(marcadores(imoveis, mapa.validated_data['bbox'], mapa.validated_data['zoom']))
+
+class LogoView(AsyncAPIView):
+    async def get(self, request):
+        # A URL de fallback é absoluta, então o cache é separado por host
+        return await aresposta_condicional(
+            request, 'configuracao', 'logo', lambda: self.calcular(request), parametros={'host': request.get_host()}
+        )
+
+    async def calcular(self, request):
+        configuracao = await Configuracao.objects.afirst()
+        logo_url = configuracao.get_logo_url() if configuracao else None
+        if not logo_url:
             # Use the default file name from the model or fallback to a static file
-            default_logo_name = configuracao.logo.name if configuracao and configuracao.logo else 'logos/banner_1.png'
-            logo_url = request.build_absolute_uri(static(default_logo_name))
-        return Response({"logoUrl": logo_url}, status=status.HTTP_200_OK)
+            logo_url = request.build_absolute_uri(static('logos/banner_1.png'))
+            return {"logoUrl": logo_url, "logoSrcset": None}
+        return {"logoUrl": logo_url, "logoSrcset": configuracao.logo_srcset}
+
+class EmpreendimentoView(AsyncAPIView):
+    # Proxy da ficha técnica do Sigavi: o token fica no servidor e a ficha em cache
+    async def get(self, request, sigavi_id):
+        config = settings.SIGAVI
+        try:
+            # O cliente do Sigavi é bloqueante: roda no executor do Sigavi, sem ocupar o
+            # event loop nem a thread das queries enquanto o Sigavi responde
+            entrada = await sync_to_async(obter_com_revalidacao, thread_sensitive=False, executor=sigavi_executor())(
+                'lancamentos', f'ficha:{sigavi_id}', lambda: com_etag(SigaviClient().ficha_empreendimento(sigavi_id)),
+                config['CACHE_TTL'], config['CACHE_STALE'],
+            )
+        except SigaviError as exc:
+            if exc.status == 404:
+                return Response({"error": "Empreendimento não encontrado"}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"error": "Sigavi indisponível"}, status=status.HTTP_502_BAD_GATEWAY)
+        return responder_com_etag(request, entrada)
+
+class LeadsExportView(APIView):
+    # Exportação para o CRM (usuários staff, via sessão ou Basic Auth)
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, tipo):
+        exportacao = EXPORTACOES.get(tipo)
+        if exportacao is None:
+            return Response({"error": f"Tipo inválido. Use: {', '.join(EXPORTACOES)}"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = ExportacaoFiltroSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filtros = serializer.validated_data
+        queryset = filtrar(
+            exportacao, exportacao.model.objects.all(), filtros.get('desde'), filtros.get('ate'), filtros.get('cursor')
+        )
+        return resposta_streaming(exportacao, queryset, filtros['formato'], tipo, filtros.get('cursor'))
 
 def logo_view(request):
     return JsonResponse({"message": "Logo endpoint response"})
 
-class AboutView(APIView):
-    def get(self, request):
-        about = About.objects.first()  # Retorna o primeiro registro (ou ajuste conforme necessário)
-        serializer = AboutSerializer(about)
-        return Response(serializer.data)
+def metricas_view(request):
+    # Histogramas por rota no formato texto do Prometheus; com METRICAS['TOKEN'], só com o Bearer
+    if not settings.METRICAS['ATIVO']:
+        raise Http404
+    token = settings.METRICAS['TOKEN']
+    # Comparação em bytes: compare_digest recusa str com caracteres fora do ASCII
+    autorizacao = request.headers.get('Authorization', '').encode()
+    if token and not hmac.compare_digest(autorizacao, f'Bearer {token}'.encode()):
+        return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+    return HttpResponse(registro.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
-class BannerCarrosselView(APIView):
-    def get(self, request):
-        banners = BannerCarrossel.objects.filter(ativo=True).order_by('ordem')
-        serializer = BannerCarrosselSerializer(banners, many=True)
-        return Response(serializer.data)
+@require_safe
+def midia_view(request, caminho):
+    # Fallback para quando o nginx não serve /media/ direto (ver MIDIA em settings.py)
+    return midia.servir(request, caminho)
+
+class AboutView(AsyncAPIView):
+    async def get(self, request):
+        return await aresposta_condicional(request, 'about', 'about', self.calcular)
+
+    async def calcular(self):
+        about = await About.objects.afirst()  # Retorna o primeiro registro (ou ajuste conforme necessário)
+        return AboutSerializer(about).data
+
+class BannerCarrosselView(AsyncAPIView):
+    async def get(self, request):
+        return await aresposta_condicional(request, 'banners', 'ativos', self.calcular)
+
+    async def calcular(self):
+        banners = [banner async for banner in BannerCarrossel.objects.filter(ativo=True).order_by('ordem')]
+        return BannerCarrosselSerializer(banners, many=True).data
+
+class BootstrapView(AsyncAPIView):
+    # Tudo o que a home mostra antes do primeiro paint numa resposta só, com um ETag. A chave do
+    # cache leva a versão de cada grupo: qualquer invalidação (admin, sincronização do Sigavi,
+    # importação) gera um payload novo, e sem mudanças a resposta sai do cache sem consultar o banco.
+    # O frontend ainda não o consome: Header, Footer e Home continuam buscando logo e banners separados
+    grupos = ['configuracao', 'banners', 'about', 'imoveis', 'lancamentos', 'corretores']
+    limite_destaques = 12
+    limite_lancamentos = 12
+
+    async def get(self, request):
+        parametros = {'host': request.get_host(), **await aversoes(self.grupos)}
+        return await aresposta_condicional(request, 'bootstrap', 'home', lambda: self.calcular(request), parametros)
+
+    async def calcular(self, request):
+        destaques = Imovel.objects.filter(destaque=True, disponivel=True).order_by('-data_criacao', '-id')
+        linhas = [row async for row in ImovelListSerializer.queryset(destaques)[:self.limite_destaques]]
+        return {
+            'logo': await LogoView().calcular(request),
+            'banners': await BannerCarrosselView().calcular(),
+            'about': await AboutView().calcular(),
+            'destaques': await ImovelListSerializer(linhas).adata(),
+            **await sync_to_async(self.lancamentos_e_corretores)(),
+        }
+
+    def lancamentos_e_corretores(self):
+        # Lançamentos e corretores sincronizados do Sigavi (substituem as buscas feitas pelo navegador)
+        lancamentos = Lancamento.objects.filter(ativo=True).prefetch_related('fotos').order_by('-destaque', 'nome')
+        return {
+            'lancamentos': LancamentoSerializer(lancamentos[:self.limite_lancamentos], many=True).data,
+            'corretores': CorretorSerializer(Corretor.objects.filter(ativo=True).order_by('nome'), many=True).data,
+        }
 
 class ContactView(View):
     def get(self, request):
@@ -61,40 +193,60 @@ class NewsletterView(APIView):
         email = request.data.get('email')
         if not email:
             return Response({"error": "Email é obrigatório"}, status=status.HTTP_400_BAD_REQUEST)
-            
-        # Verifique se o email já existe
-        if NewsletterSubscriber.objects.filter(email=email).exists():
-            return Response({"error": "Email já cadastrado"}, status=status.HTTP_400_BAD_REQUEST)
-            
+
         serializer = NewsletterSubscriberSerializer(data={'email': email})
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-            
-        # Log detalhado dos erros de validação
-        print("Serializer errors:", serializer.errors)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if spool.ativo():
+            return Response(serializer.data, status=spool.salvar_ou_enfileirar(serializer))
+
+        inscrito, criado = inscrever(serializer.validated_data['email'])
+        if not criado:
+            # Inscrição repetida não é erro: a resposta é a mesma para quem já está na lista
+            return Response({"email": inscrito.email, "message": "Email já cadastrado"}, status=status.HTTP_200_OK)
+        return Response(NewsletterSubscriberSerializer(inscrito).data, status=status.HTTP_201_CREATED)
 
 class CallRequestView(APIView):
     def post(self, request):
         serializer = CallRequestSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            codigo = spool.salvar_ou_enfileirar(serializer)
+            return Response(serializer.data, status=codigo)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 class ContactView(APIView):
     def post(self, request):
         serializer = ContactSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            codigo = spool.salvar_ou_enfileirar(serializer)
+            return Response(serializer.data, status=codigo)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 class AgendamentoView(APIView):
     def post(self, request):
         serializer = AgendamentoSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except IntegrityError:
+                # Outro visitante reservou o mesmo horário (constraint agendamento_horario_unico);
+                # os horários livres vêm do banco, o cache deste worker pode não ter a reserva
+                dados = serializer.validated_data
+                dia = disponibilidade(dados['imovel_id'], dados['data_visita'], dados['data_visita'], usar_cache=False)
+                return Response({
+                    "error": "Este horário acabou de ser reservado. Escolha outro horário.",
+                    "horarios_livres": dia[0]['horarios'] if dia else [],
+                }, status=status.HTTP_409_CONFLICT)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class DisponibilidadeView(APIView):
+    def get(self, request):
+        serializer = DisponibilidadeSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filtros = serializer.validated_data
+        return Response({
+            'imovel_id': filtros['imovel_id'],
+            'dias': disponibilidade(filtros['imovel_id'], filtros['inicio'], filtros['fim']),
+        })
\ No newline at end of file
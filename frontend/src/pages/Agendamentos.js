@@ -64,12 +64,35 @@ const Agendamentos = () => {
   const [showForm, setShowForm] = useState(false);
   const [openSnackbar, setOpenSnackbar] = useState(false);
 
-  // Horários disponíveis
-  const horariosDisponiveis = [
-    '09:00', '10:00', '11:00', '12:00', 
-    '13:00', '14:00', '15:00', '16:00', 
-    '17:00', '18:00'
-  ];
+  // Horários livres do dia escolhido (calculados no backend)
+  const [horariosDisponiveis, setHorariosDisponiveis] = useState([]);
+  const [carregandoHorarios, setCarregandoHorarios] = useState(false);
+
+  useEffect(() => {
+    if (!dataVisita || !state?.imovel_id) {
+      setHorariosDisponiveis([]);
+      return;
+    }
+    const dia = format(dataVisita, "yyyy-MM-dd");
+    const params = new URLSearchParams({ imovel_id: state.imovel_id, from: dia, to: dia });
+    let cancelado = false;
+
+    setCarregandoHorarios(true);
+    fetch(`http://127.0.0.1:8000/api/agendamentos/disponibilidade/?${params}`)
+      .then((response) => (response.ok ? response.json() : { dias: [] }))
+      .then((data) => {
+        if (cancelado) return;
+        const horarios = data.dias[0]?.horarios || [];
+        setHorariosDisponiveis(horarios);
+        setHoraVisita((atual) => (horarios.includes(atual) ? atual : ""));
+      })
+      .catch(() => !cancelado && setHorariosDisponiveis([]))
+      .finally(() => !cancelado && setCarregandoHorarios(false));
+
+    return () => {
+      cancelado = true;
+    };
+  }, [dataVisita, state?.imovel_id]);
 
   // Fechar o Snackbar
   const handleCloseSnackbar = (event, reason) => {
@@ -151,6 +174,15 @@ const Agendamentos = () => {
         body: JSON.stringify(agendamentoData),
       });
       
+      if (response.status === 409) {
+        // Horário reservado por outra pessoa enquanto o formulário estava aberto
+        const conflito = await response.json();
+        setHorariosDisponiveis(conflito.horarios_livres || []);
+        setHoraVisita("");
+        setError(conflito.error);
+        return;
+      }
+
       if (response.status === 201) {
         setSuccess(true);
         setOpenSnackbar(true);
@@ -383,6 +415,7 @@ const Agendamentos = () => {
                     value={horaVisita}
                     onChange={(e) => setHoraVisita(e.target.value)}
                     required
+                    disabled={!dataVisita || carregandoHorarios}
                     label="Horário da Visita *"
                   >
                     {horariosDisponiveis.map((horario) => (
@@ -70,6 +70,8 @@ import { AdapterDateFns } from "@mui/x-date-pickers/AdapterDateFns";
 import { format } from "date-fns";
 import ptBR from 'date-fns/locale/pt-BR';
 
+const LOCAL_API_BASE_URL = "http://127.0.0.1:8000"; // Backend Django
+
 // Mapeamento de ícones para características
 const characteristicIcons = {
   'dormitório': <BedIcon />,
@@ -153,22 +155,9 @@ const DetailsImoveis = () => {
     const fetchData = async () => {
       try {
         setLoading(true);
-        const authParams = new URLSearchParams();
-        authParams.append("username", "integracao");
-        authParams.append("password", "HScNneuN6PKxDq0");
-        authParams.append("grant_type", "password");
-
-        const authResponse = await axios.post(
-          "https://cmarqx.sigavi360.com.br/Sigavi/api/Acesso/Token",
-          authParams,
-          { headers: { "Content-Type": "application/x-www-form-urlencoded" } }
-        );
-
-        const token = authResponse.data.access_token;
-
+        // A ficha vem do backend, que mantém o token do Sigavi e guarda a resposta em cache
         const response = await axios.get(
-          `https://cmarqx.sigavi360.com.br/Sigavi/Api/Site/GetFichaTecnicaEmpreendimento/${id}`,
-          { headers: { Authorization: `Bearer ${token}` } }
+          `${LOCAL_API_BASE_URL}/api/empreendimentos/${id}/`
         );
 
         setImovel(response.data);